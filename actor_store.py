@@ -0,0 +1,209 @@
+import numpy as np
+
+from reid import DESCRIPTOR_SIZE, blend
+from tracklets import box_measurements
+
+# class vocabulary: COCO dataset ids (the same ids returned by YOLO), extended on demand for unknown names
+CLASS_NAMES = ['person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck', 'boat', 'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench', 'bird', 'cat', 'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe', 'backpack', 'umbrella', 'handbag', 'tie', 'suitcase', 'frisbee', 'skis', 'snowboard', 'sports ball', 'kite', 'baseball bat', 'baseball glove', 'skateboard', 'surfboard', 'tennis racket', 'bottle', 'wine glass', 'cup', 'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple', 'sandwich', 'orange', 'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair', 'couch', 'potted plant', 'bed', 'dining table', 'toilet', 'tv', 'laptop', 'mouse', 'remote', 'keyboard', 'cell phone', 'microwave', 'oven', 'toaster', 'sink', 'refrigerator', 'book', 'clock', 'vase', 'scissors', 'teddy bear', 'hair drier', 'toothbrush']
+
+# color vocabulary: names returned by calculate_color (red1 and red2 merged into red), extended on demand
+COLOR_NAMES = ['black', 'white', 'red', 'green', 'blue', 'yellow', 'purple', 'gray']
+
+# movement vocabulary: codes of ccs.Movement, names as stored in Actor.movement
+MOVEMENT_NAMES = ['None', 'Approaching', 'Leaving']
+
+_class_codes = {name: code for code, name in enumerate(CLASS_NAMES)}
+_color_codes = {name: code for code, name in enumerate(COLOR_NAMES)}
+
+def _code(names, codes, name):
+    code = codes.get(name)
+    if code is None:
+        code = len(names)
+        names.append(name)
+        codes[name] = code
+    return code
+
+def class_code(name):
+    return _code(CLASS_NAMES, _class_codes, name)
+
+def color_code(name):
+    return _code(COLOR_NAMES, _color_codes, name)
+
+class ActorStore():
+    """
+    Columnar storage of the actors of a single camera: one NumPy array per attribute, one row per actor.
+
+    Rows of evicted actors are recycled through a free list, so the arrays only grow with the number of
+    actors alive at the same time.
+
+    Attributes
+    ----------
+    ids : np.ndarray(int64)
+        unique identifier of the actor of each row, assigned by the camera image recognition
+    cls : np.ndarray(int16)
+        class code of each row (see CLASS_NAMES)
+    color : np.ndarray(int16)
+        color code of each row (see COLOR_NAMES)
+    size : np.ndarray(float64)
+        normalized area of each row
+    last_step : np.ndarray(int64)
+        step number in which the actor of each row was last seen
+    movement : np.ndarray(int8)
+        movement code of each row (see ccs.Movement)
+    seq : np.ndarray(int64)
+        insertion order of the actor of each row within the camera
+    alive : np.ndarray(bool)
+        whether each row holds a live actor
+    rows : {}
+        dictionary of int, int. Row of each live actor id, in insertion order
+    flips : int
+        number of actors whose movement changed in the last update
+    descriptor : np.ndarray(float32)
+        appearance descriptor of each row (capacity x reid.DESCRIPTOR_SIZE, see reid.descriptors), None until given
+    world : np.ndarray(float64)
+        world position (x, y) on the ground plane of each row (capacity x 2, see calibration.py), None until given
+    tracklets : TrackletFilter
+        Kalman filters of the rows, for the movement of the actors (None: movement from the size change of every update)
+    """
+    def __init__(self, capacity=64, tracklets=None):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.cls = np.zeros(capacity, dtype=np.int16)
+        self.color = np.zeros(capacity, dtype=np.int16)
+        self.size = np.zeros(capacity, dtype=np.float64)
+        self.last_step = np.zeros(capacity, dtype=np.int64)
+        self.movement = np.zeros(capacity, dtype=np.int8)
+        self.seq = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.rows = {}
+        self.flips = 0
+        self.descriptor = None
+        self.world = None
+        self.tracklets = tracklets
+        if tracklets is not None:
+            tracklets.grow(capacity)
+        self.__free = list(range(capacity - 1, -1, -1))
+        self.__seq = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __grow(self, needed):
+
+        # doubling the capacity of every column until the needed free rows are available
+        capacity = len(self.ids)
+        newCapacity = max(capacity * 2, capacity + needed)
+        for column in ('ids', 'cls', 'color', 'size', 'last_step', 'movement', 'seq', 'alive'):
+            old = getattr(self, column)
+            new = np.zeros(newCapacity, dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, column, new)
+        if self.descriptor is not None:
+            descriptor = np.zeros((newCapacity, self.descriptor.shape[1]), dtype=np.float32)
+            descriptor[:capacity] = self.descriptor
+            self.descriptor = descriptor
+        if self.world is not None:
+            world = np.full((newCapacity, 2), np.nan)
+            world[:capacity] = self.world
+            self.world = world
+        if self.tracklets is not None:
+            self.tracklets.grow(newCapacity)
+        self.__free = list(range(newCapacity - 1, capacity - 1, -1)) + self.__free
+
+    def update(self, ids, cls, color, size, n_step, boxes=None, descriptors=None, world=None):
+        """
+        Inserts or updates a whole detection batch (one entry per detected actor), with their boxes (x1, y1, x2, y2,
+        optional) for the tracklets, their appearance descriptors (optional, see reid.descriptors) and their world
+        positions (optional, x and y, NaN if unknown, see calibration.py).
+
+        Returns the ids of the new actors, and the ids of the updated actors whose class or color changed
+        along with their previous class and color codes.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        cls = np.asarray(cls, dtype=np.int16)
+        color = np.asarray(color, dtype=np.int16)
+        size = np.asarray(size, dtype=np.float64)
+
+        rows = np.fromiter((self.rows.get(id, -1) for id in ids.tolist()), dtype=np.int64, count=len(ids))
+        existing = rows >= 0
+
+        # step 1: updating existing actors (movement from the size evolution, or from the filtered scale velocity of
+        # the tracklets; unchanged when the size is the same or the velocity is within the deadband)
+        updated = rows[existing]
+        newSize = size[existing]
+        previousSize = self.size[updated]
+        previousMovement = self.movement[updated]
+        if self.tracklets is not None:
+            z = box_measurements(size, boxes)
+            movement = self.tracklets.update(updated, z[existing], n_step - self.last_step[updated])
+            movement = np.where(movement > 0, movement, previousMovement)
+        else:
+            movement = np.where(newSize > previousSize, 1, np.where(newSize < previousSize, 2, previousMovement))
+        self.flips = int(np.count_nonzero(movement != previousMovement))
+        self.movement[updated] = movement
+        changed = (self.cls[updated] != cls[existing]) | (self.color[updated] != color[existing])
+        changedRows = updated[changed]
+        changedIds = self.ids[changedRows]
+        previousCls = self.cls[changedRows]
+        previousColor = self.color[changedRows]
+        self.cls[updated] = cls[existing]
+        self.color[updated] = color[existing]
+        self.size[updated] = newSize
+        self.last_step[updated] = n_step
+        if descriptors is not None:
+            descriptors = np.asarray(descriptors, dtype=np.float32)
+            if self.descriptor is None:
+                self.descriptor = np.zeros((len(self.ids), descriptors.shape[1]), dtype=np.float32)
+            self.descriptor[updated] = blend(self.descriptor[updated], descriptors[existing])
+        if world is not None:
+            world = np.asarray(world, dtype=np.float64).reshape(-1, 2)
+            if self.world is None:
+                self.world = np.full((len(self.ids), 2), np.nan)
+            self.world[updated] = world[existing]
+
+        # step 2: appending new actors on free rows
+        inserted = ~existing
+        newIds = ids[inserted]
+        if len(newIds):
+            if len(newIds) > len(self.__free):
+                self.__grow(len(newIds) - len(self.__free))
+            newRows = np.array([self.__free.pop() for _ in range(len(newIds))], dtype=np.int64)
+            self.ids[newRows] = newIds
+            self.cls[newRows] = cls[inserted]
+            self.color[newRows] = color[inserted]
+            self.size[newRows] = size[inserted]
+            self.last_step[newRows] = n_step
+            self.movement[newRows] = 1
+            self.seq[newRows] = np.arange(self.__seq, self.__seq + len(newIds))
+            self.alive[newRows] = True
+            if self.tracklets is not None:
+                self.tracklets.init(newRows, z[inserted])
+            if descriptors is not None:
+                self.descriptor[newRows] = descriptors[inserted]
+            if world is not None:
+                self.world[newRows] = world[inserted]
+            self.__seq += len(newIds)
+            self.rows.update(zip(newIds.tolist(), newRows.tolist()))
+
+        return newIds, changedIds, previousCls, previousColor
+
+    def descriptors(self, ids):
+
+        # descriptors of the given live actor ids (zeros if not given to the store)
+        if self.descriptor is None:
+            return np.zeros((len(ids), DESCRIPTOR_SIZE), dtype=np.float32)
+        return self.descriptor[[self.rows[id] for id in ids]]
+
+    def positions(self, ids):
+
+        # world positions of the given live actor ids (NaN if not given to the store)
+        if self.world is None:
+            return np.full((len(ids), 2), np.nan)
+        return self.world[[self.rows[id] for id in ids]]
+
+    def remove_rows(self, rows):
+        ids = self.ids[rows]
+        self.alive[rows] = False
+        for id in ids.tolist():
+            del self.rows[id]
+        self.__free.extend(rows.tolist())
+        return ids, self.cls[rows], self.color[rows]
@@ -0,0 +1,90 @@
+"""
+Benchmark of the columnar actor store (ColumnarCamera) against the Actor object model (Camera):
+memory per actor and update throughput of a single camera.
+
+Usage (from the repository root): python -m benchmarks.actor_store [--actors N] [--steps S]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+from ccs import Actor, Camera, ColumnarCamera, Group
+from actor_store import class_code, color_code
+
+TYPES = ['person', 'car', 'truck', 'bus', 'bicycle']
+COLORS = ['black', 'white', 'red', 'green', 'blue', 'gray']
+
+def build_batches(actors, steps, seed=0):
+
+    # every step, 90% of the actors are seen again (with a new size) and the rest are replaced by new ones;
+    # type and color are kept per actor, except for a 2% of flickering detections
+    rnd = random.Random(seed)
+    ids = list(range(actors))
+    nextId = actors
+    features = {}
+    batches = []
+    for step in range(steps):
+        batch = []
+        for id in ids:
+            if id not in features or rnd.random() < 0.02:
+                features[id] = (rnd.choice(TYPES), rnd.choice(COLORS))
+            batch.append((id, features[id][0], features[id][1], round(rnd.random(), 6)))
+        batches.append(batch)
+        for i in rnd.sample(range(actors), actors // 10):
+            ids[i] = nextId
+            nextId += 1
+    return batches
+
+def measure_memory(cameraClass, batch):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    camera = cameraClass("CAM-1")
+    camera.updateActors(Group("bench"), 1, [Actor(id, type, color, size) for id, type, color, size in batch], 0)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return allocated / len(batch)
+
+def measure_updates(camera, group, batches, columns):
+    start = time.perf_counter()
+    for step, batch in enumerate(batches):
+        if columns:
+            ids, cls, colors, sizes = batch
+            camera.updateBatch(group, 1, ids, cls, colors, sizes, step)
+        else:
+            camera.updateActors(group, 1, batch, step)
+        camera.evictActors(group, 1, step)
+    elapsed = time.perf_counter() - start
+    return sum(len(batch[0]) if columns else len(batch) for batch in batches) / elapsed
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--actors', type=int, default=2000, help='actors per camera (default: 2000)')
+    argparser.add_argument('--steps', type=int, default=50, help='number of steps (default: 50)')
+    args = argparser.parse_args()
+
+    batches = build_batches(args.actors, args.steps)
+    objectBatches = [[Actor(id, type, color, size) for id, type, color, size in batch] for batch in batches]
+    columnBatches = [(np.array([d[0] for d in batch], dtype=np.int64),
+                      np.array([class_code(d[1]) for d in batch], dtype=np.int16),
+                      np.array([color_code(d[2]) for d in batch], dtype=np.int16),
+                      np.array([d[3] for d in batch], dtype=np.float64)) for batch in batches]
+
+    print(f"{args.actors} actors per camera, {args.steps} steps")
+    print(f"{'model':<28}{'bytes/actor':>14}{'updates/s':>16}")
+    rows = [
+        ('Camera (Actor objects)', Camera, objectBatches, False),
+        ('ColumnarCamera (objects)', ColumnarCamera, objectBatches, False),
+        ('ColumnarCamera (arrays)', ColumnarCamera, columnBatches, True),
+    ]
+    for name, cameraClass, workload, columns in rows:
+        memory = measure_memory(cameraClass, batches[0])
+        throughput = measure_updates(cameraClass("CAM-1"), Group("bench"), workload, columns)
+        print(f"{name:<28}{memory:>14.1f}{throughput:>16.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark of the camera profiles (camera_profiles.py: region of interest and inference image size per camera):
+detection and tracking latency of every camera with its profile against the full frame at 640, and the time saved.
+
+Frames of each camera are read from its directory (test_yolo_multicamera/<camera>) or are synthetic noise frames.
+
+Usage (from the repository root): python -m benchmarks.camera_profiles [--profiles camera_profiles.json] [--steps S] [--images DIR]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from camera_profiles import load_profiles
+
+def load_frames(images, cameraId, count):
+    files = sorted(glob.glob(os.path.join(images, str(cameraId), '*.png'))) if images else []
+    if files:
+        return [cv2.imread(files[i % len(files)]) for i in range(count)]
+    rnd = np.random.default_rng(cameraId)
+    return [rnd.integers(0, 256, (480, 640, 3), dtype=np.uint8) for _ in range(count)]
+
+def latency(detector, cameraId, frames):
+
+    # median milliseconds per frame of a camera (first frame out of the timing: model warm up)
+    detector.reset(cameraId)
+    detector.track({cameraId: frames[0]})
+    times = []
+    for frame in frames[1:]:
+        start = time.perf_counter()
+        detector.track({cameraId: frame})
+        times.append(time.perf_counter() - start)
+    return 1000 * float(np.median(times))
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--profiles', default='camera_profiles.json', help='JSON file of the camera profiles (default: camera_profiles.json)')
+    argparser.add_argument('--steps', type=int, default=30, help='frames per camera (default: 30)')
+    argparser.add_argument('--images', default='test_yolo_multicamera', help='directory with a frame directory per camera (default: test_yolo_multicamera, synthetic frames if missing)')
+    argparser.add_argument('--weights', default='yolov8n.pt', help='YOLO weights (default: yolov8n.pt)')
+    args = argparser.parse_args()
+
+    from detector import Detector
+
+    profiles = load_profiles(args.profiles)
+    full = Detector(args.weights, conf=0.5)
+    profiled = Detector(args.weights, conf=0.5, profiles=profiles)
+
+    print(f"{'camera':>8}{'roi':>22}{'imgsz':>7}{'full ms':>10}{'profile ms':>12}{'saved ms':>10}{'saved %':>9}")
+    for cameraId, profile in sorted(profiles.items()):
+        frames = load_frames(args.images, cameraId, args.steps)
+        fullTime = latency(full, cameraId, frames)
+        profiledTime = latency(profiled, cameraId, frames)
+        roi = f"{profile.mode} {profile.bounds(frames[0].shape)}"
+        print(f"{cameraId:>8}{roi:>22}{profile.imgsz:>7}{fullTime:>10.2f}{profiledTime:>12.2f}"
+              f"{fullTime - profiledTime:>10.2f}{100 * (fullTime - profiledTime) / fullTime:>8.1f}%")
+
+if __name__ == '__main__':
+    main()
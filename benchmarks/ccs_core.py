@@ -0,0 +1,194 @@
+"""
+Benchmark suite of the CCS core (ccs.CentralCameraSystem) over a seeded synthetic workload, without YOLO or CARLA:
+latency percentiles (p50/p95/p99 per step) of updateCamera, step and identify_dangers, and peak memory.
+
+The workload is N groups x M cameras x K actors per group: every actor of a group has a type and a color (drawn from
+the class and color mixes) and is seen by each camera with a given probability, with a track id of its own in each
+camera, and a size that grows or shrinks over time. Every step a fraction of the actors (churn) leave the scene and are
+replaced by new ones. Results are written as JSON, so that runs of different versions can be compared (--columnar
+falls back to object cameras on versions without the columnar store, the mode actually used is in the results).
+
+Usage (from the repository root):
+    python -m benchmarks.ccs_core [--groups N] [--cameras M] [--actors K] [--steps S] [--churn C]
+                                  [--classes person=0.5,car=0.5] [--colors red=1,blue=1] [--columnar]
+                                  [--label LABEL] [--output results.json]
+"""
+
+import argparse
+import inspect
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.memory import resident_memory
+from ccs import Actor, CentralCameraSystem
+
+CLASS_MIX = {'person': 0.4, 'car': 0.35, 'truck': 0.1, 'bus': 0.05, 'bicycle': 0.1}
+COLOR_MIX = {'black': 1, 'white': 1, 'red': 1, 'green': 1, 'blue': 1, 'gray': 1}
+PERCENTILES = (50, 95, 99)
+
+def parse_mix(text):
+
+    # "person=0.5,car=0.5" => {'person': 0.5, 'car': 0.5}
+    mix = {}
+    for item in text.split(','):
+        name, weight = item.split('=')
+        mix[name.strip()] = float(weight)
+    return mix
+
+class SyntheticWorkload():
+    """
+    Seeded generator of detection streams for N groups x M cameras x K actors.
+
+    Attributes
+    ----------
+    groups, cameras, actors : int
+        number of groups, cameras per group and actors per group in the scene at any time
+    churn : float
+        fraction of the actors of a group replaced by new ones every step
+    visibility : float
+        probability that a camera sees a given actor of its group
+    classMix, colorMix : {}
+        relative weights of the types and colors of the actors
+    seed : int
+        seed of the random generator (same seed => same stream)
+    """
+    def __init__(self, groups=10, cameras=3, actors=20, churn=0.1, visibility=0.7, classMix=None, colorMix=None, seed=0):
+        self.groups = groups
+        self.cameras = cameras
+        self.actors = actors
+        self.churn = churn
+        self.visibility = visibility
+        self.classMix = classMix or CLASS_MIX
+        self.colorMix = colorMix or COLOR_MIX
+        self.seed = seed
+
+    def __newActor(self, rnd, cameras):
+
+        # type, color, size, size trend and track id in each camera (None if not seen by that camera)
+        type = rnd.choices(list(self.classMix), weights=list(self.classMix.values()))[0]
+        color = rnd.choices(list(self.colorMix), weights=list(self.colorMix.values()))[0]
+        tracks = [next(cameras[cameraId]) if rnd.random() < self.visibility else None for cameraId in range(self.cameras)]
+        return [type, color, rnd.uniform(0.001, 0.05), rnd.choice((-1, 1)) * rnd.uniform(0.0001, 0.001), tracks]
+
+    def steps(self, steps):
+        """
+        Yields, for each step, the list of (groupId, cameraId, [(id, type, color, size)]) camera updates.
+        """
+        rnd = random.Random(self.seed)
+        trackIds = {}
+        scenes = {}
+        for groupId in range(1, self.groups + 1):
+            cameras = [iter(range(sys.maxsize)) for _ in range(self.cameras)]
+            trackIds[groupId] = cameras
+            scenes[groupId] = [self.__newActor(rnd, cameras) for _ in range(self.actors)]
+
+        for step in range(steps):
+            updates = []
+            for groupId, scene in scenes.items():
+                for i in rnd.sample(range(self.actors), int(round(self.actors * self.churn))):
+                    scene[i] = self.__newActor(rnd, trackIds[groupId])
+                for actor in scene:
+                    actor[2] = min(1.0, max(0.0001, actor[2] + actor[3]))
+                for cameraId in range(self.cameras):
+                    detections = [(actor[4][cameraId], actor[0], actor[1], round(actor[2], 6)) for actor in scene if actor[4][cameraId] is not None]
+                    updates.append((groupId, cameraId + 1, detections))
+            yield updates
+
+def build_ccs(columnar=False):
+
+    # versions of the CCS before the columnar store only have object cameras: the mode actually used is returned
+    if columnar and 'columnar' in inspect.signature(CentralCameraSystem).parameters:
+        return CentralCameraSystem(columnar=True), True
+    return CentralCameraSystem(), False
+
+def run(workload, steps, columnar=False):
+
+    # latency per step (seconds) of all the updateCamera calls of the step, step() and identify_dangers()
+    ccs, _ = build_ccs(columnar)
+    latencies = {'updateCamera': [], 'step': [], 'identify_dangers': []}
+    for updates in workload.steps(steps):
+        objects = [(groupId, cameraId, [Actor(*detection) for detection in detections]) for groupId, cameraId, detections in updates]
+        start = time.perf_counter()
+        for groupId, cameraId, actors in objects:
+            ccs.updateCamera(groupId, cameraId, actors)
+        latencies['updateCamera'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ccs.step()
+        latencies['step'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ccs.identify_dangers()
+        latencies['identify_dangers'].append(time.perf_counter() - start)
+    return ccs, latencies
+
+def peak_memory(workload, steps, columnar=False):
+
+    # peak of the memory traced while running the same workload (in a separate pass, tracing slows it down)
+    tracemalloc.start()
+    run(workload, steps, columnar)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+def summarize(latencies):
+    result = {}
+    for name, values in latencies.items():
+        values = np.array(values) * 1000.0
+        result[name] = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+        result[name]['mean'] = float(values.mean())
+    return result
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--groups', type=int, default=10, help='number of groups (default: 10)')
+    argparser.add_argument('--cameras', type=int, default=3, help='cameras per group (default: 3)')
+    argparser.add_argument('--actors', type=int, default=20, help='actors per group (default: 20)')
+    argparser.add_argument('--steps', type=int, default=200, help='number of steps (default: 200)')
+    argparser.add_argument('--churn', type=float, default=0.1, help='fraction of actors replaced per step (default: 0.1)')
+    argparser.add_argument('--visibility', type=float, default=0.7, help='probability that a camera sees an actor (default: 0.7)')
+    argparser.add_argument('--classes', type=parse_mix, default=CLASS_MIX, help='class mix, e.g. person=0.5,car=0.5')
+    argparser.add_argument('--colors', type=parse_mix, default=COLOR_MIX, help='color mix, e.g. red=1,blue=1')
+    argparser.add_argument('--seed', type=int, default=0, help='seed of the workload (default: 0)')
+    argparser.add_argument('--columnar', action='store_true', help='use columnar cameras')
+    argparser.add_argument('--no-memory', action='store_true', help='skip the peak memory pass')
+    argparser.add_argument('--label', default=None, help='label of the run (e.g. version or commit)')
+    argparser.add_argument('--output', default=None, help='JSON file to write the results to')
+    args = argparser.parse_args()
+
+    workload = SyntheticWorkload(args.groups, args.cameras, args.actors, args.churn, args.visibility, args.classes, args.colors, args.seed)
+    _, columnar = build_ccs(args.columnar)
+    if args.columnar and not columnar:
+        print("columnar cameras not available in this version, using object cameras")
+    ccs, latencies = run(workload, args.steps, columnar)
+    results = {
+        'label': args.label,
+        'python': platform.python_version(),
+        'workload': {'groups': args.groups, 'cameras': args.cameras, 'actors': args.actors, 'steps': args.steps, 'churn': args.churn,
+                     'visibility': args.visibility, 'classes': args.classes, 'colors': args.colors, 'seed': args.seed, 'columnar': columnar},
+        'latency_ms': summarize(latencies),
+        'common_objects': sum(len(group.common) for group in ccs.data.values()),
+        'dangers': sum(len(group.dangers) for group in ccs.data.values()),
+        'peak_traced_bytes': None if args.no_memory else peak_memory(workload, args.steps, columnar),
+        'rss_mib': resident_memory(),
+    }
+
+    print(f"{args.groups} groups x {args.cameras} cameras x {args.actors} actors, {args.steps} steps{', columnar' if columnar else ''}")
+    print(f"{'ms/step':>18}" + "".join(f"{f'p{p}':>10}" for p in PERCENTILES))
+    for name, stats in results['latency_ms'].items():
+        print(f"{name:>18}" + "".join(f"{stats[f'p{p}']:>10.3f}" for p in PERCENTILES))
+    if results['peak_traced_bytes'] is not None:
+        print(f"peak traced memory: {results['peak_traced_bytes'] / 1024:.1f} KiB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Scaling benchmark of ParallelCentralCameraSystem: steps per second with an increasing number of workers,
+over a synthetic district of hundreds of intersection groups (3 cameras each).
+
+Usage (from the repository root): python -m benchmarks.ccs_parallel [--groups N] [--actors K] [--workers 1 2 4 ...]
+"""
+
+import argparse
+import os
+import random
+import time
+
+from ccs import Actor, CentralCameraSystem
+from ccs_parallel import ParallelCentralCameraSystem
+
+TYPES = ['person', 'car', 'truck', 'bus', 'bicycle']
+COLORS = ['black', 'white', 'red', 'green', 'blue', 'gray']
+
+def build_steps(groups, cameras, actors, steps, seed=0):
+
+    # per step and camera: the detections (id, type, color, size) of the actors in view, with a 10% churn per step
+    rnd = random.Random(seed)
+    scenes = {}
+    for groupId in range(1, groups + 1):
+        for cameraId in range(1, cameras + 1):
+            scenes[(groupId, cameraId)] = {id: [rnd.choice(TYPES), rnd.choice(COLORS), rnd.random()] for id in range(actors)}
+    nextId = actors
+    result = []
+    for step in range(steps):
+        updates = []
+        for (groupId, cameraId), scene in scenes.items():
+            for id in rnd.sample(list(scene), max(1, actors // 10)):
+                del scene[id]
+                scene[nextId] = [rnd.choice(TYPES), rnd.choice(COLORS), rnd.random()]
+                nextId += 1
+            for features in scene.values():
+                features[2] = max(0.0, features[2] + rnd.uniform(-0.01, 0.01))
+            updates.append((groupId, cameraId, [(id, *features) for id, features in scene.items()]))
+        result.append(updates)
+    return result
+
+def run(ccs, steps):
+    start = time.perf_counter()
+    for updates in steps:
+        for groupId, cameraId, detections in updates:
+            ccs.updateCamera(groupId, cameraId, [Actor(id, type, color, size) for id, type, color, size in detections])
+        ccs.step()
+        ccs.identify_dangers()
+    return len(steps) / (time.perf_counter() - start)
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--groups', type=int, default=300, help='number of groups (default: 300)')
+    argparser.add_argument('--cameras', type=int, default=3, help='cameras per group (default: 3)')
+    argparser.add_argument('--actors', type=int, default=20, help='actors per camera (default: 20)')
+    argparser.add_argument('--steps', type=int, default=30, help='number of steps (default: 30)')
+    argparser.add_argument('--mode', choices=['process', 'thread'], default='process', help='worker mode (default: process)')
+    argparser.add_argument('--workers', type=int, nargs='+', default=None, help='numbers of workers to measure (default: 1 2 4 ... cpu count)')
+    args = argparser.parse_args()
+
+    workers = args.workers or [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= (os.cpu_count() or 1)]
+    steps = build_steps(args.groups, args.cameras, args.actors, args.steps)
+
+    print(f"{args.groups} groups x {args.cameras} cameras x {args.actors} actors, {args.steps} steps, {args.mode} mode")
+    baseline = run(CentralCameraSystem(), steps)
+    print(f"{'workers':>10}{'steps/s':>12}{'speedup':>10}")
+    print(f"{'serial':>10}{baseline:>12.2f}{1.0:>10.2f}")
+    for n in workers:
+        with ParallelCentralCameraSystem(workers=n, mode=args.mode) as ccs:
+            throughput = run(ccs, steps)
+        print(f"{n:>10}{throughput:>12.2f}{throughput / baseline:>10.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark of the color engine (color_engine.calculate_colors: HSV lookup table labeling and batched box histograms,
+by method) against the original per-crop calculate_color (HSV conversion and one inRange pass per color range).
+The colors of every method are checked to be the same as the original ones.
+
+Usage (from the repository root): python -m benchmarks.color_engine [--boxes N] [--frames F] [--image PATH]
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+import color_engine
+
+def legacy_calculate_color(img):
+
+    # original implementation of calculate_color (hazard_identification.py, before the color engine)
+    hsvFrame = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    colors_result = {}
+    for color_name in color_engine.COLOR_DICT_HSV:
+        mask = cv2.inRange(hsvFrame, np.array(color_engine.COLOR_DICT_HSV[color_name][1], np.uint8), np.array(color_engine.COLOR_DICT_HSV[color_name][0], np.uint8))
+        pixels_inrange = np.sum(mask==255)
+        colors_result[color_name] = pixels_inrange
+    most_probable_color = max(colors_result, key=colors_result.get)
+    if most_probable_color == 'red1' or most_probable_color == 'red2':
+        most_probable_color = 'red'
+    return most_probable_color
+
+def build_frame(rnd, width=640, height=480):
+
+    # noisy frame made of solid patches of random colors (so that every color range is hit)
+    frame = rnd.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    for _ in range(60):
+        x, y = rnd.integers(0, width - 20), rnd.integers(0, height - 20)
+        w, h = rnd.integers(10, 200), rnd.integers(10, 150)
+        frame[y:y + h, x:x + w] = rnd.integers(0, 256, 3)
+    return frame
+
+def build_boxes(rnd, boxes, width=640, height=480):
+    x1 = rnd.integers(0, width - 8, boxes)
+    y1 = rnd.integers(0, height - 8, boxes)
+    x2 = np.minimum(x1 + rnd.integers(8, 160, boxes), width)
+    y2 = np.minimum(y1 + rnd.integers(8, 160, boxes), height)
+    return np.stack([x1, y1, x2, y2], axis=1)
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--boxes', type=int, default=20, help='boxes per frame (default: 20)')
+    argparser.add_argument('--frames', type=int, default=50, help='number of frames (default: 50)')
+    argparser.add_argument('--image', default=None, help='use this image instead of synthetic frames')
+    argparser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    args = argparser.parse_args()
+
+    rnd = np.random.default_rng(args.seed)
+    frames = []
+    for _ in range(args.frames):
+        frame = cv2.imread(args.image) if args.image else build_frame(rnd)
+        frames.append((frame, build_boxes(rnd, args.boxes, frame.shape[1], frame.shape[0])))
+
+    # building the lookup table once, before timing (as on the first frame of a run)
+    start = time.perf_counter()
+    color_engine.hsv_lut()
+    print(f"lookup table built in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    legacy = [[legacy_calculate_color(frame[y1:y2, x1:x2]) for x1, y1, x2, y2 in boxes.tolist()] for frame, boxes in frames]
+    legacyTime = time.perf_counter() - start
+
+    print(f"{args.frames} frames x {args.boxes} boxes")
+    print(f"{'method':>12}{'ms/frame':>12}{'speedup':>10}")
+    print(f"{'per-crop':>12}{legacyTime / args.frames * 1000:>12.3f}{1.0:>10.2f}")
+    for method in ('crops', 'bincount', 'integral', 'auto'):
+        start = time.perf_counter()
+        result = [color_engine.calculate_colors(frame, boxes, method) for frame, boxes in frames]
+        elapsed = time.perf_counter() - start
+        assert result == legacy, f"{method} colors differ from the per-crop function"
+        print(f"{method:>12}{elapsed / args.frames * 1000:>12.3f}{legacyTime / elapsed:>10.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark of the danger rule engine (danger_rules.DangerRuleEngine) against the original hardcoded
+identify_dangers loop, over a single group with thousands of common objects.
+
+Usage (from the repository root): python -m benchmarks.danger_rules [--common N] [--vehicles F] [--persons F]
+"""
+
+import argparse
+import random
+import time
+
+from ccs import Actor, Camera, Group
+from danger_rules import DangerRuleEngine
+
+def legacy_identify_dangers(group):
+
+    # original implementation of CentralCameraSystem.identify_dangers (before the rule engine), for a single group
+    dangers = []
+    treatedCommonIds = {}
+    for commonObj in group.common:
+        if not commonObj.id in treatedCommonIds and commonObj.commonCamerasIds and 3 in commonObj.commonCamerasIds and commonObj.type != 'person':
+            objInCam3 = group.cameras[3].actors[commonObj.commonCamerasIds[3]]
+            if objInCam3.movement == "Approaching":
+                for commonObj2 in group.common:
+                    if commonObj2.type == 'person' and commonObj2.commonCamerasIds and (2 in commonObj2.commonCamerasIds or 1 in commonObj2.commonCamerasIds) :
+                        dangers.append(f"DANGER: CommonId {commonObj.id} in CAM3 and CommonId {commonObj2.id} in CAM1 or CAM2")
+                        if not commonObj.id in treatedCommonIds:
+                            treatedCommonIds[commonObj.id] = True
+                        if not commonObj2.id in treatedCommonIds:
+                            treatedCommonIds[commonObj2.id] = True
+    return dangers
+
+def build_group(common, vehicles, persons, seed=0):
+
+    # common objects seen by 2 of the 3 cameras; only a fraction of them are approaching vehicles in CAM3
+    # or persons in CAM1/CAM2 (the rest are vehicles elsewhere, leaving or with other types)
+    rnd = random.Random(seed)
+    group = Group("bench")
+    for cameraId in (1, 2, 3):
+        group.cameras[cameraId] = Camera(f"CAM-{cameraId}")
+    for commonId in range(1, common + 1):
+        draw = rnd.random()
+        if draw < vehicles:
+            type, cameras, movement = 'car', (3, rnd.choice((1, 2))), "Approaching"
+        elif draw < vehicles + persons:
+            first = rnd.choice((1, 2))
+            type, cameras, movement = 'person', (first, rnd.choice([cameraId for cameraId in (1, 2, 3) if cameraId != first])), "Leaving"
+        else:
+            type, cameras, movement = rnd.choice(['car', 'truck', 'bus']), (1, 2), "Leaving"
+        group.commonObjects[commonId] = Actor(commonId, type, 'red')
+        for cameraId in cameras:
+            actor = Actor(commonId, type, 'red')
+            actor.movement = movement
+            group.cameras[cameraId].addActor(actor)
+            group.addMember(commonId, cameraId, commonId)
+    return group
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--common', type=int, nargs='+', default=[1000, 2000, 5000], help='common objects of the group (default: 1000 2000 5000)')
+    argparser.add_argument('--vehicles', type=float, default=0.02, help='fraction of approaching vehicles in CAM3 (default: 0.02)')
+    argparser.add_argument('--persons', type=float, default=0.02, help='fraction of persons in CAM1/CAM2 (default: 0.02)')
+    argparser.add_argument('--repeat', type=int, default=5, help='repetitions of each measure (default: 5)')
+    args = argparser.parse_args()
+
+    engine = DangerRuleEngine()
+    print(f"{'common':>8}{'dangers':>10}{'legacy (ms)':>14}{'engine (ms)':>14}{'speedup':>10}")
+    for common in args.common:
+        group = build_group(common, args.vehicles, args.persons)
+        legacyTime, legacy = timed(lambda: legacy_identify_dangers(group), args.repeat)
+        engineTime, dangers = timed(lambda: engine.evaluate(1, group), args.repeat)
+        assert legacy == [str(danger) for danger in dangers], "the rule engine differs from the original heuristic"
+        print(f"{common:>8}{len(dangers):>10}{legacyTime * 1000:>14.2f}{engineTime * 1000:>14.2f}{legacyTime / engineTime:>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark of the shared detector (detector.Detector: one model, batched inference, a tracker per camera) against
+one YOLO model per camera (YOLO.track with persist=True): frames per second and resident memory for 1, 3 and 8 cameras.
+
+Every configuration runs in a process of its own, so that the resident memory of one does not include the others.
+Frames are read from --images (cycled over the cameras) or are synthetic noise frames.
+
+Usage (from the repository root): python -m benchmarks.detector [--cameras 1 3 8] [--steps S] [--images DIR]
+"""
+
+import argparse
+import glob
+import multiprocessing
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.memory import resident_memory
+
+def load_frames(images, count):
+    if images:
+        files = sorted(glob.glob(f"{images}/*.png")) or sorted(glob.glob(f"{images}/*.jpg"))
+        return [cv2.imread(files[i % len(files)]) for i in range(count)]
+    rnd = np.random.default_rng(0)
+    return [rnd.integers(0, 256, (480, 640, 3), dtype=np.uint8) for _ in range(count)]
+
+def run(mode, cameras, steps, images, weights, queue):
+    from ultralytics import YOLO
+    from detector import Detector
+
+    frames = load_frames(images, steps + cameras)
+    if mode == 'shared':
+        detector = Detector(weights, conf=0.5)
+        track = lambda step: detector.track({cameraId: frames[step + cameraId] for cameraId in range(cameras)})
+    else:
+        models = [YOLO(weights) for _ in range(cameras)]
+        track = lambda step: [model.track(frames[step + cameraId], persist=True, conf=0.5, verbose=False) for cameraId, model in enumerate(models)]
+
+    # first step out of the timing (model warm up)
+    track(0)
+    start = time.perf_counter()
+    for step in range(1, steps):
+        track(step)
+    elapsed = time.perf_counter() - start
+    queue.put(((steps - 1) * cameras / elapsed, resident_memory()))
+
+def measure(mode, cameras, steps, images, weights):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run, args=(mode, cameras, steps, images, weights, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--cameras', type=int, nargs='+', default=[1, 3, 8], help='numbers of cameras (default: 1 3 8)')
+    argparser.add_argument('--steps', type=int, default=30, help='steps per configuration (default: 30)')
+    argparser.add_argument('--images', default=None, help='directory with the frames to use (default: synthetic frames)')
+    argparser.add_argument('--weights', default='yolov8n.pt', help='YOLO weights (default: yolov8n.pt)')
+    args = argparser.parse_args()
+
+    print(f"{'cameras':>8}{'mode':>12}{'frames/s':>12}{'RSS MiB':>12}")
+    for cameras in args.cameras:
+        for mode in ('per-camera', 'shared'):
+            fps, rss = measure(mode, cameras, args.steps, args.images, args.weights)
+            print(f"{cameras:>8}{mode:>12}{fps:>12.2f}{rss:>12.1f}")
+
+if __name__ == '__main__':
+    main()
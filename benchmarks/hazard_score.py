@@ -0,0 +1,97 @@
+"""
+Benchmark of the danger scoring by time to collision (hazard_score.HazardScorer as the rules of the CCS): a group of
+two cameras seeing the same vehicles and persons walking and driving on the ground (matched by position, see
+spatial_matcher.py), some of them on collision courses, reporting the time of the danger identification of every step
+against the same closest approach computed pair by pair in Python, and checking that both give the same scores.
+
+Usage (from the repository root): python -m benchmarks.hazard_score [--vehicles N] [--persons M] [--steps S] [--window K]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from actor_store import class_code, color_code
+from ccs import CentralCameraSystem
+from hazard_score import HazardScorer, fit_motion
+from spatial_matcher import SpatialMatcher
+
+def pairwise(scorer, vehicles, persons):
+
+    # reference: closest approach of every pair, one at a time
+    scores = np.zeros((len(vehicles), len(persons)))
+    for v, (pv, vv) in enumerate(vehicles):
+        for p, (pp, vp) in enumerate(persons):
+            position, velocity = pv - pp, vv - vp
+            speed = float(velocity @ velocity)
+            ttc = max(0.0, -float(position @ velocity) / speed) if speed > 0 else 0.0
+            distance = float(np.linalg.norm(position + velocity * ttc))
+            scores[v, p] = max(0.0, 1 - distance / scorer.safeDistance) * max(0.0, 1 - ttc / scorer.horizon)
+    return scores
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--vehicles', type=int, default=150, help='vehicles in the scene (default: 150)')
+    argparser.add_argument('--persons', type=int, default=150, help='persons in the scene (default: 150)')
+    argparser.add_argument('--steps', type=int, default=30, help='steps (default: 30)')
+    argparser.add_argument('--window', type=int, default=8, help='last observations used for the motion (default: 8)')
+    args = argparser.parse_args()
+
+    rnd = np.random.default_rng(0)
+    n = args.vehicles + args.persons
+    scorer = HazardScorer(window=args.window)
+    ccs = CentralCameraSystem(columnar=True, rules=scorer, matcher=SpatialMatcher(1.0), history=32)
+
+    # step 1: vehicles and persons on a 200 m grid (far enough apart to be matched), a fifth of the persons in the path of a vehicle
+    cells = rnd.permutation(40 * 40)[:n]
+    positions = np.column_stack([cells // 40, cells % 40]) * 5.0
+    velocities = np.concatenate([rnd.normal(0, 8, (args.vehicles, 2)), rnd.normal(0, 1.2, (args.persons, 2))])
+    crossing = rnd.permutation(args.persons)[:args.persons // 5]
+    for i, p in enumerate(crossing.tolist()):
+        v = i % args.vehicles
+        positions[args.vehicles + p] = positions[v] + velocities[v] * 2.0
+        velocities[args.vehicles + p] = 0
+    cls = np.array([class_code('car')] * args.vehicles + [class_code('person')] * args.persons)
+    colors = np.full(n, color_code('black'))
+    ids = {1: np.arange(n), 2: np.arange(n) + 10 ** 6}
+
+    print(f"{args.vehicles} vehicles x {args.persons} persons, {args.steps} steps, window {args.window}")
+    timings, loopTimings = [], []
+    for step in range(args.steps):
+        noise = {cameraId: rnd.normal(0, 0.05, (n, 2)) for cameraId in ids}
+        for cameraId, cameraIds in ids.items():
+            ccs.updateCameraBatch(1, cameraId, cameraIds, cls, colors, np.full(n, 0.01), ttl=2, world=positions + noise[cameraId])
+        ccs.step()
+        start = time.perf_counter()
+        ccs.identify_dangers()
+        timings.append(time.perf_counter() - start)
+        positions = positions + velocities * scorer.stepSeconds
+
+    # step 2: the same scores pair by pair, from the same fitted motion
+    group = ccs.data[1]
+    vehicles, persons, scores, _, _ = scorer.score(group)
+    motions = scorer.motion(group, vehicles + persons)
+    objects = list(zip(*motions))
+    start = time.perf_counter()
+    reference = pairwise(scorer, objects[:len(vehicles)], objects[len(vehicles):])
+    loopTimings.append(time.perf_counter() - start)
+
+    print(f"common objects: {len(group.common)} ({len(vehicles)} vehicles, {len(persons)} persons)")
+    print(f"dangers at the last step: {len(group.dangers)} over {scorer.threshold} (persons in a vehicle path: {len(crossing)})")
+    if group.dangers:
+        print(f"most urgent: {group.dangers[0]}")
+    print(f"identify_dangers: {np.median(timings[args.window:] or timings) * 1000:.2f} ms per step (median)")
+    print(f"pair by pair:     {np.median(loopTimings) * 1000:.2f} ms")
+    print(f"same scores: {np.allclose(scores, np.nan_to_num(reference), atol=1e-9)}")
+
+    # step 3: the motion fit alone, for the members of all the common objects of a camera
+    trajectories = group.cameras[1].trajectories
+    start = time.perf_counter()
+    _, steps = trajectories.last(args.window, 'steps')
+    _, world = trajectories.last(args.window, 'world')
+    fit_motion(steps, world)
+    print(f"motion fit of {len(trajectories)} trajectories: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark of the CCS ingestion paths: Actor objects (updateCamera) against columns
+(updateCameraBatch / ingest), with both camera models (Camera and ColumnarCamera).
+
+Usage (from the repository root): python -m benchmarks.ingest [--detections N] [--steps S]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from actor_store import CLASS_NAMES, COLOR_NAMES
+from benchmarks.ccs_core import build_ccs
+from ccs import Actor
+
+def build_frames(detections, cameras, steps, seed=0):
+
+    # per step, the detections of every camera as columns: track ids (10% churn), COCO class ids, color codes, areas
+    rnd = np.random.default_rng(seed)
+    ids = {cameraId: np.arange(detections, dtype=np.int64) for cameraId in range(1, cameras + 1)}
+    features = {}
+    frames = []
+    for step in range(steps):
+        frame = {}
+        for cameraId in ids:
+            churn = rnd.choice(detections, detections // 10, replace=False)
+            ids[cameraId][churn] = ids[cameraId].max() + 1 + np.arange(len(churn))
+            for id in ids[cameraId].tolist():
+                if (cameraId, id) not in features:
+                    features[(cameraId, id)] = (int(rnd.choice([0, 1, 2, 3, 5, 7])), int(rnd.integers(0, 8)))
+            classIds = np.array([features[(cameraId, id)][0] for id in ids[cameraId].tolist()], dtype=np.int64)
+            colorCodes = np.array([features[(cameraId, id)][1] for id in ids[cameraId].tolist()], dtype=np.int64)
+            areas = np.round(rnd.random(detections), 6)
+            frame[cameraId] = (ids[cameraId].copy(), classIds, colorCodes, areas)
+        frames.append(frame)
+    return frames
+
+def object_path(ccs, frames):
+
+    # previous ingestion path: an Actor per detection, built from the YOLO results
+    elapsed = 0
+    for frame in frames:
+        start = time.perf_counter()
+        for cameraId, (ids, classIds, colorCodes, areas) in frame.items():
+            objects = [Actor(id=int(ids[i]), type=CLASS_NAMES[classIds[i]], color=COLOR_NAMES[colorCodes[i]], size=float(areas[i])) for i in range(len(ids))]
+            ccs.updateCamera(1, cameraId, objects)
+        elapsed += time.perf_counter() - start
+        ccs.step()
+    return elapsed
+
+def batch_path(ccs, frames):
+    elapsed = 0
+    for frame in frames:
+        start = time.perf_counter()
+        ccs.ingest(1, frame)
+        elapsed += time.perf_counter() - start
+        ccs.step()
+    return elapsed
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--detections', type=int, default=200, help='detections per camera and step (default: 200)')
+    argparser.add_argument('--cameras', type=int, default=3, help='cameras of the group (default: 3)')
+    argparser.add_argument('--steps', type=int, default=100, help='number of steps (default: 100)')
+    args = argparser.parse_args()
+
+    frames = build_frames(args.detections, args.cameras, args.steps)
+    total = args.detections * args.cameras * args.steps
+    print(f"{args.detections} detections x {args.cameras} cameras, {args.steps} steps (ingestion time only)")
+    print(f"{'path':<32}{'detections/s':>16}")
+    for name, columnar, path in [('Camera, objects', False, object_path), ('Camera, columns', False, batch_path),
+                                 ('ColumnarCamera, objects', True, object_path), ('ColumnarCamera, columns', True, batch_path)]:
+        ccs, used = build_ccs(columnar)
+        if used != columnar:
+            print(f"{name:<32}{'not available':>16}")
+            continue
+        elapsed = path(ccs, frames)
+        print(f"{name:<32}{total / elapsed:>16.0f}")
+
+if __name__ == '__main__':
+    main()
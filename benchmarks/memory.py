@@ -0,0 +1,19 @@
+"""
+Memory helpers shared by the benchmarks (no dependency on the modules being measured).
+"""
+
+def resident_memory():
+
+    # current resident set size in MiB (Linux), or the peak one elsewhere (resource is not available on Windows)
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
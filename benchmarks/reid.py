@@ -0,0 +1,67 @@
+"""
+Benchmark of the appearance matcher (reid.ReidMatcher) against the type and color search of the CCS: time of the
+cross-camera matching of a step and matching accuracy, for a growing number of actors per camera.
+
+Every object of the scene is seen by all the cameras, with a different track id per camera and a noisy appearance
+descriptor; many objects share type and color (e.g. people), which only the appearance can tell apart.
+
+Usage (from the repository root): python -m benchmarks.reid [--actors 10 50 200] [--cameras C] [--noise N] [--greedy]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import reid
+from actor_store import class_code, color_code
+from ccs import CentralCameraSystem
+from reid import DESCRIPTOR_SIZE, ReidMatcher, normalize
+
+def scene(actors, cameras, noise, seed=0):
+
+    # per camera: (ids, classIds, colorCodes, areas, boxes, descriptors); track id = camera * 100000 + object
+    rnd = np.random.default_rng(seed)
+    appearance = normalize(rnd.random((actors, DESCRIPTOR_SIZE)).astype(np.float32) ** 4)
+    classIds = np.where(rnd.random(actors) < 0.6, class_code('person'), class_code('car'))
+    colorCodes = np.full(actors, color_code('black'))
+    batches = {}
+    for cameraId in range(1, cameras + 1):
+        order = rnd.permutation(actors)
+        observed = normalize(np.abs(appearance[order] + noise * rnd.standard_normal((actors, DESCRIPTOR_SIZE)).astype(np.float32)))
+        batches[cameraId] = (cameraId * 100000 + order, classIds[order], colorCodes[order], rnd.random(actors), None, observed)
+    return batches
+
+def run(actors, cameras, noise, matcher):
+    ccs = CentralCameraSystem(columnar=True, matcher=matcher)
+    ccs.ingest(1, scene(actors, cameras, noise))
+    start = time.perf_counter()
+    ccs.step()
+    elapsed = time.perf_counter() - start
+
+    # accuracy: members of every common object are the same object (track id modulo 100000)
+    correct = total = 0
+    for commonObj in ccs.data[1].common:
+        objects = [actorId % 100000 for actorId in commonObj.commonCamerasIds.values()]
+        total += len(objects) - 1
+        correct += sum(obj == objects[0] for obj in objects[1:])
+    return 1000 * elapsed, correct / total if total else 0.0
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--actors', type=int, nargs='+', default=[10, 50, 200], help='actors per camera (default: 10 50 200)')
+    argparser.add_argument('--cameras', type=int, default=3, help='cameras of the group (default: 3)')
+    argparser.add_argument('--noise', type=float, default=0.02, help='noise of the descriptors (default: 0.02)')
+    argparser.add_argument('--greedy', action='store_true', help='greedy assignment instead of scipy')
+    args = argparser.parse_args()
+    if args.greedy:
+        reid.linear_sum_assignment = None
+
+    print(f"{'actors':>8}{'type/color ms':>15}{'accuracy':>10}{'reid ms':>10}{'accuracy':>10}")
+    for actors in args.actors:
+        defaultTime, defaultAccuracy = run(actors, args.cameras, args.noise, None)
+        reidTime, reidAccuracy = run(actors, args.cameras, args.noise, ReidMatcher())
+        print(f"{actors:>8}{defaultTime:>15.2f}{defaultAccuracy:>10.2f}{reidTime:>10.2f}{reidAccuracy:>10.2f}")
+
+if __name__ == '__main__':
+    main()
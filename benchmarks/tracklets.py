@@ -0,0 +1,62 @@
+"""
+Benchmark of the tracklet filters (tracklets.TrackletFilter): time of a batched update of all the tracks of a camera,
+and movement flips of tracks approaching the camera with noisy boxes, against the size comparison of every update.
+
+Usage (from the repository root): python -m benchmarks.tracklets [--tracks 100 300 1000] [--steps S] [--noise N]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from actor_store import ActorStore
+from tracklets import TrackletFilter, box_measurements
+
+def noisy_boxes(tracks, steps, noise, seed=0):
+
+    # boxes growing 2% per step (approaching), with a relative gaussian noise in their width and height
+    rnd = np.random.default_rng(seed)
+    centers = rnd.uniform(100, 500, (tracks, 2))
+    sizes = rnd.uniform(20, 60, (tracks, 1)) * 1.02 ** np.arange(steps) * (1 + noise * rnd.standard_normal((tracks, steps)))
+    widths, heights = sizes, sizes * 1.5
+    boxes = np.stack([centers[:, :1] - widths / 2, centers[:, 1:] - heights / 2, centers[:, :1] + widths / 2, centers[:, 1:] + heights / 2], axis=2)
+    return boxes.transpose(1, 0, 2), (widths * heights / (640 * 480)).T
+
+def flips(tracks, steps, noise, tracklets):
+    store = ActorStore(tracklets=TrackletFilter() if tracklets else None)
+    boxes, areas = noisy_boxes(tracks, steps, noise)
+    ids = np.arange(tracks)
+    zeros = np.zeros(tracks, dtype=np.int64)
+    total = 0
+    for step in range(steps):
+        store.update(ids, zeros, zeros, areas[step], step, boxes[step])
+        total += store.flips
+    return total
+
+def update_time(tracks, steps):
+
+    # microseconds per batched update of the filters of all the tracks
+    filters = TrackletFilter(capacity=tracks)
+    boxes, areas = noisy_boxes(tracks, steps, 0.05)
+    measurements = [box_measurements(areas[step], boxes[step]) for step in range(steps)]
+    rows = np.arange(tracks)
+    filters.init(rows, measurements[0])
+    start = time.perf_counter()
+    for step in range(1, steps):
+        filters.update(rows, measurements[step])
+    return 1e6 * (time.perf_counter() - start) / (steps - 1)
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--tracks', type=int, nargs='+', default=[100, 300, 1000], help='tracks per camera (default: 100 300 1000)')
+    argparser.add_argument('--steps', type=int, default=200, help='steps (default: 200)')
+    argparser.add_argument('--noise', type=float, default=0.05, help='relative noise of the box sizes (default: 0.05)')
+    args = argparser.parse_args()
+
+    print(f"{'tracks':>8}{'update us':>12}{'flips (size)':>14}{'flips (kalman)':>16}")
+    for tracks in args.tracks:
+        print(f"{tracks:>8}{update_time(tracks, args.steps):>12.1f}{flips(tracks, args.steps, args.noise, False):>14}{flips(tracks, args.steps, args.noise, True):>16}")
+
+if __name__ == '__main__':
+    main()
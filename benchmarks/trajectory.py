@@ -0,0 +1,67 @@
+"""
+Soak test of the trajectory history (trajectory.TrajectoryStore in the cameras of the CCS): a simulated run of the
+given hours at the given frame rate, with actors entering and leaving the scene, reporting every simulated hour the
+actors alive, the slots and bytes of the trajectory stores and the resident memory, which must stay constant.
+
+Also reports the time of the vectorized accessor of the last k world positions of all the actors of a camera.
+
+Usage (from the repository root): python -m benchmarks.trajectory [--hours 24] [--fps 10] [--actors K] [--depth D] [--churn C]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from actor_store import class_code, color_code
+from benchmarks.memory import resident_memory
+from ccs import CentralCameraSystem
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argparser.add_argument('--hours', type=float, default=24, help='simulated hours (default: 24)')
+    argparser.add_argument('--fps', type=float, default=10, help='steps per simulated second (default: 10)')
+    argparser.add_argument('--actors', type=int, default=20, help='actors per camera at any time (default: 20)')
+    argparser.add_argument('--cameras', type=int, default=3, help='cameras (default: 3)')
+    argparser.add_argument('--depth', type=int, default=32, help='observations kept per actor (default: 32)')
+    argparser.add_argument('--churn', type=float, default=0.02, help='fraction of the actors replaced every step (default: 0.02)')
+    args = argparser.parse_args()
+
+    rnd = np.random.default_rng(0)
+    ccs = CentralCameraSystem(columnar=True, history=args.depth)
+    ids = {cameraId: np.arange(args.actors) + cameraId * 10 ** 12 for cameraId in range(1, args.cameras + 1)}
+    nextId = args.actors
+    cls = np.full(args.actors, class_code('person'))
+    colors = np.full(args.actors, color_code('black'))
+    stepsPerHour = int(args.hours and args.fps * 3600)
+    total = int(args.hours * args.fps * 3600)
+    replaced = max(1, int(round(args.actors * args.churn)))
+
+    print(f"{'hour':>6}{'steps':>10}{'actors':>8}{'slots':>8}{'KiB':>10}{'RSS MiB':>10}{'step us':>9}")
+    start = time.perf_counter()
+    for step in range(total):
+        for cameraId, cameraIds in ids.items():
+            replace = rnd.choice(args.actors, replaced, replace=False)
+            cameraIds[replace] = np.arange(nextId, nextId + replaced) + cameraId * 10 ** 12
+            nextId += replaced
+            boxes = np.tile([100.0, 100.0, 140.0, 180.0], (args.actors, 1)) + step % 50
+            world = rnd.uniform(-10, 10, (args.actors, 2))
+            ccs.updateCameraBatch(1, cameraId, cameraIds, cls, colors, np.full(args.actors, 0.01), boxes=boxes, world=world)
+        ccs.step()
+        if (step + 1) % stepsPerHour == 0 or step + 1 == total:
+            cameras = ccs.data[1].cameras.values()
+            actors = sum(len(camera.actors) for camera in cameras)
+            slots = sum(len(camera.trajectories.head) for camera in cameras)
+            nbytes = sum(camera.trajectories.nbytes for camera in cameras)
+            elapsed = 1e6 * (time.perf_counter() - start) / (step + 1)
+            print(f"{(step + 1) / args.fps / 3600:>6.1f}{step + 1:>10}{actors:>8}{slots:>8}{nbytes / 1024:>10.1f}{resident_memory():>10.1f}{elapsed:>9.1f}")
+
+    # last k positions of all the actors of a camera at once
+    trajectories = ccs.data[1].cameras[1].trajectories
+    start = time.perf_counter()
+    for _ in range(1000):
+        _, positions = trajectories.last_positions(8)
+    print(f"last 8 positions of {len(positions)} actors: {1000 * (time.perf_counter() - start):.1f} us")
+
+if __name__ == '__main__':
+    main()
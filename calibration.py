@@ -0,0 +1,80 @@
+import numpy as np
+
+# poses of the cameras of the intersection, as spawned in CARLA by one_intersection_controlled_v2.py (world coordinates
+# in meters, angles in degrees, images of 640 x 480)
+CAMERA_POSES = {
+    1: {'x': -60.423583, 'y': 123.316581, 'z': 5.886553, 'pitch': -30, 'yaw': -40, 'roll': 0.000017, 'fov': 75},
+    2: {'x': -34.661411, 'y': 123.436012, 'z': 5.335992, 'pitch': -34.902976989746094, 'yaw': -140.395263671875, 'roll': 0.000017, 'fov': 75},
+    3: {'x': -52.91, 'y': 144.66, 'z': 7.335992, 'pitch': -6.79, 'yaw': -80.24, 'roll': 0.000017, 'fov': 40},
+}
+
+def rotation_matrix(pitch, yaw, roll):
+
+    # rotation of a CARLA (Unreal) transform: local axes x forward, y right, z up, to world axes (as carla.Transform.get_matrix)
+    cp, sp = np.cos(np.radians(pitch)), np.sin(np.radians(pitch))
+    cy, sy = np.cos(np.radians(yaw)), np.sin(np.radians(yaw))
+    cr, sr = np.cos(np.radians(roll)), np.sin(np.radians(roll))
+    return np.array([[cp * cy, cy * sp * sr - sy * cr, -cy * sp * cr - sy * sr],
+                     [cp * sy, sy * sp * sr + cy * cr, -sy * sp * cr + cy * sr],
+                     [sp, -cp * sr, cp * cr]])
+
+# axes of the image (x right, y down, z forward) in the local axes of a CARLA camera
+IMAGE_TO_LOCAL = np.array([[0, 0, 1], [1, 0, 0], [0, -1, 0]], dtype=np.float64)
+
+class CameraCalibration():
+    """
+    Pinhole model of a camera (no distortion, as the CARLA RGB cameras) placed at a known pose: projection of image
+    points onto the ground plane and of world points onto the image.
+
+    Attributes
+    ----------
+    K : np.ndarray
+        intrinsics (3 x 3): focal length from the horizontal field of view, principal point at the image center
+    R : np.ndarray
+        rotation (3 x 3) from the image axes to the world axes
+    position : np.ndarray
+        position (x, y, z) of the camera in the world
+    width, height : int
+        image size in pixels
+    """
+    def __init__(self, x, y, z, pitch, yaw, roll=0.0, fov=90, width=640, height=480):
+        focal = width / (2 * np.tan(np.radians(fov) / 2))
+        self.K = np.array([[focal, 0, width / 2], [0, focal, height / 2], [0, 0, 1]])
+        self.R = rotation_matrix(pitch, yaw, roll) @ IMAGE_TO_LOCAL
+        self.position = np.array([x, y, z], dtype=np.float64)
+        self.width = width
+        self.height = height
+        self.__inverseK = np.linalg.inv(self.K)
+
+    def ground_points(self, pixels, groundZ=0.0):
+        """
+        World positions (n x 2, x and y) where the rays of the image points (n x 2, u and v) hit the ground plane z = groundZ,
+        NaN for the points at or above the horizon.
+        """
+        pixels = np.asarray(pixels, dtype=np.float64).reshape(-1, 2)
+        rays = np.column_stack([pixels, np.ones(len(pixels))]) @ (self.R @ self.__inverseK).T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            distance = (groundZ - self.position[2]) / rays[:, 2]
+        distance[~(distance > 0)] = np.nan
+        return self.position[:2] + rays[:, :2] * distance[:, None]
+
+    def box_ground_points(self, boxes, groundZ=0.0):
+        """
+        World positions (n x 2) of the boxes (x1, y1, x2, y2) of the detections: bottom center of each box (where the
+        object touches the ground) projected onto the ground plane.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        return self.ground_points(np.column_stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]]), groundZ)
+
+    def image_points(self, points):
+        """
+        Image points (n x 2) of the world points (n x 3), NaN for the points behind the camera.
+        """
+        camera = (np.asarray(points, dtype=np.float64).reshape(-1, 3) - self.position) @ self.R
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pixels = (camera @ self.K.T)[:, :2] / camera[:, 2:]
+        pixels[camera[:, 2] <= 0] = np.nan
+        return pixels
+
+def camera_calibrations(poses=CAMERA_POSES, width=640, height=480):
+    return {cameraId: CameraCalibration(**pose, width=width, height=height) for cameraId, pose in poses.items()}
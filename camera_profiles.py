@@ -0,0 +1,87 @@
+import json
+
+import cv2
+import numpy as np
+
+class CameraProfile():
+    """
+    Inference profile of a camera: region of interest and image size of the detector.
+
+    Attributes
+    ----------
+    roi : np.ndarray
+        polygon (points x, y in full frame pixels) of the region of interest (None for the full frame)
+    mode : str
+        'crop' (only the bounding rectangle of the roi is detected) or 'mask' (the full frame is detected, with
+        the pixels out of the roi blacked out)
+    imgsz : int
+        inference image size of the detector (e.g. 640, or 320 for a small crop)
+    """
+    def __init__(self, roi=None, mode='crop', imgsz=640):
+        if mode not in ('crop', 'mask'):
+            raise ValueError(f"Unknown roi mode {mode}")
+        self.roi = None
+        if roi is not None:
+            roi = np.asarray(roi, dtype=np.int32)
+
+            # [x1, y1, x2, y2] rectangles as polygons
+            if roi.ndim == 1:
+                x1, y1, x2, y2 = roi.tolist()
+                roi = np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.int32)
+            self.roi = roi
+        self.mode = mode
+        self.imgsz = imgsz
+        self.__masks = {}
+
+    def settings(self):
+
+        # profile as plain values (e.g. for the detection cache key)
+        return {'roi': None if self.roi is None else self.roi.tolist(), 'mode': self.mode, 'imgsz': self.imgsz}
+
+    def bounds(self, shape):
+
+        # bounding rectangle (x1, y1, x2, y2) of the roi within a frame of the given shape
+        height, width = shape[:2]
+        if self.roi is None:
+            return 0, 0, width, height
+        x1, y1 = np.clip(self.roi.min(axis=0), 0, [width, height]).tolist()
+        x2, y2 = np.clip(self.roi.max(axis=0) + 1, 0, [width, height]).tolist()
+        return x1, y1, x2, y2
+
+    def mask(self, shape):
+
+        # mask of the roi, built once per frame shape
+        mask = self.__masks.get(shape[:2])
+        if mask is None:
+            mask = np.zeros(shape[:2], dtype=np.uint8)
+            cv2.fillPoly(mask, [self.roi], 255)
+            self.__masks[shape[:2]] = mask
+        return mask
+
+    def prepare(self, frame):
+        """
+        Image to detect for a full frame, and the offset (x, y) of that image within the frame.
+        """
+        if self.roi is None:
+            return frame, (0, 0)
+        if self.mode == 'mask':
+            return cv2.bitwise_and(frame, frame, mask=self.mask(frame.shape)), (0, 0)
+        x1, y1, x2, y2 = self.bounds(frame.shape)
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+def to_full_frame(boxes, offset):
+    """
+    Detections (rows x1, y1, x2, y2, ...) of a cropped image in full frame coordinates.
+    """
+    boxes = boxes.copy()
+    if offset != (0, 0):
+        boxes[:, [0, 2]] += offset[0]
+        boxes[:, [1, 3]] += offset[1]
+    return boxes
+
+def load_profiles(path):
+
+    # {"1": {"roi": [[x, y], ...] or [x1, y1, x2, y2], "mode": "crop", "imgsz": 320}, ...} => {1: CameraProfile}
+    with open(path) as f:
+        config = json.load(f)
+    return {int(cameraId): CameraProfile(**spec) for cameraId, spec in config.items()}
@@ -0,0 +1,143 @@
+import multiprocessing
+from collections import deque
+from multiprocessing.shared_memory import SharedMemory
+
+import cv2
+import numpy as np
+
+def camera_worker(cameraId, connection, shmName, slots, slotBytes, detectorSettings, headless, showLabels, showConf, appearance=False):
+
+    # worker process of a camera: decodes (or takes from shared memory), detects, tracks and extracts the colors of
+    # its frames, in order, until None is received; the detections go back through the pipe (a compact structured
+    # array), and the frame to display (if any) through the same shared memory slot of the input frame
+    from detector import Detector
+    from hazard_identification import postprocess_yolo_results
+
+    shm = SharedMemory(name=shmName)
+    detector = Detector(**detectorSettings)
+    try:
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            slot, path, shape = message
+            if path is not None:
+                frame = cv2.imread(path)
+            else:
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slotBytes).copy()
+            results = detector.track({cameraId: frame})
+            postprocessed, detections = postprocess_yolo_results(cameraId=cameraId, yoloResults=results.get(cameraId), showLabels=showLabels, showConf=showConf, headless=headless, appearance=appearance)
+
+            shape = None
+            if not headless and postprocessed is not None and postprocessed.nbytes <= slotBytes:
+                shape = postprocessed.shape
+                np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slotBytes)[:] = postprocessed
+            connection.send((slot, detections, shape))
+    finally:
+        connection.close()
+        shm.close()
+
+class CameraWorkers():
+    """
+    Pool of worker processes, one per camera, each one with its own detector and tracker (see camera_worker), fed
+    with the frame sets of the steps in order: the frames of a step are processed by all the cameras in parallel,
+    while the results of the previous step are consumed.
+
+    Frames are never pickled: workers decode the frame files themselves, or read the frames given as arrays from
+    a shared memory ring of slots per camera, where they also leave the frame to display.
+
+    Attributes
+    ----------
+    cameraIds : []
+        cameras of the pool
+    slots : int
+        frame sets in flight (and shared memory slots per camera)
+    slotBytes : int
+        size of a slot (maximum size of a frame)
+    """
+    def __init__(self, cameraIds, detectorSettings, headless=True, showLabels=False, showConf=False, slots=2, frameShape=(480, 640, 3), appearance=False):
+        self.cameraIds = list(cameraIds)
+        self.slots = slots
+        self.slotBytes = int(np.prod(frameShape))
+        self.__shm = {}
+        self.__connections = {}
+        self.__processes = []
+        self.__nextSlot = {cameraId: 0 for cameraId in self.cameraIds}
+        for cameraId in self.cameraIds:
+            shm = SharedMemory(create=True, size=slots * self.slotBytes)
+            parentConnection, childConnection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=camera_worker, daemon=True,
+                                              args=(cameraId, childConnection, shm.name, slots, self.slotBytes, detectorSettings, headless, showLabels, showConf, appearance))
+            process.start()
+            childConnection.close()
+            self.__shm[cameraId] = shm
+            self.__connections[cameraId] = parentConnection
+            self.__processes.append(process)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __submit(self, frames):
+        submitted = []
+        for cameraId, frame in frames.items():
+            slot = self.__nextSlot[cameraId]
+            self.__nextSlot[cameraId] = (slot + 1) % self.slots
+            if isinstance(frame, np.ndarray):
+                if frame.nbytes > self.slotBytes:
+                    raise ValueError(f"Frame of CAM{cameraId} larger than the shared memory slots ({frame.shape})")
+                np.ndarray(frame.shape, dtype=np.uint8, buffer=self.__shm[cameraId].buf, offset=slot * self.slotBytes)[:] = frame
+                self.__connections[cameraId].send((slot, None, frame.shape))
+            else:
+                self.__connections[cameraId].send((slot, frame, None))
+            submitted.append(cameraId)
+        return submitted
+
+    def process(self, frameSets):
+        """
+        Yields (key, {cameraId: (frame, detections)}) for every (key, {cameraId: path or frame}) of frameSets, in order.
+        The frame to display is a view of the shared memory (None if headless), valid until the next frame set is requested
+        (views must be released before close()).
+        """
+        frameSets = iter(frameSets)
+        pending = deque()
+        for key, frames in frameSets:
+            pending.append((key, self.__submit(frames)))
+            if len(pending) == self.slots:
+                break
+
+        while pending:
+            key, cameraIds = pending.popleft()
+            outputs = {}
+            for cameraId in cameraIds:
+                slot, detections, shape = self.__connections[cameraId].recv()
+                frame = None
+                if shape is not None:
+                    frame = np.ndarray(shape, dtype=np.uint8, buffer=self.__shm[cameraId].buf, offset=slot * self.slotBytes)
+                outputs[cameraId] = (frame, detections)
+            yield key, outputs
+            outputs = frame = None
+
+            # the slot of the consumed frame set can be reused now
+            nextFrameSet = next(frameSets, None)
+            if nextFrameSet is not None:
+                pending.append((nextFrameSet[0], self.__submit(nextFrameSet[1])))
+
+    def close(self):
+        for connection in self.__connections.values():
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.__processes:
+            process.join()
+        for connection in self.__connections.values():
+            connection.close()
+        for shm in self.__shm.values():
+            shm.close()
+            shm.unlink()
+        self.__connections = {}
+        self.__processes = []
+        self.__shm = {}
@@ -1,6 +1,15 @@
 import cv2
+import numpy as np
+
+from actor_store import ActorStore, CLASS_NAMES, COLOR_NAMES, MOVEMENT_NAMES, class_code, color_code
+from danger_rules import DangerRuleEngine
+from reid import DESCRIPTOR_SIZE, blend
+from tracklets import TrackletFilter
+from trajectory import TrajectoryStore
+from snapshot import ActorSnapshot, CameraSnapshot, CommonSnapshot, GroupSnapshot, Snapshot, plot_actor
 
 from enum import Enum
+from types import MappingProxyType
 class Movement(Enum):
     NONE = 0
     APPROACHING = 1
@@ -24,8 +33,14 @@ class Actor():
         indicates if the object is moving towards this camera (APPROACHING), or is getting away (LEAVING)
     last_step: int
         step number in which this Actor was last seen (optional for the common objects)
+    seq: int
+        insertion order of this Actor within its camera (used to keep the group index ordered)
     commonCamerasIds: {}
         if this is a common object: dictionary of the ids of this common object in the different cameras
+    descriptor: np.ndarray
+        appearance descriptor of the object (see reid.descriptors), None if not given
+    world: np.ndarray
+        world position (x, y) of the object on the ground plane (see calibration.py), None if not given
     """
     def __init__(self, id, type, color, size=0, creation_step=0):
         self.id = id
@@ -34,22 +49,55 @@ class Actor():
         self.size = size
         self.movement = "Approaching"
         self.last_step = creation_step
+        self.seq = 0
         self.commonCamerasIds = {}
+        self.descriptor = None
+        self.world = None
         
     def plotCommon(self):
     
         # Returns the common actors in a readable format (string)
-        result = ""
-        where = ""
-        if self.commonCamerasIds:
-            for cameraId in self.commonCamerasIds:
-                objId = self.commonCamerasIds[cameraId]
-                where += f"CAM{cameraId} id {objId} "
-                
-        result += f"[CommonId={self.id}, Type={self.type}, Color={self.color}, From={where} - "
+        where = "".join(f"CAM{cameraId} id {objId} " for cameraId, objId in self.commonCamerasIds.items())
+        return f"[CommonId={self.id}, Type={self.type}, Color={self.color}, From={where} - "
         
-        return result
+class ExpiryWheel():
+    """
+    Actor ids bucketed by the step in which they were seen, to find the actors due for eviction
+    without walking all the live actors of a camera.
+
+    An actor seen again is scheduled again in the new step bucket (its older entries are left behind),
+    so the entries of an expired bucket are only candidates: the caller checks their actual last_step.
+
+    Attributes
+    ----------
+    buckets : {}
+        dictionary of int, [] with the chunks of actor ids seen in each step
+    horizon: int
+        oldest step whose bucket has not been expired yet
+    """
+    def __init__(self):
+        self.buckets = {}
+        self.horizon = 0
         
+    def schedule(self, actorIds, step):
+        if len(actorIds):
+            self.buckets.setdefault(step, []).append(actorIds)
+        
+    def due(self, n_step, ttl):
+    
+        # popping the buckets of the steps older than the ttl (n_step - step > ttl)
+        chunks = []
+        limit = n_step - ttl
+        while self.horizon < limit:
+            if not self.buckets:
+                self.horizon = limit
+                break
+            bucket = self.buckets.pop(self.horizon, None)
+            if bucket:
+                chunks.extend(bucket)
+            self.horizon += 1
+        return chunks
+
 class Camera():
     """
     Current data of a given camera.
@@ -60,21 +108,336 @@ class Camera():
         name of the camera
     actors : {}
         dictionary of int, Actor. Contains the detected objects by this camera
+    ttl : int
+        number of steps an actor is kept after it was last seen by this camera
+    expiry : ExpiryWheel
+        actor ids by last seen step, to evict only the actors that are due
+    evictions : int
+        number of actors evicted in the last eviction pass
+    trajectories : TrajectoryStore
+        recent observations of every actor (None if the history is not kept)
+    __seq: int
+        insertion counter, assigned to every new Actor of this camera (auto-incremental)
     """
-    def __init__(self, name):
+    def __init__(self, name, ttl=2, trajectories=None):
         self.name = name
         self.actors = {}
+        self.ttl = ttl
+        self.expiry = ExpiryWheel()
+        self.evictions = 0
+        self.trajectories = trajectories
+        self.__seq = 0
+        
+    def addActor(self, actor):
+        actor.seq = self.__seq
+        self.__seq += 1
+        self.actors[actor.id] = actor
+        
+    def updateActors(self, group, cameraId, objects, n_step):
+        self.updateDetections(group, cameraId,
+                              [obj.id for obj in objects],
+                              [obj.type for obj in objects],
+                              [obj.color for obj in objects],
+                              [obj.size for obj in objects],
+                              n_step)
+        
+    def updateBatch(self, group, cameraId, ids, cls, colors, sizes, n_step, boxes=None, descriptors=None, world=None):
+    
+        # columnar batch (see CentralCameraSystem.updateCameraBatch): class and color codes to names (boxes are not used)
+        self.updateDetections(group, cameraId,
+                              np.asarray(ids).tolist(),
+                              [CLASS_NAMES[code] for code in np.asarray(cls).tolist()],
+                              [COLOR_NAMES[code] for code in np.asarray(colors).tolist()],
+                              np.asarray(sizes).tolist(),
+                              n_step,
+                              None if descriptors is None else np.asarray(descriptors, dtype=np.float32),
+                              None if world is None else np.asarray(world, dtype=np.float64).reshape(-1, 2))
+        
+    def updateDetections(self, group, cameraId, ids, types, colors, sizes, n_step, descriptors=None, world=None):
+    
+        # appending or updating objects to camera info
+        self.expiry.schedule(ids, n_step)
+        for i, (id, type, color, size) in enumerate(zip(ids, types, colors, sizes)):
+        
+            if id not in self.actors.keys():
+                
+                # appending new object to camera data (and to the group index)
+                actor = Actor(id, type, color, size, n_step)
+                if descriptors is not None:
+                    actor.descriptor = descriptors[i]
+                if world is not None:
+                    actor.world = world[i]
+                self.addActor(actor)
+                group.indexActor(cameraId, actor.id, actor.seq, actor.type, actor.color)
+                group.markDirty(cameraId)
+                
+            else:
+                
+                # updating object (moving it to another index bucket if type or color changed)
+                actor = self.actors[id]
+                if group.indexKey(type, color) != group.indexKey(actor.type, actor.color):
+                    group.unindexActor(cameraId, actor.id, actor.type, actor.color)
+                    group.indexActor(cameraId, actor.id, actor.seq, type, color)
+                    group.markDirty(cameraId)
+                if type != actor.type or color != actor.color:
+                    group.refreshMember(cameraId, actor.id, type, color)
+                actor.type = type
+                actor.color = color
+                actor.last_step = n_step
+                if descriptors is not None:
+                    actor.descriptor = descriptors[i] if actor.descriptor is None else blend(actor.descriptor[None], descriptors[i][None])[0]
+                if world is not None:
+                    actor.world = world[i]
+                
+                # tracking: keep track of whether the object is getting bigger or smaller
+                movement = actor.movement
+                if size > actor.size:
+                    #actor.movement = Movement.APPROACHING
+                    actor.movement = "Approaching"
+                elif size < actor.size:
+                    #actor.movement = Movement.LEAVING
+                    actor.movement = "Leaving"
+                if actor.movement != movement:
+                    group.dangersDirty = True
+                
+                actor.size = size
+                
+    def evictActors(self, group, cameraId, n_step):
+    
+        # removing from camera data those objects not present in the last frames (n_step - last_step > ttl)
+        self.evictions = 0
+        for chunk in self.expiry.due(n_step, self.ttl):
+            for objectId in chunk:
+                actor = self.actors.get(objectId)
+                if actor is not None and n_step - actor.last_step > self.ttl:
+                    group.removeMember(cameraId, objectId)
+                    group.unindexActor(cameraId, objectId, actor.type, actor.color)
+                    del self.actors[objectId]
+                    if self.trajectories is not None:
+                        self.trajectories.release([objectId])
+                    self.evictions += 1
+        if self.evictions:
+            group.markDirty(cameraId)
+        return self.evictions
+        
+    def clearActors(self, group, cameraId):
+    
+        # removing every actor of the camera (e.g. its tracker restarted, and its track ids will be given again)
+        for objectId, actor in self.actors.items():
+            group.removeMember(cameraId, objectId)
+            group.unindexActor(cameraId, objectId, actor.type, actor.color)
+        if self.trajectories is not None:
+            self.trajectories.release(list(self.actors.keys()))
+        self.actors = {}
+        group.markDirty(cameraId)
         
     def plot(self):
     
         # Returns the actors in a readable format (string)
-        result = ''
-        if self.actors and len(self.actors) > 0:
-            for actorId in self.actors.keys():
-                actor = self.actors[actorId]
-                result += f"[Id={actor.id}, Type={actor.type}, Color={actor.color}, Size={actor.size}, Dir={actor.movement}, Last={actor.last_step}] - "
+        return "".join(plot_actor(actor) for actor in self.actors.values())
+        
+    def descriptors(self, actorIds):
         
+        # appearance descriptors of the given actors (zeros for the actors without descriptor), one row per actor
+        result = np.zeros((len(actorIds), DESCRIPTOR_SIZE), dtype=np.float32)
+        for i, actorId in enumerate(actorIds):
+            descriptor = self.actors[actorId].descriptor
+            if descriptor is not None:
+                result[i] = descriptor
         return result
+        
+    def positions(self, actorIds):
+        
+        # world positions of the given actors (NaN for the actors without position), one row per actor
+        result = np.full((len(actorIds), 2), np.nan)
+        for i, actorId in enumerate(actorIds):
+            world = self.actors[actorId].world
+            if world is not None:
+                result[i] = world
+        return result
+        
+    def snapshotActors(self):
+        
+        # immutable copy of the actors (see CentralCameraSystem.snapshot)
+        return tuple(ActorSnapshot(actor.id, actor.type, actor.color, actor.size, actor.movement, actor.last_step) for actor in self.actors.values())
+
+class ActorRow():
+    """
+    Read-only view of a single row of an ActorStore, with the same attributes as Actor.
+    """
+    __slots__ = ('store', 'row')
+    
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+        
+    @property
+    def id(self):
+        return int(self.store.ids[self.row])
+        
+    @property
+    def type(self):
+        return CLASS_NAMES[self.store.cls[self.row]]
+        
+    @property
+    def color(self):
+        return COLOR_NAMES[self.store.color[self.row]]
+        
+    @property
+    def size(self):
+        return float(self.store.size[self.row])
+        
+    @property
+    def movement(self):
+        return MOVEMENT_NAMES[self.store.movement[self.row]]
+        
+    @property
+    def last_step(self):
+        return int(self.store.last_step[self.row])
+        
+    @property
+    def seq(self):
+        return int(self.store.seq[self.row])
+
+class ActorRows():
+    """
+    Read-only dictionary of int, ActorRow over an ActorStore, in insertion order (as Camera.actors).
+    """
+    def __init__(self, store):
+        self.store = store
+        
+    def __len__(self):
+        return len(self.store.rows)
+        
+    def __iter__(self):
+        return iter(self.store.rows)
+        
+    def __contains__(self, actorId):
+        return actorId in self.store.rows
+        
+    def __getitem__(self, actorId):
+        return ActorRow(self.store, self.store.rows[actorId])
+        
+    def keys(self):
+        return self.store.rows.keys()
+        
+    def values(self):
+        return (ActorRow(self.store, row) for row in self.store.rows.values())
+        
+    def items(self):
+        return ((actorId, ActorRow(self.store, row)) for actorId, row in self.store.rows.items())
+
+class ColumnarCamera(Camera):
+    """
+    Current data of a given camera, stored in columns (see ActorStore).
+
+    Attributes
+    ----------
+    name : str
+        name of the camera
+    store : ActorStore
+        columnar data of the detected objects by this camera
+    actors : ActorRows
+        read-only dictionary view of the store, with the same interface as Camera.actors
+    ttl : int
+        number of steps an actor is kept after it was last seen by this camera
+    expiry : ExpiryWheel
+        actor ids by last seen step, to evict only the actors that are due
+    evictions : int
+        number of actors evicted in the last eviction pass
+    trajectories : TrajectoryStore
+        recent observations of every actor (None if the history is not kept)
+    """
+    def __init__(self, name, ttl=2, tracklets=None, trajectories=None):
+        self.name = name
+        self.store = ActorStore(tracklets=tracklets)
+        self.actors = ActorRows(self.store)
+        self.ttl = ttl
+        self.expiry = ExpiryWheel()
+        self.evictions = 0
+        self.trajectories = trajectories
+        
+    def updateActors(self, group, cameraId, objects, n_step):
+        self.updateBatch(group, cameraId,
+                         [obj.id for obj in objects],
+                         [class_code(obj.type) for obj in objects],
+                         [color_code(obj.color) for obj in objects],
+                         [obj.size for obj in objects],
+                         n_step)
+        
+    def updateBatch(self, group, cameraId, ids, cls, colors, sizes, n_step, boxes=None, descriptors=None, world=None):
+    
+        # the whole batch is updated at once, the group index is only touched for new objects and type/color changes
+        newIds, changedIds, previousCls, previousColors = self.store.update(ids, cls, colors, sizes, n_step, boxes, descriptors, world)
+        # (a copy of the ids: the caller may reuse its array for the next batch)
+        self.expiry.schedule(np.array(ids, dtype=np.int64), n_step)
+        store = self.store
+        if store.flips:
+            group.dangersDirty = True
+        for actorId, previousClsCode, previousColorCode in zip(changedIds.tolist(), previousCls.tolist(), previousColors.tolist()):
+            row = store.rows[actorId]
+            previousType, previousColor = CLASS_NAMES[previousClsCode], COLOR_NAMES[previousColorCode]
+            newType, newColor = CLASS_NAMES[store.cls[row]], COLOR_NAMES[store.color[row]]
+            group.refreshMember(cameraId, actorId, newType, newColor)
+            if group.indexKey(previousType, previousColor) != group.indexKey(newType, newColor):
+                group.unindexActor(cameraId, actorId, previousType, previousColor)
+                group.indexActor(cameraId, actorId, int(store.seq[row]), newType, newColor)
+                group.markDirty(cameraId)
+        for actorId in newIds.tolist():
+            row = store.rows[actorId]
+            group.indexActor(cameraId, actorId, int(store.seq[row]), CLASS_NAMES[store.cls[row]], COLOR_NAMES[store.color[row]])
+        if len(newIds):
+            group.markDirty(cameraId)
+            
+    def plot(self):
+        return "".join(plot_actor(actor) for actor in self.snapshotActors())
+        
+    def descriptors(self, actorIds):
+        return self.store.descriptors(actorIds)
+        
+    def positions(self, actorIds):
+        return self.store.positions(actorIds)
+        
+    def snapshotActors(self):
+        
+        # columns of the alive rows gathered at once, in insertion order
+        store = self.store
+        rows = np.fromiter(store.rows.values(), dtype=np.int64, count=len(store.rows))
+        return tuple(ActorSnapshot(id, CLASS_NAMES[cls], COLOR_NAMES[color], size, MOVEMENT_NAMES[movement], last_step)
+                     for id, cls, color, size, movement, last_step in zip(store.ids[rows].tolist(), store.cls[rows].tolist(), store.color[rows].tolist(),
+                                                                           store.size[rows].tolist(), store.movement[rows].tolist(), store.last_step[rows].tolist()))
+            
+    def evictActors(self, group, cameraId, n_step):
+        self.evictions = 0
+        chunks = self.expiry.due(n_step, self.ttl)
+        if chunks:
+        
+            # candidate rows still alive and really not seen in the last ttl steps
+            store = self.store
+            candidates = np.concatenate(chunks)
+            rows = np.fromiter((store.rows.get(id, -1) for id in candidates.tolist()), dtype=np.int64, count=len(candidates))
+            rows = np.unique(rows[rows >= 0])
+            rows = rows[n_step - store.last_step[rows] > self.ttl]
+            ids, cls, colors = store.remove_rows(rows)
+            if self.trajectories is not None:
+                self.trajectories.release(ids)
+            for actorId, clsCode, colorCode in zip(ids.tolist(), cls.tolist(), colors.tolist()):
+                group.removeMember(cameraId, actorId)
+                group.unindexActor(cameraId, actorId, CLASS_NAMES[clsCode], COLOR_NAMES[colorCode])
+            self.evictions = len(ids)
+        if self.evictions:
+            group.markDirty(cameraId)
+        return self.evictions
+        
+    def clearActors(self, group, cameraId):
+        store = self.store
+        ids, cls, colors = store.remove_rows(np.fromiter(store.rows.values(), dtype=np.int64, count=len(store.rows)))
+        if self.trajectories is not None:
+            self.trajectories.release(ids)
+        for actorId, clsCode, colorCode in zip(ids.tolist(), cls.tolist(), colors.tolist()):
+            group.removeMember(cameraId, actorId)
+            group.unindexActor(cameraId, actorId, CLASS_NAMES[clsCode], COLOR_NAMES[colorCode])
+        group.markDirty(cameraId)
 
 class Group():
     """
@@ -87,22 +450,138 @@ class Group():
     cameras : {}
         dictionary of int, Camera. Contains all the info of the cameras
     common: []
-        structure of common identified objects among all the cameras
+        structure of common identified objects among all the cameras (those currently seen by 2+ cameras)
+    commonObjects: {}
+        dictionary of int, Actor. Every common object with at least one member track alive, by common id
+    members: {}
+        persistent mapping (cameraId, actorId) => common id, kept while the member track stays alive
+    commonIndex: {}
+        members of the common objects by camera and common object type: cameraId => type => { commonId => actorId }
     dangers: []
-        structure of dangers identified from the common objects
+        structure of dangers (danger_rules.Danger, or hazard_score.ScoredDanger) identified from the common objects
+    index: {}
+        ids of the actors of all the cameras bucketed by matching key (see indexKey):
+        key => { cameraId => { actorId => seq } }, each camera bucket ordered as camera.actors
+    dirtyCameras: set
+        cameras with insertions, type/color changes or evictions since the last step (common objects must be searched)
+    dangersDirty: bool
+        whether the common objects or the movements changed since the last danger identification
+    commonDirty: bool
+        whether the members, type or color of any common object changed (cleared by the consumers of the common
+        objects, e.g. ccs_parallel.GroupShard)
     __common_id: int
         identifier of a new identified common object (auto-incremental)
     """
     def __init__(self, name):
         self.name = name
         self.cameras = {}  
-        self.common = []
+        self.commonObjects = {}
+        self.members = {}
+        self.commonIndex = {}
         self.dangers = []
+        self.index = {}
+        self.dirtyCameras = set()
+        self.dangersDirty = True
+        self.commonDirty = True
         self.__common_id = 0
         
+    @property
+    def common(self):
+        return [commonObj for commonObj in self.commonObjects.values() if len(commonObj.commonCamerasIds) > 1]
+        
+    def hasFreeTracks(self):
+    
+        # whether any track of the cameras is not a member of a common object
+        return len(self.members) < sum(len(camera.actors) for camera in self.cameras.values())
+        
     def getNewCommonId(self):
         self.__common_id += 1
         return self.__common_id
+        
+    def getCommonId(self, cameraId, actorId):
+        
+        # common id of the given camera track (0 if not part of any common object)
+        return self.members.get((cameraId, actorId), 0)
+        
+    def markDirty(self, cameraId):
+        self.dirtyCameras.add(cameraId)
+        self.dangersDirty = True
+        
+    def addMember(self, commonId, cameraId, actorId):
+        self.dangersDirty = True
+        self.commonDirty = True
+        commonObj = self.commonObjects[commonId]
+        self.members[(cameraId, actorId)] = commonId
+        commonObj.commonCamerasIds[cameraId] = actorId
+        self.commonIndex.setdefault(cameraId, {}).setdefault(commonObj.type, {})[commonId] = actorId
+        
+    def removeMember(self, cameraId, actorId):
+    
+        # the common object keeps its id while any of its member tracks stays alive
+        commonId = self.members.pop((cameraId, actorId), 0)
+        if commonId:
+            self.dangersDirty = True
+            self.commonDirty = True
+            commonObj = self.commonObjects[commonId]
+            del commonObj.commonCamerasIds[cameraId]
+            byType = self.commonIndex[cameraId]
+            del byType[commonObj.type][commonId]
+            if not byType[commonObj.type]:
+                del byType[commonObj.type]
+            if not commonObj.commonCamerasIds:
+                del self.commonObjects[commonId]
+        
+    def refreshMember(self, cameraId, actorId, type, color):
+    
+        # the common object of a member whose type or color changed takes its new type and color (read by the danger
+        # rules and the snapshots), moving its members to the new type in the common index
+        commonId = self.members.get((cameraId, actorId), 0)
+        if not commonId:
+            return
+        self.dangersDirty = True
+        self.commonDirty = True
+        commonObj = self.commonObjects[commonId]
+        if commonObj.type != type:
+            for memberCameraId, memberActorId in commonObj.commonCamerasIds.items():
+                byType = self.commonIndex[memberCameraId]
+                del byType[commonObj.type][commonId]
+                if not byType[commonObj.type]:
+                    del byType[commonObj.type]
+                byType.setdefault(type, {})[commonId] = memberActorId
+        commonObj.type = type
+        commonObj.color = color
+        
+    @staticmethod
+    def indexKey(type, color):
+    
+        # same criteria as CentralCameraSystem.same_objects: every person matches any other person
+        if type == 'person':
+            return ('person', None)
+        return (type, color)
+        
+    def indexActor(self, cameraId, actorId, seq, type, color):
+    
+        # appending the actor to its bucket, keeping the camera insertion order within the bucket
+        cameras = self.index.setdefault(self.indexKey(type, color), {})
+        bucket = cameras.setdefault(cameraId, {})
+        if bucket and next(reversed(bucket.values())) > seq:
+            bucket[actorId] = seq
+            cameras[cameraId] = dict(sorted(bucket.items(), key=lambda item: item[1]))
+        else:
+            bucket[actorId] = seq
+            
+    def unindexActor(self, cameraId, actorId, type, color):
+    
+        # removing the actor from the bucket of the given type/color
+        key = self.indexKey(type, color)
+        cameras = self.index.get(key)
+        if cameras and cameraId in cameras:
+            bucket = cameras[cameraId]
+            bucket.pop(actorId, None)
+            if not bucket:
+                del cameras[cameraId]
+                if not cameras:
+                    del self.index[key]
 
 class CentralCameraSystem():
 
@@ -117,31 +596,66 @@ class CentralCameraSystem():
     # step number, to determine where an object is no longer in presence
     n_step = 0
 
-    def __init__(self):
+    def __init__(self, columnar=False, ttl=2, rules=None, tracklets=False, matcher=None, history=0):
     
         # initialization
         self.initialized = True
         self.data = {}
+        
+        # cameras backed by a columnar store (ColumnarCamera) instead of Actor objects
+        self.columnar = columnar or tracklets
+        
+        # movement of the actors from Kalman filtered tracklets (see tracklets.py, columnar cameras only) instead of
+        # the size change of every update
+        self.tracklets = tracklets
+        
+        # cross-camera matcher of the free actors of a group (e.g. reid.ReidMatcher, spatial_matcher.SpatialMatcher), instead of the same type and
+        # color search of search_similar_objects
+        self.matcher = matcher
+        
+        # observations kept per actor in the trajectory store of every camera (see trajectory.py, 0 for none)
+        self.history = history
+        
+        # default number of steps an actor is kept after it was last seen (can be changed per camera)
+        self.ttl = ttl
+        
+        # number of actors evicted in the current step, and in the last finished step
+        self.evictions = 0
+        self.last_step_evictions = 0
+        
+        # number of groups without changes skipped in the last step() and identify_dangers() calls
+        self.skipped_groups = 0
+        self.skipped_danger_groups = 0
+        
+        # danger rules of each group (by default, the built-in rules of danger_rules.DEFAULT_RULES)
+        self.rules = rules if rules is not None else DangerRuleEngine()
+        
+        # state of the last call to snapshot(), until the next change
+        self.__snapshot = None
     
     def plotCommon(self):
     
-        # Returns the common actors in a readable format (string)
-        result = ''
-        if self.data and self.data.common and len(self.data.common) > 0:
-            for actorId in self.data.common.keys():
-                actor = self.data.common[actorId]
-                where = ""
-                if actor.commonCamerasIds:
-                    for cameraId in actor.commonCamerasIds:
-                        objId = actor.commonCamerasIds[cameraId]
-                        where += f"CAM{cameraId} id {objId} "
-                result += f"[CommonId={actor.id}, Type={actor.type}, Color={actor.color}, Size={actor.size}, Dir={actor.movement}, From={where}, Last={actor.last_step}] - "
-        
-        return result
+        # Returns the common actors of all the groups in a readable format (string)
+        snapshot = self.snapshot()
+        return "".join("".join(snapshot.commonLines(groupId)) for groupId in snapshot.groups)
     
-    def updateCamera(self, groupId, cameraId, objects=None):
+    def snapshot(self):
+        """
+        Immutable state of all the groups (see snapshot.Snapshot), built once per step: it is cached until the
+        next camera update, step or danger identification, so that every consumer (display, logs, export) shares it.
+        """
+        if self.__snapshot is None:
+            groups = {}
+            for groupId, group in self.data.items():
+                cameras = {cameraId: CameraSnapshot(cameraId, camera.name, camera.snapshotActors()) for cameraId, camera in group.cameras.items()}
+                common = tuple(CommonSnapshot(commonObj.id, commonObj.type, commonObj.color, tuple(commonObj.commonCamerasIds.items())) for commonObj in group.common)
+                groups[groupId] = GroupSnapshot(groupId, group.name, MappingProxyType(cameras), common, tuple(group.dangers))
+            self.__snapshot = Snapshot(self.n_step, groups)
+        return self.__snapshot
+    
+    def getCamera(self, groupId, cameraId, ttl=None):
         
-        # step 1: getting data structure groupId-cameraId (either getting or appending if not appended yet)
+        # getting data structure groupId-cameraId (either getting or appending if not appended yet)
         groupData = None        
         if groupId not in self.data.keys():
             
@@ -159,76 +673,102 @@ class CentralCameraSystem():
         if cameraId not in groupData.cameras.keys():
             
             # camera does not exist => creating and appending to group
-            cameraData = Camera(f"CAM-{cameraId}")
+            trajectories = TrajectoryStore(self.history) if self.history else None
+            if self.columnar:
+                cameraData = ColumnarCamera(f"CAM-{cameraId}", self.ttl, TrackletFilter() if self.tracklets else None, trajectories)
+            else:
+                cameraData = Camera(f"CAM-{cameraId}", self.ttl, trajectories)
             groupData.cameras[cameraId] = cameraData
             
         else:
         
             # camera exists => getting it
             cameraData = groupData.cameras[cameraId]
+            
+        # specific ttl for this camera (e.g. narrow FOV cameras)
+        if ttl is not None:
+            cameraData.ttl = ttl
+            
+        return groupData, cameraData
+    
+    def updateCamera(self, groupId, cameraId, objects=None, ttl=None):
+        
+        # step 1: getting data structure groupId-cameraId
+        self.__snapshot = None
+        groupData, cameraData = self.getCamera(groupId, cameraId, ttl)
                         
         # step 2: updating the given camera
         if cameraData:
             
             # appending or updating objects to camera info
             if objects:
-                for obj in objects:
-                
-                    if obj.id not in cameraData.actors.keys():
-                        
-                        # appending new object to camera data
-                        actor = Actor(obj.id, obj.type, obj.color, obj.size, self.n_step)
-                        cameraData.actors[obj.id] = actor
-                        
-                    else:
-                        
-                        # updating object
-                        actor = cameraData.actors[obj.id]
-                        actor.type = obj.type
-                        actor.color = obj.color
-                        actor.last_step = self.n_step
-                        
-                        # tracking: keep track of whether the object is getting bigger or smaller
-                        if obj.size > actor.size:
-                            #actor.movement = Movement.APPROACHING
-                            actor.movement = "Approaching"
-                        elif obj.size < actor.size:
-                            #actor.movement = Movement.LEAVING
-                            actor.movement = "Leaving"
-                        
-                        actor.size = obj.size                         
+                cameraData.updateActors(groupData, cameraId, objects, self.n_step)
+                if cameraData.trajectories is not None:
+                    cameraData.trajectories.record([obj.id for obj in objects], self.n_step, [obj.size for obj in objects])
              
-            # todo: also remove from camera_data those object not present in the current camera frame (n_step - last_step > n)
-            if cameraData.actors:
-            
-                objectIdsToDelete = []
-                for objectId in cameraData.actors:
-                    object = cameraData.actors[objectId]
-                    if self.n_step - object.last_step > 2:
-                        objectIdsToDelete.append(objectId)
-                        
-                if objectIdsToDelete:
-                    for objectId in objectIdsToDelete:
-                        del cameraData.actors[objectId]
+            # removing from camera data those objects not present in the current camera frame (n_step - last_step > ttl)
+            self.evictions += cameraData.evictActors(groupData, cameraId, self.n_step)
             
         else:
         
             # login or raise error
             print("ERROR: Camera data not found")       
+            
+    def updateCameraBatch(self, groupId, cameraId, ids, classIds, colorCodes, areas, ttl=None, boxes=None, descriptors=None, world=None):
+        """
+        Same as updateCamera, with the detections of the camera given as columns (one entry per detection):
+        track ids, class ids (COCO, see actor_store.CLASS_NAMES), color codes (see actor_store.COLOR_NAMES)
+        and normalized areas, and optionally their boxes (x1, y1, x2, y2 in pixels, for the tracklets), appearance
+        descriptors (see reid.descriptors) and world positions (x, y on the ground plane, see calibration.py).
+        No object is built per detection (except the Actor of new tracks in a Camera).
+        """
+        self.__snapshot = None
+        groupData, cameraData = self.getCamera(groupId, cameraId, ttl)
+        if len(ids):
+            cameraData.updateBatch(groupData, cameraId, ids, classIds, colorCodes, areas, self.n_step, boxes, descriptors, world)
+            if cameraData.trajectories is not None:
+                cameraData.trajectories.record(ids, self.n_step, areas, boxes, world)
+        self.evictions += cameraData.evictActors(groupData, cameraId, self.n_step)
+        
+    def resetCamera(self, groupId, cameraId):
+        """
+        Removes every actor of a camera (and its members of the common objects), e.g. when its tracker restarts and
+        its track ids will be given to other objects.
+        """
+        self.__snapshot = None
+        groupData, cameraData = self.getCamera(groupId, cameraId)
+        cameraData.clearActors(groupData, cameraId)
+        
+    def ingest(self, groupId, batches):
+        """
+        Updates several cameras of a group at once: batches is a dictionary of cameraId, (ids, classIds, colorCodes, areas),
+        optionally followed by boxes, descriptors and world positions.
+        """
+        for cameraId, batch in batches.items():
+            self.updateCameraBatch(groupId, cameraId, *batch[:4], boxes=batch[4] if len(batch) > 4 else None,
+                                   descriptors=batch[5] if len(batch) > 5 else None, world=batch[6] if len(batch) > 6 else None)
         
     def step(self):
+        self.__snapshot = None
         self.n_step += 1
+        self.last_step_evictions = self.evictions
+        self.evictions = 0
         
-        # for each step, we identify common objects along the group cameras
+        # for each step, we identify new common objects along the group cameras
+        self.skipped_groups = 0
         if self.data:
             for groupId in self.data.keys():
                 
-                # evaluating each group (e.g. group1)
+                # evaluating each group (e.g. group1), only if any of its cameras changed since the last step (or, with a
+                # matcher, while it has free tracks: their descriptors and positions change without marking the cameras)
                 group = self.data[groupId]
-                
-                previousCommon = group.common
-                group.common = []
-                if group.cameras:
+                if not group.dirtyCameras and not (self.matcher is not None and group.hasFreeTracks()):
+                    self.skipped_groups += 1
+                    continue
+                group.dirtyCameras.clear()
+                if self.matcher is not None:
+                    self.matcher.match(group)
+                elif group.cameras:
                     
                     # evaluating each camera (e.g. camera1)
                     for cameraId in group.cameras.keys():
@@ -237,75 +777,44 @@ class CentralCameraSystem():
                         
                             # evaluating each camera object (e.g. red car with id 55) 
                             for objectId in camera.actors.keys():
+                            
+                                # objects already part of a common object keep their common id
+                                if (cameraId, objectId) in group.members:
+                                    continue
                                 obj = camera.actors[objectId]
                                 
-                                # searching for the same objects in the other cameras (not identified yet as common)
-                                same_objects = self.search_similar_objects(currentObject=obj, cameras=group.cameras, currentCameraId=cameraId, common=group.common)
-                                if same_objects and len(same_objects) > 0:
+                                # searching for the same objects in the other cameras (either a common object to join, or free objects)
+                                commonId, same_objects = self.search_similar_objects(currentObject=obj, group=group, currentCameraId=cameraId)
+                                if commonId or same_objects:
                                     
-                                    # same objects found in other cameras => prepare and add to common structure
-                                    
-                                    # preparing common actor (previous common_id or new one)
-                                    commonId = 0
-                                    if previousCommon:
-                                        for previousCommonObj in previousCommon:
-                                            if self.same_objects(previousCommonObj, obj):
-                                                commonId = previousCommonObj.id
+                                    # preparing common actor (existing common object or new one)
                                     if commonId == 0:
                                         commonId = group.getNewCommonId()
-                                    commonActor = Actor(commonId, obj.type, obj.color)
+                                        group.commonObjects[commonId] = Actor(commonId, obj.type, obj.color)
                                     
                                     # adding object id in current camera
-                                    commonActor.commonCamerasIds[cameraId] = objectId
+                                    group.addMember(commonId, cameraId, objectId)
                                     
                                     # adding object id in the other cameras
                                     for cameraIdForSameObj in same_objects.keys():
-                                        if not cameraIdForSameObj in commonActor.commonCamerasIds:
-                                            commonActor.commonCamerasIds[cameraIdForSameObj] = same_objects[cameraIdForSameObj].id
-        
-                                    # adding to common structure
-                                    group.common.append(commonActor)
+                                        group.addMember(commonId, cameraIdForSameObj, same_objects[cameraIdForSameObj])
     
     def identify_dangers(self):
     
         # for each group, we identify possible dangers within the common objects already identified
+        self.__snapshot = None
+        self.skipped_danger_groups = 0
         if self.data:
             for groupId in self.data.keys():
                 
-                # evaluating each group (e.g. group1)
+                # evaluating the rules of each group (e.g. group1) over its common objects (only if they or their movements changed,
+                # or at every step for the rules over positions, see hazard_score.py)
                 group = self.data[groupId]
-                group.dangers = []
-                if group.common:
-                
-                    # for each common object, check the heuristics to identify dangers
-                    
-                    # in the case of group 1: 
-                    #   if !person in CAM3 is approaching, and 
-                    #   person in CAM1 or person in CAM2
-                    #       => DANGER
-                    
-                    # search for !person in CAM3
-                    treatedCommonIds = {}
-                    for commonObj in group.common:
-                        if not commonObj.id in treatedCommonIds and commonObj.commonCamerasIds and 3 in commonObj.commonCamerasIds and commonObj.type != 'person':
-                            
-                            objInCam3 = group.cameras[3].actors[commonObj.commonCamerasIds[3]]
-                            
-                            # !person found in CAM3 => let's check the approaching
-                            if objInCam3.movement == "Approaching":
-                            
-                                # !person found in CAM3 approaching => let's check if person in CAM1 or in CAM2
-                                for commonObj2 in group.common:
-                                    if commonObj2.type == 'person' and commonObj2.commonCamerasIds and (2 in commonObj2.commonCamerasIds or 1 in commonObj2.commonCamerasIds) :
-                                    
-                                        # person in CAM1 or in CAM2 => danger!
-                                        group.dangers.append(f"DANGER: CommonId {commonObj.id} in CAM3 and CommonId {commonObj2.id} in CAM1 or CAM2")
-                                        
-                                        # mark common object as danger, to avoid repetition
-                                        if not commonObj.id in treatedCommonIds:
-                                            treatedCommonIds[commonObj.id] = True
-                                        if not commonObj2.id in treatedCommonIds:
-                                            treatedCommonIds[commonObj2.id] = True
+                if not group.dangersDirty and not self.rules.kinematic:
+                    self.skipped_danger_groups += 1
+                    continue
+                group.dangersDirty = False
+                group.dangers = self.rules.evaluate(groupId, group)
     
     def same_objects(self, object1, object2):
     
@@ -315,36 +824,37 @@ class CentralCameraSystem():
             
         return object1.type == object2.type and object1.color == object2.color
     
-    def search_similar_objects(self, currentObject, cameras, currentCameraId, common):
+    def search_similar_objects(self, currentObject, group, currentCameraId):
     
-        # first of all, check if this object has already been marked as common => this way we'll skip it
-        if common and len(common) > 0:
-            for commonObj in common:
-                if commonObj.commonCamerasIds and currentCameraId in commonObj.commonCamerasIds:
-                    if commonObj.commonCamerasIds[currentCameraId] == currentObject.id:
-                        # current object already found marked as common => break and skip
-                        return
-                    
+        # only the bucket of the current object can contain the same objects (see Group.indexKey)
+        candidates = group.index.get(group.indexKey(currentObject.type, currentObject.color))
+        if not candidates:
+            return 0, {}
+        
+        # first: an existing common object (with the same type and color) not seen yet by the current camera => joining it
+        commonId = 0
+        for cameraId in group.cameras.keys():
+            if cameraId != currentCameraId and cameraId in candidates:
+                for objectId in candidates[cameraId]:
+                    candidateCommonId = group.members.get((cameraId, objectId), 0)
+                    if candidateCommonId and currentCameraId not in group.commonObjects[candidateCommonId].commonCamerasIds:
+                        commonId = candidateCommonId
+                        break
+                if commonId:
+                    break
         
-        # structure: {cameraId, object}
+        # structure: {cameraId, objectId}, with the first free object of every other camera (not in the joined common object)
         result = {}
-        if cameras:
-            for cameraId in cameras.keys():
-            
-                # avoiding current camera again
-                if cameraId != currentCameraId:
-                   camera = cameras[cameraId]
-                   if camera.actors:
-                   
-                        # for each object in a different camera, let's evaluate if it's the same actor
-                        for objectId in camera.actors.keys():
-                            object = camera.actors[objectId]
-                            
-                            # simple checking: same object type and color
-                            if self.same_objects(object, currentObject):
-                                if not cameraId in result:
-                                    result[cameraId] = object
-        return result
+        commonCamerasIds = group.commonObjects[commonId].commonCamerasIds if commonId else {}
+        for cameraId in group.cameras.keys():
+        
+            # avoiding current camera again
+            if cameraId != currentCameraId and cameraId in candidates and cameraId not in commonCamerasIds:
+                for objectId in candidates[cameraId]:
+                    if (cameraId, objectId) not in group.members:
+                        result[cameraId] = objectId
+                        break
+        return commonId, result
         
     def sync(self):
         """
@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from ccs import CentralCameraSystem
+
+# detection sent to the workers (same attributes read by CentralCameraSystem.updateCamera from an Actor)
+Detection = namedtuple('Detection', ['id', 'type', 'color', 'size'])
+
+class GroupShard():
+    """
+    Subset of the groups of a ParallelCentralCameraSystem, owned by a single worker.
+
+    Attributes
+    ----------
+    ccs : CentralCameraSystem
+        central camera system with the data of the groups of this shard only
+    """
+    def __init__(self, columnar=False, ttl=2, rules=None, tracklets=False, matcher=None, history=0):
+        self.ccs = CentralCameraSystem(columnar=columnar, ttl=ttl, rules=rules, tracklets=tracklets, matcher=matcher, history=history)
+
+    def run(self, command, payload):
+        if command == 'update':
+
+            # applying a batch of camera updates of the current step (detection tuples, or columns followed by boxes,
+            # descriptors and world positions)
+            for kind, groupId, cameraId, objects, ttl in payload:
+                if kind == 'columns':
+                    self.ccs.updateCameraBatch(groupId, cameraId, *objects[:4], ttl=ttl, boxes=objects[4], descriptors=objects[5], world=objects[6])
+                else:
+                    self.ccs.updateCamera(groupId, cameraId, [Detection._make(obj) for obj in objects] if objects else None, ttl)
+            return None
+
+        if command == 'step':
+
+            # applying the last camera updates of the step, and stepping
+            self.run('update', payload)
+            self.ccs.step()
+
+            # common objects of the groups whose common objects changed since the last step (members, type or color,
+            # also from a matcher run over free tracks or a color change without dirty cameras)
+            common = {}
+            for groupId, group in self.ccs.data.items():
+                if group.commonDirty:
+                    group.commonDirty = False
+                    common[groupId] = [(commonObj.id, commonObj.type, commonObj.color, dict(commonObj.commonCamerasIds)) for commonObj in group.common]
+            return common, self.ccs.skipped_groups, self.ccs.last_step_evictions
+
+        if command == 'dangers':
+
+            # dangers of the groups whose common objects or movements changed (every group for the rules over
+            # positions, see CentralCameraSystem.identify_dangers)
+            changed = [groupId for groupId, group in self.ccs.data.items() if group.dangersDirty or self.ccs.rules.kinematic]
+            self.ccs.identify_dangers()
+            return {groupId: self.ccs.data[groupId].dangers for groupId in changed}, self.ccs.skipped_danger_groups
+
+        raise ValueError(f"Unknown command {command}")
+
+def shard_process(connection, options):
+
+    # worker process: owns a shard and runs the commands received from the parent until None is received
+    # (update batches are not answered, so that the parent can keep on sending them)
+    shard = GroupShard(**options)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        result = shard.run(*message)
+        if message[0] != 'update':
+            connection.send(result)
+    connection.close()
+
+class ParallelCentralCameraSystem():
+    """
+    Central camera system whose groups are sharded across a pool of workers (processes or threads).
+
+    Each worker owns the data of its groups: camera updates are buffered by shard and sent in batches
+    (worker processes apply them while the next ones are buffered), and every worker steps and identifies
+    the dangers of its groups independently. The common objects and dangers returned by the workers (only
+    for the groups that changed) are merged into a consistent snapshot per step.
+
+    Attributes
+    ----------
+    mode : str
+        'process' (one process per worker) or 'thread' (one thread pool, one shard per worker)
+    workers : int
+        number of workers (shards)
+    batch : int
+        number of buffered camera updates of a shard that are sent at once to a worker process
+    n_step : int
+        step number, the same in all the shards
+    common : {}
+        dictionary of groupId, [] with the common objects (id, type, color, {cameraId: actorId}) of each group
+    dangers : {}
+        dictionary of groupId, [] with the dangers (danger_rules.Danger, or hazard_score.ScoredDanger) of each group
+    skipped_groups, skipped_danger_groups, last_step_evictions : int
+        totals of the shards for the last step (see CentralCameraSystem)
+    """
+    def __init__(self, workers=None, mode='process', columnar=False, ttl=2, rules=None, batch=64, tracklets=False, matcher=None, history=0):
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.batch = batch
+        self.n_step = 0
+        self.common = {}
+        self.dangers = {}
+        self.skipped_groups = 0
+        self.skipped_danger_groups = 0
+        self.last_step_evictions = 0
+        self.__shardOf = {}
+        self.__pending = [[] for _ in range(self.workers)]
+
+        # every shard is built with the same options as a CentralCameraSystem
+        options = {'columnar': columnar, 'ttl': ttl, 'rules': rules, 'tracklets': tracklets, 'matcher': matcher, 'history': history}
+        if mode == 'process':
+            self.__connections = []
+            self.__processes = []
+            for _ in range(self.workers):
+                parentConnection, childConnection = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=shard_process, args=(childConnection, options), daemon=True)
+                process.start()
+                childConnection.close()
+                self.__connections.append(parentConnection)
+                self.__processes.append(process)
+        elif mode == 'thread':
+            self.__shards = [GroupShard(**options) for _ in range(self.workers)]
+            self.__pool = ThreadPoolExecutor(max_workers=self.workers)
+        else:
+            raise ValueError(f"Unknown mode {mode}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.mode == 'process':
+            for connection in self.__connections:
+                connection.send(None)
+                connection.close()
+            for process in self.__processes:
+                process.join()
+            self.__connections = []
+            self.__processes = []
+        else:
+            self.__pool.shutdown()
+
+    def shardOf(self, groupId):
+
+        # groups are assigned to shards round robin, in order of appearance
+        shard = self.__shardOf.get(groupId)
+        if shard is None:
+            shard = len(self.__shardOf) % self.workers
+            self.__shardOf[groupId] = shard
+        return shard
+
+    def __buffer(self, update):
+        shard = self.shardOf(update[1])
+        pending = self.__pending[shard]
+        pending.append(update)
+        if self.mode == 'process' and len(pending) >= self.batch:
+            self.__connections[shard].send(('update', pending))
+            self.__pending[shard] = []
+
+    def updateCamera(self, groupId, cameraId, objects=None, ttl=None):
+        objects = [(obj.id, obj.type, obj.color, obj.size) for obj in objects] if objects else None
+        self.__buffer(('objects', groupId, cameraId, objects, ttl))
+
+    def updateCameraBatch(self, groupId, cameraId, ids, classIds, colorCodes, areas, ttl=None, boxes=None, descriptors=None, world=None):
+        self.__buffer(('columns', groupId, cameraId, (ids, classIds, colorCodes, areas, boxes, descriptors, world), ttl))
+
+    def ingest(self, groupId, batches):
+
+        # same batches as CentralCameraSystem.ingest: (ids, classIds, colorCodes, areas), optionally followed by boxes,
+        # descriptors and world positions
+        for cameraId, batch in batches.items():
+            self.updateCameraBatch(groupId, cameraId, *batch[:4], boxes=batch[4] if len(batch) > 4 else None,
+                                   descriptors=batch[5] if len(batch) > 5 else None, world=batch[6] if len(batch) > 6 else None)
+
+    def __run(self, command, payloads):
+        if self.mode == 'process':
+            for connection, payload in zip(self.__connections, payloads):
+                connection.send((command, payload))
+            return [connection.recv() for connection in self.__connections]
+        futures = [self.__pool.submit(shard.run, command, payload) for shard, payload in zip(self.__shards, payloads)]
+        return [future.result() for future in futures]
+
+    def step(self):
+        payloads = self.__pending
+        self.__pending = [[] for _ in range(self.workers)]
+        results = self.__run('step', payloads)
+        self.n_step += 1
+        self.skipped_groups = 0
+        self.last_step_evictions = 0
+        for common, skipped, evictions in results:
+            self.common.update(common)
+            self.skipped_groups += skipped
+            self.last_step_evictions += evictions
+
+    def identify_dangers(self):
+        results = self.__run('dangers', [None] * self.workers)
+        self.skipped_danger_groups = 0
+        for dangers, skipped in results:
+            self.dangers.update(dangers)
+            self.skipped_danger_groups += skipped
@@ -0,0 +1,133 @@
+import cv2
+import numpy as np
+
+# ranges dict: first is upper range and second is lower range (OpenCV 8-bit HSV, H in [0, 180))
+# ranges are mutually exclusive: every pixel is in one of them at most (hues 10-24 and low-saturation
+# pixels between the gray and color ranges are in none)
+COLOR_DICT_HSV = {'black': [[180, 255, 30], [0, 0, 0]],
+          'white': [[180, 18, 255], [0, 0, 231]],
+          'red1': [[180, 255, 255], [159, 50, 70]],
+          'red2': [[9, 255, 255], [0, 50, 70]],
+          'green': [[89, 255, 255], [36, 50, 70]],
+          'blue': [[128, 255, 255], [90, 50, 70]],
+          'yellow': [[35, 255, 255], [25, 50, 70]],
+          'purple': [[158, 255, 255], [129, 50, 70]],
+          #'orange': [[24, 255, 255], [10, 50, 70]],
+          'gray': [[180, 18, 230], [0, 0, 40]]}
+
+# pixel labels: index of the range in COLOR_DICT_HSV (same order, so that ties are solved as calculate_color did),
+# and NO_COLOR for the pixels out of every range
+RANGE_NAMES = list(COLOR_DICT_HSV)
+NO_COLOR = len(RANGE_NAMES)
+
+# color name of each label (red1 and red2 are both red)
+LABEL_COLORS = ['red' if name in ('red1', 'red2') else name for name in RANGE_NAMES]
+
+# below this fraction of the frame covered by the boxes, labeling only the boxes is cheaper than labeling the frame
+CROPS_COVERAGE = 0.3
+
+_lut = None
+
+def hsv_lut():
+    """
+    Lookup table (H, S, V) => pixel label, built once (180 x 256 x 256 bytes).
+    """
+    global _lut
+    if _lut is None:
+        h, s, v = np.ogrid[0:180, 0:256, 0:256]
+        lut = np.full((180, 256, 256), NO_COLOR, dtype=np.uint8)
+        for label, name in enumerate(RANGE_NAMES):
+            upper, lower = COLOR_DICT_HSV[name]
+            inRange = (h >= lower[0]) & (h <= upper[0]) & (s >= lower[1]) & (s <= upper[1]) & (v >= lower[2]) & (v <= upper[2])
+            lut[inRange] = label
+        _lut = lut
+    return _lut
+
+def label_frame(frame):
+    """
+    Label of every pixel of a BGR frame: a single HSV conversion and a single lookup.
+    """
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    index = (hsv[..., 0].astype(np.int32) << 16) | (hsv[..., 1].astype(np.int32) << 8) | hsv[..., 2]
+    return hsv_lut().ravel().take(index)
+
+def integral_histogram(labels):
+    """
+    Integral histogram of a labeled frame: (ranges, height + 1, width + 1) cumulative counts of the pixels of
+    every color range, so that the histogram of any box takes 4 lookups (pixels out of every range are not kept).
+    """
+    return np.stack([cv2.integral((labels == label).view(np.uint8)) for label in range(NO_COLOR)])
+
+def clip_boxes(boxes, shape):
+
+    # xyxy boxes as integer coordinates within the frame (same pixels as slicing frame[y1:y2, x1:x2])
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    height, width = shape[:2]
+    return np.clip(boxes, 0, [width, height, width, height])
+
+def crop_histograms(frame, boxes):
+
+    # histograms of the boxes labeling only their own pixels (one conversion and lookup per box)
+    bins = NO_COLOR + 1
+    histograms = np.zeros((len(boxes), bins), dtype=np.int64)
+    for i, (x1, y1, x2, y2) in enumerate(boxes.tolist()):
+        if x2 > x1 and y2 > y1:
+            histograms[i] = np.bincount(label_frame(frame[y1:y2, x1:x2]).ravel(), minlength=bins)
+    return histograms
+
+def box_histograms(frame, boxes, method='auto', labels=None):
+    """
+    Histogram of the pixel labels (NO_COLOR + 1 bins) of every xyxy box of a BGR frame, at once.
+
+    method is 'bincount' (frame labeled once, one bincount over the labels of all the boxes offset by box),
+    'integral' (frame labeled once, integral histogram: for many or large overlapping boxes), 'crops' (only
+    the pixels of the boxes are labeled: for a few small boxes) or 'auto' (by the pixels covered by the boxes).
+    labels of the frame (see label_frame) can be given if already known.
+    """
+    boxes = clip_boxes(boxes, frame.shape)
+    bins = NO_COLOR + 1
+    if len(boxes) == 0:
+        return np.zeros((0, bins), dtype=np.int64)
+
+    widths = np.maximum(boxes[:, 2] - boxes[:, 0], 0)
+    heights = np.maximum(boxes[:, 3] - boxes[:, 1], 0)
+    if method == 'auto':
+        coverage = int((widths * heights).sum()) / (frame.shape[0] * frame.shape[1])
+        method = 'crops' if coverage < CROPS_COVERAGE and labels is None else 'bincount' if coverage <= 1 else 'integral'
+
+    if method == 'crops':
+        return crop_histograms(frame, boxes)
+    if labels is None:
+        labels = label_frame(frame)
+
+    if method == 'integral':
+        integral = integral_histogram(labels)
+        x1, y1, x2, y2 = boxes.T
+        x2 = np.maximum(x1, x2)
+        y2 = np.maximum(y1, y2)
+        histograms = np.empty((len(boxes), bins), dtype=np.int64)
+        histograms[:, :NO_COLOR] = (integral[:, y2, x2] - integral[:, y1, x2] - integral[:, y2, x1] + integral[:, y1, x1]).T
+        histograms[:, NO_COLOR] = (x2 - x1) * (y2 - y1) - histograms[:, :NO_COLOR].sum(axis=1)
+        return histograms
+
+    offsets = [labels[y1:y2, x1:x2].ravel().astype(np.int64) + i * bins for i, (x1, y1, x2, y2) in enumerate(boxes.tolist())]
+    return np.bincount(np.concatenate(offsets), minlength=len(boxes) * bins).reshape(len(boxes), bins)
+
+def most_probable_labels(histograms):
+
+    # first range with most pixels (as max() over COLOR_DICT_HSV), pixels out of every range are not counted
+    return np.argmax(histograms[:, :NO_COLOR], axis=1)
+
+def calculate_colors(frame, boxes, method='auto'):
+    """
+    Most probable color of every xyxy box of a BGR frame (the frame is converted and labeled once).
+    """
+    histograms = box_histograms(frame, boxes, method)
+    return [LABEL_COLORS[label] for label in most_probable_labels(histograms).tolist()]
+
+def calculate_color(img):
+    """
+    Most probable color of an image (e.g. the crop of a detected object).
+    """
+    histogram = np.bincount(label_frame(img).ravel(), minlength=NO_COLOR + 1)
+    return LABEL_COLORS[int(np.argmax(histogram[:NO_COLOR]))]
@@ -0,0 +1,161 @@
+import json
+from collections import namedtuple
+
+# built-in rule, equivalent to the original heuristic of group 1:
+#   if !person in CAM3 is approaching, and
+#   person in CAM1 or person in CAM2
+#       => DANGER
+DEFAULT_RULES = [
+    {
+        "name": "vehicle-approaching-crosswalk",
+        "subject": {"cameras": [3], "not_types": ["person"], "movement": "Approaching"},
+        "other": {"cameras": [1, 2], "types": ["person"]},
+        "message": "DANGER: CommonId {subject} in CAM3 and CommonId {other} in CAM1 or CAM2"
+    }
+]
+
+class Danger(namedtuple('Danger', ['rule', 'subject', 'other', 'template'])):
+    """
+    Danger identified by a rule between two common objects of a group (its message is only rendered on demand).
+
+    Attributes
+    ----------
+    rule : str
+        name of the rule that identified the danger
+    subject : int
+        common id of the object matching the subject of the rule (e.g. the approaching car)
+    other : int
+        common id of the object matching the other side of the rule (e.g. the person)
+    template : str
+        message template of the rule, with the {rule}, {subject} and {other} fields
+    """
+    __slots__ = ()
+
+    @property
+    def message(self):
+        return self.template.format(rule=self.rule, subject=self.subject, other=self.other)
+
+    def __str__(self):
+        return self.message
+
+class Selector():
+    """
+    Compiled condition over the common objects of a group.
+
+    A common object matches if it has a member in any of the cameras, its type is allowed and
+    (if given) the movement of that member is the expected one.
+
+    Attributes
+    ----------
+    cameras : ()
+        camera ids where the object must be seen
+    types : set
+        allowed types (None if any type is allowed)
+    not_types : set
+        forbidden types
+    movement : str
+        expected movement of the object in those cameras (None if any movement is allowed)
+    """
+    def __init__(self, spec):
+        self.cameras = tuple(spec["cameras"])
+        self.types = set(spec["types"]) if spec.get("types") else None
+        self.not_types = set(spec.get("not_types", []))
+        self.movement = spec.get("movement")
+
+    def candidates(self, group):
+
+        # only the common objects indexed under the cameras and types of the selector are visited (see Group.commonIndex)
+        found = {}
+        for cameraId in self.cameras:
+            byType = group.commonIndex.get(cameraId)
+            if byType:
+                actors = group.cameras[cameraId].actors
+                for type in (self.types if self.types is not None else list(byType)):
+                    if type in byType and type not in self.not_types:
+                        for commonId, actorId in byType[type].items():
+                            if commonId not in found and len(group.commonObjects[commonId].commonCamerasIds) > 1:
+                                if self.movement is None or actors[actorId].movement == self.movement:
+                                    found[commonId] = group.commonObjects[commonId]
+
+        # common ids are auto-incremental => same order as group.common
+        return [found[commonId] for commonId in sorted(found)]
+
+class Rule():
+    """
+    Compiled danger rule: every pair (subject, other) of different common objects matching both selectors is a danger.
+    """
+    def __init__(self, spec):
+        self.name = spec["name"]
+        self.subject = Selector(spec["subject"])
+        self.other = Selector(spec["other"])
+        self.message = spec.get("message", "DANGER ({rule}): CommonId {subject} and CommonId {other}")
+
+    def evaluate(self, group):
+        dangers = []
+        subjects = self.subject.candidates(group)
+        if subjects:
+            others = self.other.candidates(group)
+            for subject in subjects:
+                for other in others:
+                    if other.id != subject.id:
+                        dangers.append(Danger(self.name, subject.id, other.id, self.message))
+        return dangers
+
+    def armed(self, group):
+
+        # a side of the rule is already matched (e.g. a person on the crosswalk): the rule is close to firing
+        if self.subject.candidates(group) or self.other.candidates(group):
+            return set(self.subject.cameras + self.other.cameras)
+        return set()
+
+class DangerRuleEngine():
+    """
+    Evaluates the danger rules of each group over its common objects.
+
+    Rules are compiled once into selectors by camera, type and movement, which are resolved through the
+    members of the common objects indexed by camera and type (Group.commonIndex): only the common objects
+    of the cameras and types referenced by a rule are visited, instead of every pair of common objects.
+
+    Attributes
+    ----------
+    default : []
+        rules of the groups without specific rules
+    groups : {}
+        dictionary of groupId, [] with the rules of specific groups
+    """
+
+    # rules only depend on the common objects and their movements (see hazard_score.HazardScorer otherwise)
+    kinematic = False
+
+    def __init__(self, config=None):
+        if config is None:
+            config = {"default": DEFAULT_RULES}
+        self.default = [Rule(spec) for spec in config.get("default", [])]
+        self.groups = {}
+        for groupId, specs in config.get("groups", {}).items():
+            self.groups[int(groupId) if str(groupId).isdigit() else groupId] = [Rule(spec) for spec in specs]
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def rules(self, groupId):
+        return self.groups.get(groupId, self.default)
+
+    def evaluate(self, groupId, group):
+        dangers = []
+        if group.commonObjects:
+            for rule in self.rules(groupId):
+                dangers.extend(rule.evaluate(group))
+        return dangers
+
+    def armed(self, groupId, group):
+        """
+        Cameras of the rules of a group close to firing (any of their sides matched by a common object).
+        """
+        cameras = set()
+        if group.commonObjects:
+            for rule in self.rules(groupId):
+                cameras |= rule.armed(group)
+        return cameras
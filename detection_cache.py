@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from reid import DESCRIPTOR_SIZE
+
+# detections of a camera frame, as stored in the cache (one record per tracked box, with its appearance descriptor)
+DETECTION_DTYPE = np.dtype([('x1', np.float32), ('y1', np.float32), ('x2', np.float32), ('y2', np.float32),
+                            ('id', np.int64), ('cls', np.int16), ('color', np.uint8), ('area', np.float64),
+                            ('descriptor', np.float32, (DESCRIPTOR_SIZE,))])
+
+# encoded frame file (see read_encoded): its bytes and their digest
+EncodedFrame = namedtuple('EncodedFrame', ['data', 'digest'])
+
+def read_encoded(path):
+
+    # file bytes and content digest (frames are only decoded if their detections are not cached)
+    with open(path, 'rb') as f:
+        data = f.read()
+    return EncodedFrame(data, hashlib.sha256(data).hexdigest())
+
+def decode(frame):
+    return cv2.imdecode(np.frombuffer(frame.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+def file_digest(path):
+
+    # digest of a file (e.g. the model weights), or of its name if it does not exist (e.g. downloaded on demand)
+    if not os.path.isfile(path):
+        return hashlib.sha256(path.encode()).hexdigest()
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class DetectionCache():
+    """
+    On-disk cache of the detections (boxes, track ids, classes, color codes, normalized areas and descriptors) of every camera frame,
+    so that CCS experiments can be re-run over recorded frames without running the detector again.
+
+    Entries are content addressed: the key of a frame is the digest of the detection settings (model weights, conf,
+    classes, tracker...), the camera, the digest of the frame bytes and the key of the previous frame of the same camera,
+    because track ids depend on all the previous frames seen by the tracker. Once a camera misses, its following frames
+    are not looked up anymore (they are detected again, with a tracker starting at the missed frame, and cached).
+
+    A fresh tracker hands out the track ids of the cached frames again, so a camera that misses after cached frames is
+    restarted (see restarted): its actors must be reset in the CCS before its new detections are given to it.
+
+    Attributes
+    ----------
+    directory : str
+        directory of the cache (one .npy file per camera frame, with a DETECTION_DTYPE array)
+    salt : str
+        digest of the detection settings
+    hits, misses : int
+        number of camera frames found and not found in the cache
+    """
+    def __init__(self, directory, settings):
+        self.directory = directory
+        self.salt = hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+        self.hits = 0
+        self.misses = 0
+        self.__previous = {}
+        self.__missed = set()
+        self.__cached = set()
+        self.__restarted = set()
+        os.makedirs(directory, exist_ok=True)
+
+    def __path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.npy")
+
+    def lookup(self, cameraId, digest):
+        """
+        Key of the next frame of a camera (given the digest of its bytes) and its cached detections (None if not cached).
+        """
+        key = hashlib.sha256(f"{self.salt}:{cameraId}:{self.__previous.get(cameraId, '')}:{digest}".encode()).hexdigest()
+        self.__previous[cameraId] = key
+        detections = None
+        if cameraId not in self.__missed:
+            try:
+                detections = np.load(self.__path(key), allow_pickle=False)
+            except (FileNotFoundError, ValueError):
+                self.__missed.add(cameraId)
+                if cameraId in self.__cached:
+                    self.__restarted.add(cameraId)
+        if detections is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.__cached.add(cameraId)
+        return key, detections
+
+    def restarted(self):
+
+        # cameras whose tracker restarted after cached frames since the last call (their track ids are reused)
+        cameras, self.__restarted = self.__restarted, set()
+        return cameras
+
+    def put(self, key, detections):
+
+        # written to a temporary file first, so that an interrupted run does not leave a truncated entry
+        path = self.__path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            np.save(f, np.asarray(detections, dtype=DETECTION_DTYPE), allow_pickle=False)
+        os.replace(temporary, path)
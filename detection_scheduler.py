@@ -0,0 +1,125 @@
+import numpy as np
+
+class CameraCadence():
+    """
+    Detection cadence of a camera (see DetectionScheduler).
+
+    Attributes
+    ----------
+    interval : int
+        frames between two detections of the camera (1: every frame)
+    elapsed : int
+        frames propagated since the last detection
+    detections : np.ndarray
+        last detections of the camera (DETECTION_DTYPE)
+    velocity : np.ndarray
+        box velocity (x1, y1, x2, y2 in pixels per frame) of each one of the last detections
+    alerted : bool
+        whether a danger rule of the camera is close to firing (the interval is not allowed to grow)
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.elapsed = 0
+        self.detections = None
+        self.velocity = np.zeros((0, 4), dtype=np.float32)
+        self.alerted = False
+
+def detection_boxes(detections):
+    return np.stack([detections['x1'], detections['y1'], detections['x2'], detections['y2']], axis=1)
+
+class DetectionScheduler():
+    """
+    Adaptive detection cadence per camera: the detector runs every interval frames of a camera, and in between the
+    tracks of its last detection are propagated with a constant velocity model (box velocity estimated between the
+    last two detections of every track), so that the CCS still gets the detections of every camera at every step.
+
+    The interval of a camera grows by one frame after every detection without new tracks (up to maxInterval), and
+    goes back to minInterval as soon as new tracks appear or a danger rule over the camera is close to firing
+    (see alert and DangerRuleEngine.armed).
+
+    Attributes
+    ----------
+    minInterval, maxInterval : int
+        bounds of the interval of every camera
+    cameras : {}
+        dictionary of cameraId, CameraCadence
+    inferred, skipped : int
+        camera frames detected and propagated (without inference)
+    """
+    def __init__(self, maxInterval=4, minInterval=1):
+        self.minInterval = minInterval
+        self.maxInterval = max(maxInterval, minInterval)
+        self.cameras = {}
+        self.inferred = 0
+        self.skipped = 0
+
+    @property
+    def skipped_fraction(self):
+        total = self.inferred + self.skipped
+        return self.skipped / total if total else 0.0
+
+    def due(self, cameraId):
+
+        # whether the frame of the camera at this step has to be detected (always the first one)
+        cadence = self.cameras.get(cameraId)
+        return cadence is None or cadence.detections is None or cadence.elapsed + 1 >= cadence.interval
+
+    def alert(self, cameraIds):
+
+        # cameras of a danger rule close to firing: detected at every step until the rule is no longer armed
+        for cameraId in cameraIds:
+            cadence = self.cameras.get(cameraId)
+            if cadence is not None:
+                cadence.alerted = True
+                cadence.interval = self.minInterval
+
+    def observe(self, cameraId, detections):
+        """
+        Detections of a camera given by the detector: new velocities of its tracks and next interval.
+        """
+        cadence = self.cameras.get(cameraId)
+        if cadence is None:
+            cadence = self.cameras[cameraId] = CameraCadence(self.minInterval)
+        self.inferred += 1
+
+        # step 1: velocity of the tracks also in the previous detection (zero for the new ones)
+        boxes = detection_boxes(detections)
+        velocity = np.zeros((len(detections), 4), dtype=np.float32)
+        newTracks = len(detections)
+        if cadence.detections is not None and len(cadence.detections) and len(detections):
+            _, current, previous = np.intersect1d(detections['id'], cadence.detections['id'], assume_unique=True, return_indices=True)
+            velocity[current] = (boxes[current] - detection_boxes(cadence.detections)[previous]) / (cadence.elapsed + 1)
+            newTracks -= len(current)
+
+        # step 2: next interval (back to the minimum with new tracks or close dangers, one more frame otherwise)
+        if newTracks or cadence.alerted:
+            cadence.interval = self.minInterval
+        else:
+            cadence.interval = min(cadence.interval + 1, self.maxInterval)
+        cadence.alerted = False
+        cadence.detections = detections
+        cadence.velocity = velocity
+        cadence.elapsed = 0
+
+    def propagate(self, cameraId):
+        """
+        Detections of a camera at a frame not detected: the last detections moved by their velocity, with their
+        normalized areas scaled as their boxes (so that the movement of the actors is kept in the CCS).
+        """
+        cadence = self.cameras[cameraId]
+        cadence.elapsed += 1
+        self.skipped += 1
+        detections = cadence.detections.copy()
+        if len(detections):
+            boxes = detection_boxes(cadence.detections)
+            moved = boxes + cadence.velocity * cadence.elapsed
+
+            # boxes of at least one pixel (shrinking tracks are not inverted)
+            moved[:, 2] = np.maximum(moved[:, 2], moved[:, 0] + 1)
+            moved[:, 3] = np.maximum(moved[:, 3], moved[:, 1] + 1)
+            before = np.maximum((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]), 1)
+            after = (moved[:, 2] - moved[:, 0]) * (moved[:, 3] - moved[:, 1])
+            detections['x1'], detections['y1'], detections['x2'], detections['y2'] = moved.T
+            detections['area'] = np.round(detections['area'] * (after / before), 6)
+        return detections
+
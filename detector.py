@@ -0,0 +1,91 @@
+import torch
+from ultralytics import YOLO
+from ultralytics.engine.results import Results
+from ultralytics.trackers.track import TRACKER_MAP
+from ultralytics.utils import IterableSimpleNamespace, yaml_load
+from ultralytics.utils.checks import check_yaml
+
+from camera_profiles import CameraProfile, to_full_frame
+
+class Detector():
+    """
+    Single YOLO model shared by all the cameras: the frames of every camera at a step are predicted as one batch,
+    and tracked afterwards by a tracker of their own camera (the tracker state is kept here, not in the model,
+    so that cameras can be added without loading more models).
+
+    Attributes
+    ----------
+    model : YOLO
+        detection model (predict only, its own tracking callbacks are not used)
+    conf : float
+        confidence threshold for object detection
+    classes : []
+        filter of the results by class (None for all the classes)
+    trackerConfig : IterableSimpleNamespace
+        configuration of the trackers (e.g. bytetrack.yaml)
+    trackers : {}
+        dictionary of cameraId, tracker (BYTETracker or BOTSORT), created on the first frame of each camera
+    profiles : {}
+        dictionary of cameraId, CameraProfile (region of interest and inference image size of each camera,
+        see camera_profiles.py); cameras without a profile are detected on the full frame at 640
+    """
+    def __init__(self, weights='yolov8n.pt', conf=0.5, classes=None, tracker='bytetrack.yaml', frameRate=30, profiles=None):
+        self.model = YOLO(weights)
+        self.conf = conf
+        self.classes = classes
+        self.trackerConfig = IterableSimpleNamespace(**yaml_load(check_yaml(tracker)))
+        self.frameRate = frameRate
+        self.trackers = {}
+        self.profiles = profiles or {}
+        self.__defaultProfile = CameraProfile()
+
+    def tracker(self, cameraId):
+        tracker = self.trackers.get(cameraId)
+        if tracker is None:
+            tracker = TRACKER_MAP[self.trackerConfig.tracker_type](args=self.trackerConfig, frame_rate=self.frameRate)
+            self.trackers[cameraId] = tracker
+        return tracker
+
+    def reset(self, cameraId=None):
+
+        # forgetting the tracks of a camera (or of all of them), e.g. when its feed restarts
+        if cameraId is None:
+            self.trackers = {}
+        else:
+            self.trackers.pop(cameraId, None)
+
+    def track(self, frames):
+        """
+        Detects and tracks the objects of the frames of several cameras: frames is a dictionary of cameraId, frame
+        (None if the camera has no frame at this step). Returns a dictionary of cameraId, [Results] with the track ids
+        in boxes.id, as YOLO.track(persist=True) would for a model per camera.
+        """
+        cameraIds = [cameraId for cameraId, frame in frames.items() if frame is not None]
+        if not cameraIds:
+            return {}
+
+        # step 1: one batched inference for all the cameras with the same image size, over their regions of interest
+        byImgsz = {}
+        for cameraId in cameraIds:
+            byImgsz.setdefault(self.profiles.get(cameraId, self.__defaultProfile).imgsz, []).append(cameraId)
+        results = {}
+        for imgsz, batch in byImgsz.items():
+            images, offsets = zip(*(self.profiles.get(cameraId, self.__defaultProfile).prepare(frames[cameraId]) for cameraId in batch))
+            for cameraId, offset, result in zip(batch, offsets, self.model.predict(list(images), imgsz=imgsz, conf=self.conf, classes=self.classes, verbose=False)):
+
+                # detections of a roi back to full frame coordinates (normalized boxes and colors over the full frame)
+                if self.profiles.get(cameraId, self.__defaultProfile).roi is not None:
+                    boxes = to_full_frame(result.boxes.data.cpu().numpy(), offset)
+                    result = Results(frames[cameraId], path=result.path, names=result.names, boxes=torch.as_tensor(boxes))
+                results[cameraId] = result
+
+        # step 2: tracking the detections of each camera with its own tracker (as ultralytics does after predict)
+        tracked = {}
+        for cameraId in cameraIds:
+            result = results[cameraId]
+            tracks = self.tracker(cameraId).update(result.boxes.cpu().numpy(), result.orig_img)
+            if len(tracks):
+                result = result[tracks[:, -1].astype(int)]
+                result.update(boxes=torch.as_tensor(tracks[:, :-1]))
+            tracked[cameraId] = [result]
+        return tracked
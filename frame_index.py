@@ -0,0 +1,116 @@
+import os
+import re
+from collections import namedtuple
+
+import numpy as np
+
+# frame number of a file name: its last number (e.g. 181.png, 1_181.png or cam1-000181.png => 181)
+FRAME_NUMBER = re.compile(r'(\d+)(?!.*\d)')
+
+# result of FrameIndex.join:
+#   matched: [(frameNumber, {cameraId: path})] in frame order (frame number of the reference camera)
+#   unmatched: {cameraId: [path]} frames of each camera left out of the join
+FrameJoin = namedtuple('FrameJoin', ['matched', 'unmatched'])
+
+def index_directory(path, extensions=('.png', '.jpg', '.jpeg')):
+    """
+    Frame numbers (sorted) and paths of the frames of a directory, in a single os.scandir pass
+    (files without a number in their name are ignored).
+    """
+    numbers, paths = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(extensions) and entry.is_file():
+                    match = FRAME_NUMBER.search(entry.name)
+                    if match:
+                        numbers.append(int(match.group(1)))
+                        paths.append(entry.path)
+    except FileNotFoundError:
+        pass
+    numbers = np.array(numbers, dtype=np.int64)
+    order = np.argsort(numbers, kind='stable')
+    return numbers[order], [paths[i] for i in order.tolist()]
+
+class FrameIndex():
+    """
+    Frames of every camera indexed by frame number, to join the frames of different cameras.
+
+    Attributes
+    ----------
+    cameras : {}
+        dictionary of cameraId, (numbers, paths): sorted frame numbers (np.ndarray) and their paths
+    """
+    def __init__(self, cameras):
+        self.cameras = cameras
+
+    @classmethod
+    def scan(cls, directories, extensions=('.png', '.jpg', '.jpeg')):
+
+        # directories: dictionary of cameraId, directory with the frames of that camera
+        return cls({cameraId: index_directory(path, extensions) for cameraId, path in directories.items()})
+
+    def __len__(self):
+        return sum(len(numbers) for numbers, _ in self.cameras.values())
+
+    def nearest(self, cameraId, numbers, tolerance=0):
+        """
+        Position of the nearest frame of a camera to each frame number (-1 if none within the tolerance).
+        Each frame of the camera is given to one frame number at most (the nearest one, the first one if tied).
+        """
+        cameraNumbers = self.cameras[cameraId][0]
+        result = np.full(len(numbers), -1, dtype=np.int64)
+        if len(cameraNumbers) == 0 or len(numbers) == 0:
+            return result
+
+        # nearest candidate on each side of every frame number
+        right = np.clip(np.searchsorted(cameraNumbers, numbers), 0, len(cameraNumbers) - 1)
+        left = np.clip(right - 1, 0, len(cameraNumbers) - 1)
+        useLeft = np.abs(cameraNumbers[left] - numbers) <= np.abs(cameraNumbers[right] - numbers)
+        candidates = np.where(useLeft, left, right)
+        distances = np.abs(cameraNumbers[candidates] - numbers)
+        valid = np.flatnonzero(distances <= tolerance)
+
+        # one frame number per camera frame: the nearest one (stable sort => first one if tied)
+        order = valid[np.lexsort((distances[valid], candidates[valid]))]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = candidates[order][1:] != candidates[order][:-1]
+        result[order[first]] = candidates[order[first]]
+        return result
+
+    def join(self, reference, tolerance=0, optional=()):
+        """
+        Frame sets of the reference camera with the nearest frame of every other camera (within the tolerance, in
+        frame numbers). Frames of the reference camera without a frame of any required (not optional) camera are
+        left out. Returns a FrameJoin with the frame sets and the unmatched frames of every camera.
+        """
+        numbers, paths = self.cameras[reference]
+        others = [cameraId for cameraId in self.cameras if cameraId != reference]
+        positions = {cameraId: self.nearest(cameraId, numbers, tolerance) for cameraId in others}
+
+        keep = np.ones(len(numbers), dtype=bool)
+        for cameraId in others:
+            if cameraId not in optional:
+                keep &= positions[cameraId] >= 0
+
+        matched = []
+        for i in np.flatnonzero(keep).tolist():
+            frames = {reference: paths[i]}
+            for cameraId in others:
+                position = int(positions[cameraId][i])
+                if position >= 0:
+                    frames[cameraId] = self.cameras[cameraId][1][position]
+            matched.append((int(numbers[i]), frames))
+
+        unmatched = {reference: [paths[i] for i in np.flatnonzero(~keep).tolist()]}
+        for cameraId in others:
+            used = np.zeros(len(self.cameras[cameraId][0]), dtype=bool)
+            used[positions[cameraId][keep & (positions[cameraId] >= 0)]] = True
+            unmatched[cameraId] = [self.cameras[cameraId][1][i] for i in np.flatnonzero(~used).tolist()]
+        return FrameJoin(matched, unmatched)
+
+def join_report(join):
+
+    # readable summary of a join: frame sets and unmatched frames by camera
+    unmatched = ", ".join(f"CAM{cameraId} {len(paths)}" for cameraId, paths in join.unmatched.items())
+    return f"{len(join.matched)} frame sets matched, unmatched frames: {unmatched}"
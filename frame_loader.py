@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+class FrameLoader():
+    """
+    Prefetching loader of frame sets (the frames of all the cameras at a step): upcoming frames are decoded on a
+    thread pool (cv2.imread releases the GIL) into a bounded queue, while the consumer processes the current ones.
+
+    Iterating the loader yields (key, {cameraId: frame}) in the order of the frame sets.
+
+    Attributes
+    ----------
+    workers : int
+        number of decoding threads
+    depth : int
+        maximum number of frame sets decoded or being decoded ahead of the consumer
+    stall_time : float
+        total seconds the consumer waited for a frame set not decoded yet
+    stalls : int
+        number of frame sets the consumer had to wait for
+    loaded : int
+        number of frame sets delivered
+    """
+    def __init__(self, frameSets, workers=4, depth=8, read=cv2.imread):
+        self.workers = workers
+        self.depth = depth
+        self.stall_time = 0.0
+        self.stalls = 0
+        self.loaded = 0
+        self.__frameSets = frameSets
+        self.__read = read
+        self.__queue = queue.Queue(maxsize=depth)
+        self.__stop = threading.Event()
+        self.__pool = None
+        self.__producer = None
+
+    def __decode(self, paths):
+        return {cameraId: self.__read(path) for cameraId, path in paths.items()}
+
+    def __produce(self):
+
+        # submitting the frame sets in order, blocking while the queue is full (bounded prefetch)
+        try:
+            for key, paths in self.__frameSets:
+                if self.__stop.is_set():
+                    break
+                future = self.__pool.submit(self.__decode, paths)
+                while not self.__stop.is_set():
+                    try:
+                        self.__queue.put((key, future), timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+        finally:
+            self.__queue.put(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        self.__pool = ThreadPoolExecutor(max_workers=self.workers)
+        self.__producer = threading.Thread(target=self.__produce, daemon=True)
+        self.__producer.start()
+        try:
+            while True:
+                start = time.perf_counter()
+                stalled = self.__queue.empty()
+                item = self.__queue.get()
+                if item is None:
+                    break
+                key, future = item
+                stalled = stalled or not future.done()
+                frames = future.result()
+                if stalled:
+                    self.stall_time += time.perf_counter() - start
+                    self.stalls += 1
+                self.loaded += 1
+                yield key, frames
+        finally:
+            self.close()
+
+    def close(self):
+        self.__stop.set()
+        if self.__producer is not None:
+
+            # unblocking the producer if it is waiting for room in the queue
+            while self.__producer.is_alive():
+                try:
+                    self.__queue.get_nowait()
+                except queue.Empty:
+                    self.__producer.join(0.05)
+            self.__producer = None
+        if self.__pool is not None:
+            self.__pool.shutdown()
+            self.__pool = None
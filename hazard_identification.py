@@ -1,30 +1,51 @@
-from ultralytics import YOLO
+import argparse
 import cv2
 import numpy as np
-import glob
-import re
+import sys
 import time
-from pathlib import Path
-import os.path
 from ccs import CentralCameraSystem
-from ccs import Actor
+from actor_store import color_code
+from color_engine import calculate_colors
+from danger_rules import DangerRuleEngine
+from hazard_score import HazardScorer
+from detection_cache import DETECTION_DTYPE, DetectionCache, decode, file_digest, read_encoded
+from detection_scheduler import DetectionScheduler
+from reid import DESCRIPTOR_SIZE, ReidMatcher, descriptors
+from calibration import camera_calibrations
+from spatial_matcher import SpatialMatcher
+from camera_profiles import load_profiles
+from camera_workers import CameraWorkers
+from detector import Detector
+from frame_index import FrameIndex, join_report
+from frame_loader import FrameLoader
+from video_source import POLICIES, VideoSource
+from snapshot import snapshot_events
 import json
 
 from codecarbon import OfflineEmissionsTracker
-tracker = OfflineEmissionsTracker(country_iso_code="ESP")
-tracker.start()
-
-# load yolov8 models for the different cameras
-model = YOLO('yolov8n.pt')
-model2 = YOLO('yolov8n.pt')
-model3 = YOLO('yolov8n.pt')
 
 # parameters for the yolo tracking (ref https://docs.ultralytics.com/modes/predict/#working-with-results)
+weights = 'yolov8n.pt'
 conf = 0.5 # confidence threshold for object detection
 show_labels = False
 show_conf = False
 classes = [0, 1, 2, 3, 5, 6, 7, 16] # filter results by class, i.e. classes=0, or classes=[0,2,3]
 
+# danger rules of the CCS, by group (see danger_rules.py)
+danger_rules_file = './danger_rules.json'
+
+# number of steps an object is kept in the CCS after it was last seen, by camera (CAM3 has a narrower FOV)
+camera_ttl = {1: 2, 2: 2, 3: 2}
+
+# observations kept per actor in the trajectory history of the CCS (see trajectory.py)
+trajectory_depth = 32
+
+# seconds between two steps of the CCS (frame sets of the CARLA cameras), for the time to collision (see hazard_score.py)
+step_seconds = 0.1
+
+# calibration of the cameras (poses of the CARLA cameras, see calibration.py), for the world positions of the actors
+calibrations = camera_calibrations()
+
 # helper to get classNames from ids
 coco_classes = {0: 'person', 1: 'bicycle', 2: 'car', 3: 'motorcycle', 4: 'airplane', 5: 'bus', 6: 'train', 7: 'truck', 8: 'boat', 9: 'traffic light', 10: 'fire hydrant', 11: 'stop sign', 12: 'parking meter', 13: 'bench', 14: 'bird', 15: 'cat', 16: 'dog', 17: 'horse', 18: 'sheep', 19: 'cow', 20: 'elephant', 21: 'bear', 22: 'zebra', 23: 'giraffe', 24: 'backpack', 25: 'umbrella', 26: 'handbag', 27: 'tie', 28: 'suitcase', 29: 'frisbee', 30: 'skis', 31: 'snowboard', 32: 'sports ball', 33: 'kite', 34: 'baseball bat', 35: 'baseball glove', 36: 'skateboard', 37: 'surfboard', 38: 'tennis racket', 39: 'bottle', 40: 'wine glass', 41: 'cup', 42: 'fork', 43: 'knife', 44: 'spoon', 45: 'bowl', 46: 'banana', 47: 'apple', 48: 'sandwich', 49: 'orange', 50: 'broccoli', 51: 'carrot', 52: 'hot dog', 53: 'pizza', 54: 'donut', 55: 'cake', 56: 'chair', 57: 'couch', 58: 'potted plant', 59: 'bed', 60: 'dining table', 61: 'toilet', 62: 'tv', 63: 'laptop', 64: 'mouse', 65: 'remote', 66: 'keyboard', 67: 'cell phone', 68: 'microwave', 69: 'oven', 70: 'toaster', 71: 'sink', 72: 'refrigerator', 73: 'book', 74: 'clock', 75: 'vase', 76: 'scissors', 77: 'teddy bear', 78: 'hair drier', 79: 'toothbrush'}
 
@@ -40,201 +61,323 @@ def calculate_area(xywhn):
     else:
         return 0
 
-def calculate_color(img):
-
-    hsvFrame = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-    
-    # ranges dict: first is upper range and second is lower range
-    color_dict_HSV = {'black': [[180, 255, 30], [0, 0, 0]],
-              'white': [[180, 18, 255], [0, 0, 231]],
-              'red1': [[180, 255, 255], [159, 50, 70]],
-              'red2': [[9, 255, 255], [0, 50, 70]],
-              'green': [[89, 255, 255], [36, 50, 70]],
-              'blue': [[128, 255, 255], [90, 50, 70]],
-              'yellow': [[35, 255, 255], [25, 50, 70]],
-              'purple': [[158, 255, 255], [129, 50, 70]],
-              #'orange': [[24, 255, 255], [10, 50, 70]],
-              'gray': [[180, 18, 230], [0, 0, 40]]}
-
-    colors_result = {}
-    for color_name in color_dict_HSV:
-    
-        # for each HSV color range, getting the mask to obtain the number of pixels within each range
-        mask = cv2.inRange(hsvFrame, np.array(color_dict_HSV[color_name][1], np.uint8), np.array(color_dict_HSV[color_name][0], np.uint8))
-        pixels_inrange = np.sum(mask==255)
-        colors_result[color_name] = pixels_inrange
-    
-    # getting most probable color
-    #print(colors_result)
-    most_probable_color = max(colors_result, key=colors_result.get)    
-    
-    # handling red1-red2
-    if most_probable_color == 'red1' or most_probable_color == 'red2':
-        most_probable_color = 'red'
-    
-    #print(most_probable_color)
-    return most_probable_color
-
-def postprocess_yolo_results(cameraId, yoloResults, showLabels=True, showConf=True):
+def postprocess_yolo_results(cameraId, yoloResults, showLabels=True, showConf=True, headless=False, appearance=False):
     
+    # detections of the camera (see detection_cache.DETECTION_DTYPE): boxes, track ids, COCO class ids, color codes, normalized areas
+    # and appearance descriptors (only for the re-identification, zeros otherwise)
+    frame = None
+    detections = []
     if yoloResults:
 
-        # CCS data for camera
-        objects = []                       
-
-        # plot results to obtain objects boxes and so on
-        frame = yoloResults[0].plot(labels=showLabels, conf=showConf)
+        # plot results to obtain objects boxes and so on (headless: no plot, colors from the original frame)
+        if headless:
+            frame = yoloResults[0].orig_img
+        else:
+            frame = yoloResults[0].plot(labels=showLabels, conf=showConf)
 
         for r in yoloResults:
             boxes = r.boxes.cpu().numpy()
             if boxes and boxes.id is not None:
-                i = 0
-                for id in boxes.id:
-                
-                    # Step 1: extracting the color each detected object
-                    
-                    # getting the corner points of the detected object
-                    r = boxes.xyxy[i].astype(int)
-                    
-                    # building sub image of the detected object, from the original frame
-                    subImage = frame[r[1]:r[3], r[0]:r[2]]
-                    
-                    # only debugging => saving this img to disk
-                    #cv2.imwrite(f'_test/{i}.png', subImage)
-                    
-                    # finally getting the most probable color of each object
-                    itemColor = calculate_color(subImage)
             
-                    # using normalize xywhn to obtain relative area within image
-                    catName = coco_class_to_string(boxes.cls[i])
-                    n_size = calculate_area(boxes.xywhn[i])
-                    print(f"[CAM{cameraId}] Object id {int(id)} is a {catName} with color={itemColor} and n_area={n_size}")
-                    
-                    # appending object to CCS structure
-                    objects.append(Actor(id=int(id), type=catName, color=itemColor, size=n_size ))
-                    
-                    i+=1
+                # using normalize xywhn to obtain relative area within image (for all the boxes at once)
+                boxDetections = np.zeros(len(boxes.id), dtype=DETECTION_DTYPE)
+                boxDetections['x1'], boxDetections['y1'], boxDetections['x2'], boxDetections['y2'] = boxes.xyxy.T
+                boxDetections['id'] = boxes.id.astype(np.int64)
+                boxDetections['cls'] = boxes.cls.astype(np.int64)
+                boxDetections['area'] = np.round(boxes.xywhn[:, 2].astype(np.float64) * boxes.xywhn[:, 3], 6)
+                if appearance:
+                    boxDetections['descriptor'] = descriptors(r.orig_img, boxes.xyxy)
+                
+                # Step 1: extracting the color each detected object (from the frame labeled once, see color_engine)
+                itemColors = calculate_colors(frame, boxes.xyxy.astype(int))
+                boxDetections['color'] = [color_code(itemColor) for itemColor in itemColors]
+                if not headless:
+                    for detection, itemColor in zip(boxDetections, itemColors):
+                        print(f"[CAM{cameraId}] Object id {detection['id']} is a {coco_class_to_string(detection['cls'])} with color={itemColor} and n_area={detection['area']}")
+                
+                detections.append(boxDetections)
             
             #print("IDS " + str(boxes.id))
             #print("Classes " + str(boxes.cls))
             #print(boxes.cls)
     
-        # updating CCS for camera 1
-        ccs.updateCamera(groupId=1, cameraId=cameraId, objects=objects)
-    return frame
+    return frame, np.concatenate(detections) if detections else np.zeros(0, dtype=DETECTION_DTYPE)
 
-numbers = re.compile(r'(\d+)')
-def numericalSort(value):
-    parts = numbers.split(value)
-    parts[1::2] = map(int, parts[1::2])
-    return parts
+def update_ccs(ccs, cameraId, detections, calibration=None, appearance=False):
+    
+    # updating CCS for camera (batch ingestion, no object per detection), with the world positions of the boxes if calibrated
+    # and the appearance descriptors for the re-identification
+    if len(detections):
+        boxes = np.stack([detections['x1'], detections['y1'], detections['x2'], detections['y2']], axis=1)
+        world = calibration.box_ground_points(boxes) if calibration is not None else None
+        ccs.updateCameraBatch(groupId=1, cameraId=cameraId, ids=detections['id'], classIds=detections['cls'].astype(np.int64), colorCodes=detections['color'].astype(np.int64), areas=detections['area'], boxes=boxes,
+                              descriptors=detections['descriptor'] if appearance else None, world=world)
+    else:
+        ccs.updateCamera(groupId=1, cameraId=cameraId)
+
+def draw_detections(frame, detections):
+    
+    # boxes of cached detections over the original frame (instead of the YOLO plot)
+    for detection in detections:
+        cv2.rectangle(frame, (int(detection['x1']), int(detection['y1'])), (int(detection['x2']), int(detection['y2'])), (0, 255, 0), 2)
+    return frame
 
 path_to_files = './test_yolo_multicamera/1'
 path_to_second = './test_yolo_multicamera/2'
 path_to_third = './test_yolo_multicamera/3'
-files = sorted(glob.glob(f"{path_to_files}/*.png"), key=numericalSort)
-if files:
 
-    # integrating CCS (Central Camera System) as the central unit
-    ccs = CentralCameraSystem()
+def render(ccs, postprocessed_frames):
+    
+    # building visualization (2 or 3 columns) depending on the feed
+    horizontal_stack = np.hstack(postprocessed_frames)
+    bottom_image = np.zeros((200, horizontal_stack.shape[1], 3), dtype=np.uint8)
+    
+    # CCS text: items by camera (from the snapshot of the step, rendered once)
+    snapshot = ccs.snapshot()
+    group = snapshot.groups[1]
+    bottom_image = cv2.putText(bottom_image, f"Step: {snapshot.n_step}", (10, 15), cv2.FONT_HERSHEY_SIMPLEX, 0.3, (255, 255, 255), 1, cv2.LINE_AA)
+    bottom_image = cv2.putText(bottom_image, f"CAM1 ({len(group.cameras[1].actors)}) " + snapshot.cameraText(1, 1), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
+    bottom_image = cv2.putText(bottom_image, f"CAM2 ({len(group.cameras[2].actors)}) " + snapshot.cameraText(1, 2), (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
+    bottom_image = cv2.putText(bottom_image, f"CAM3 ({len(group.cameras[3].actors)}) " + snapshot.cameraText(1, 3), (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
+    
+    # CCS text: common stuff
+    cv2.putText(bottom_image, "----------------", (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
+    cv2.putText(bottom_image, f"COMMON ({len(group.common)})", (10, 95), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
+    
+    label_y = 110
+    for line in snapshot.commonLines(1):
+        cv2.putText(bottom_image, line, (10, label_y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
+        label_y += 15
+   
+    # Dangers if any
+    danger_y = 95
+    if group.dangers:
+        
+        cv2.putText(bottom_image, f"DANGERS ({len(group.dangers)})", (640, danger_y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1, cv2.LINE_AA)
+        danger_y += 15
+        
+        for line in snapshot.dangerLines(1):
+            cv2.putText(bottom_image, line, (640, danger_y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1, cv2.LINE_AA)
+            danger_y += 15
+        
+    # final ui stack
+    return np.vstack((horizontal_stack, bottom_image))
+
+def parse_video_source(value):
+    
+    # "1=cam1.mp4" => (1, 'cam1.mp4'), "2=0" => (2, 0) (device index)
+    cameraId, source = value.split('=', 1)
+    return int(cameraId), int(source) if source.isdigit() else source
+
+def detect_frame_sets(inputs, detector, cache, headless, scheduler=None, appearance=False):
+    
+    # postprocessed frame and detections of each camera at every step (see postprocess_yolo_results)
+    for frameNumber, frames in inputs:
+        
+        # cached detections of each camera (if any), and frames to detect (only the cameras due, with a scheduler)
+        cached = {}
+        keys = {}
+        toDetect = frames
+        if scheduler is not None:
+            toDetect = {cameraId: frame for cameraId, frame in frames.items() if scheduler.due(cameraId)}
+        elif cache is not None:
+            toDetect = {}
+            for cameraId, frame in frames.items():
+                keys[cameraId], cached[cameraId] = cache.lookup(cameraId, frame.digest)
+                if cached[cameraId] is None:
+                    toDetect[cameraId] = decode(frame)
+        
+        # detecting and tracking the objects of all the cameras (not cached) in a single batch
+        results = detector.track(toDetect)
+        
+        # postprocessing the frame of each camera
+        outputs = {}
+        for cameraId in frames:
+            if cameraId in toDetect:
+                postprocessed_frame, detections = postprocess_yolo_results(cameraId=cameraId, yoloResults=results.get(cameraId), showLabels=show_labels, showConf=show_conf, headless=headless, appearance=appearance)
+                if cache is not None:
+                    cache.put(keys[cameraId], detections)
+                if scheduler is not None:
+                    scheduler.observe(cameraId, detections)
+            elif scheduler is not None:
+                detections = scheduler.propagate(cameraId)
+                postprocessed_frame = None if headless else draw_detections(frames[cameraId], detections)
+            else:
+                detections = cached[cameraId]
+                postprocessed_frame = None if headless else draw_detections(decode(frames[cameraId]), detections)
+            outputs[cameraId] = (postprocessed_frame, detections)
+        yield frameNumber, outputs
+
+def main():
+    argparser = argparse.ArgumentParser(description='Hazard identification over the frames of the intersection cameras')
+    argparser.add_argument('--headless', action='store_true', help='no plotting, UI nor pauses: common objects and dangers are written as JSON lines')
+    argparser.add_argument('--events', default='-', help='headless: file to write the JSONL events to (default: stdout)')
+    argparser.add_argument('--cache', default=None, help='directory of the detection cache (default: no cache)')
+    argparser.add_argument('--camera-workers', action='store_true', help='decode, detect, track and extract colors in a worker process per camera')
+    argparser.add_argument('--video', action='append', default=[], metavar='CAMERA=SOURCE', help='read a camera from a video file or stream (e.g. 1=cam1.mp4), instead of the frame directories')
+    argparser.add_argument('--policy', choices=POLICIES, default='block', help='video: what to do when a camera buffer is full (default: block)')
+    argparser.add_argument('--buffer', type=int, default=4, help='video: frames buffered per camera (default: 4)')
+    argparser.add_argument('--realtime', action='store_true', help='video: read the files at their frame rate, as live sources')
+    argparser.add_argument('--profiles', default=None, help='JSON file of the region of interest and inference size of each camera (e.g. camera_profiles.json, default: full frames at 640)')
+    argparser.add_argument('--adaptive', type=int, default=0, metavar='N', help='detect every camera at most every N frames, propagating its tracks in between (default: 0, every frame)')
+    argparser.add_argument('--reid', type=float, nargs='?', const=0.8, default=None, metavar='THRESHOLD', help='match the objects of the cameras by appearance (default threshold: 0.8), instead of by type and color')
+    argparser.add_argument('--spatial', type=float, nargs='?', const=2.0, default=None, metavar='RADIUS', help='match the objects of the cameras by their position on the ground (default radius: 2.0 m), instead of by type and color')
+    argparser.add_argument('--ttc', type=float, nargs='?', const=0.3, default=None, metavar='THRESHOLD', help='dangers scored by time to collision of every vehicle and person on the ground (default threshold: 0.3), instead of the danger rules')
+    argparser.add_argument('--tolerance', type=int, default=0, help='maximum difference of frame numbers between the frames of a step (default: 0)')
+    argparser.add_argument('--workers', type=int, default=4, help='threads decoding the frames (default: 4)')
+    argparser.add_argument('--prefetch', type=int, default=8, help='frame sets decoded ahead of the inference (default: 8)')
+    args = argparser.parse_args()
+    profiles = load_profiles(args.profiles) if args.profiles else {}
+    if args.camera_workers and args.cache:
+        argparser.error('--cache is not supported with --camera-workers')
+    if args.video and args.cache:
+        argparser.error('--cache is not supported with --video')
+    if args.reid is not None and args.spatial is not None:
+        argparser.error('--reid and --spatial are alternative matchers')
+    if args.adaptive and (args.cache or args.camera_workers):
+        argparser.error('--adaptive is not supported with --cache nor --camera-workers')
+
+    # frame sets of the step: from video sources (see video_source.py), or frames of the first camera with the nearest
+    # frame of the second one (required) and of the third one (if any), within the tolerance in frame numbers
+    video = None
+    if args.video:
+        video = VideoSource(dict(parse_video_source(value) for value in args.video), buffer=args.buffer, policy=args.policy, realtime=args.realtime)
+        inputs = video.frame_sets()
+    else:
+        index = FrameIndex.scan({1: path_to_files, 2: path_to_second, 3: path_to_third})
+        join = index.join(reference=1, tolerance=args.tolerance, optional=(3,))
+        if not join.matched:
+            return
+        inputs = join.matched
+    
+    tracker = OfflineEmissionsTracker(country_iso_code="ESP")
+    tracker.start()
+
+    # integrating CCS (Central Camera System) as the central unit (movement of the actors from Kalman filtered tracklets,
+    # recent trajectories of the actors, cross-camera matching by appearance with --reid or by position with --spatial,
+    # and dangers by time to collision with --ttc)
+    matcher = None
+    if args.reid is not None:
+        matcher = ReidMatcher(args.reid)
+    elif args.spatial is not None:
+        matcher = SpatialMatcher(args.spatial)
+    rules = HazardScorer(args.ttc, stepSeconds=step_seconds) if args.ttc is not None else DangerRuleEngine.load(danger_rules_file)
+    ccs = CentralCameraSystem(rules=rules, tracklets=True, matcher=matcher, history=trajectory_depth)
     
     # creating 3 cameras within the same group
-    ccs.updateCamera(groupId=1, cameraId=1)
-    ccs.updateCamera(groupId=1, cameraId=2)
-    ccs.updateCamera(groupId=1, cameraId=3)
+    ccs.updateCamera(groupId=1, cameraId=1, ttl=camera_ttl[1])
+    ccs.updateCamera(groupId=1, cameraId=2, ttl=camera_ttl[2])
+    ccs.updateCamera(groupId=1, cameraId=3, ttl=camera_ttl[3])
 
-    print(f"{len(files)} files in directory")
-    for img in files:
+    # headless: events stream (one JSON object per line) instead of the UI
+    events = None
+    previous = None
+    if args.headless:
+        events = sys.stdout if args.events == '-' else open(args.events, 'w')
+    elif video is None:
+        print(f"{len(index.cameras[1][0])} files in directory")
+    if video is None:
+        print(join_report(join), file=sys.stderr if args.headless else sys.stdout)
+        
+    # detections of every frame set: in this process (frames read ahead by a loader, see frame_loader.py), or in a
+    # worker process per camera (see camera_workers.py)
+    cache = None
+    loader = None
+    workers = None
+    scheduler = None
+    if args.camera_workers:
+        frameShape = max((stream.shape for stream in video.streams.values()), key=lambda shape: shape[0] * shape[1]) if video is not None else (480, 640, 3)
+        workers = CameraWorkers(video.streams.keys() if video is not None else [1, 2, 3], {'weights': weights, 'conf': conf, 'classes': classes, 'profiles': profiles},
+                                headless=args.headless, showLabels=show_labels, showConf=show_conf, frameShape=frameShape, appearance=args.reid is not None)
+        frameSets = workers.process(inputs)
+    else:
+        
+        # load a single yolov8 model for all the cameras (one tracker per camera, see detector.py)
+        detector = Detector(weights, conf=conf, classes=classes, profiles=profiles)
+        
+        # cache of the detections of every camera frame (frames are only decoded if not cached, see detection_cache.py)
+        if args.cache:
+            cache = DetectionCache(args.cache, {'weights': file_digest(weights), 'conf': conf, 'classes': classes, 'tracker': vars(detector.trackerConfig),
+                                                'frameRate': detector.frameRate, 'descriptor': DESCRIPTOR_SIZE if args.reid is not None else 0, 'profiles': {cameraId: profile.settings() for cameraId, profile in profiles.items()},
+                                                'colors': 'original' if args.headless else ('plot', show_labels, show_conf)})
         
-        fileName = Path(img).name
+        # frames of all the cameras read ahead of the inference (video sources are read by their own threads)
+        if video is None:
+            loader = FrameLoader(inputs, workers=args.workers, depth=args.prefetch, read=read_encoded if cache is not None else cv2.imread)
+            inputs = loader
         
-        # looking for frame in second camera
-        secondCameraFile = f"{path_to_second}/{fileName}"
-        if (os.path.isfile(secondCameraFile)):
+        # adaptive cadence of the detections of each camera (see detection_scheduler.py)
+        if args.adaptive:
+            scheduler = DetectionScheduler(maxInterval=args.adaptive)
+        frameSets = detect_frame_sets(inputs, detector, cache, args.headless, scheduler, appearance=args.reid is not None)
         
-            # same frame exist in both cameras => we can continue
+    for frameNumber, outputs in frameSets:
+        
+        # pacing of the UI (and debugging pauses)
+        if not args.headless:
             time.sleep(0.1)
             
             if ccs.n_step == 8 or ccs.n_step == 29 or ccs.n_step == 33:
                 cv2.waitKey(0)
+        
+        # cameras whose tracker restarted after cached frames (see detection_cache.py) start again with no actors
+        if cache is not None:
+            for cameraId in cache.restarted():
+                ccs.resetCamera(groupId=1, cameraId=cameraId)
+        
+        # updating the CCS with the detections of each camera, in camera order
+        postprocessed_frames = []
+        for cameraId in sorted(outputs):
+            postprocessed_frame, detections = outputs[cameraId]
+            update_ccs(ccs, cameraId, detections, calibrations.get(cameraId), appearance=args.reid is not None)
+            postprocessed_frames.append(postprocessed_frame)
+        
+        # stepping in CCS
+        ccs.step()
+        
+        # analyze dangers
+        ccs.identify_dangers()
+        
+        # cameras of the rules close to firing are detected at every frame
+        if scheduler is not None:
+            scheduler.alert(ccs.rules.armed(1, ccs.data[1]))
+        
+        if args.headless:
             
-            # first camera
-            frame1 = cv2.imread(img)                    
-            results1 = model.track(frame1, persist=True, conf=conf, classes=classes)
-            
-            # second camera
-            frame2 = cv2.imread(secondCameraFile)                    
-            results2 = model2.track(frame2, persist=True, conf=conf, classes=classes)
-            
-            # third camera (if exists)
-            frame3 = None
-            results3 = None            
-            thirdCameraFile = f"{path_to_third}/{fileName}"
-            if (os.path.isfile(thirdCameraFile)):
-                frame3 = cv2.imread(thirdCameraFile)
-                results3 = model3.track(frame3, persist=True, conf=conf, classes=classes)
-            
-            # processing frame 1
-            postprocessed_frame1 = postprocess_yolo_results(cameraId=1, yoloResults=results1, showLabels=show_labels, showConf=show_conf)
-            
-            # postprocessing frame 2
-            postprocessed_frame2 = postprocess_yolo_results(cameraId=2, yoloResults=results2, showLabels=show_labels, showConf=show_conf)
-            
-            # postprocessing frame 3 (if camera3)
-            if results3:
-                postprocessed_frame3 = postprocess_yolo_results(cameraId=3, yoloResults=results3, showLabels=show_labels, showConf=show_conf)
-            
-            # stepping in CCS
-            ccs.step()
-            
-            # analyze dangers
-            ccs.identify_dangers()
-            
-            # VISUALIZATION
-            
-            # building visualization (2 or 3 columns) depending on the feed
-            if results3:
-                horizontal_stack = np.hstack((postprocessed_frame1, postprocessed_frame2, postprocessed_frame3 ))
-                bottom_image = np.zeros((200, 1920, 3), dtype=np.uint8)   
-            else:
-                horizontal_stack = np.hstack((postprocessed_frame1, postprocessed_frame2, ))
-                bottom_image = np.zeros((200, 1280, 3), dtype=np.uint8)   
-            
-            # CCS text: items by camera
-            bottom_image = cv2.putText(bottom_image, f"Step: {ccs.n_step}", (10, 15), cv2.FONT_HERSHEY_SIMPLEX, 0.3, (255, 255, 255), 1, cv2.LINE_AA)
-            bottom_image = cv2.putText(bottom_image, f"CAM1 ({len(ccs.data[1].cameras[1].actors)}) " + ccs.data[1].cameras[1].plot(), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
-            bottom_image = cv2.putText(bottom_image, f"CAM2 ({len(ccs.data[1].cameras[2].actors)}) " + ccs.data[1].cameras[2].plot(), (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
-            bottom_image = cv2.putText(bottom_image, f"CAM3 ({len(ccs.data[1].cameras[3].actors)}) " + ccs.data[1].cameras[3].plot(), (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
-            
-            # CCS text: common stuff
-            cv2.putText(bottom_image, "----------------", (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
-            cv2.putText(bottom_image, f"COMMON ({len(ccs.data[1].common)})", (10, 95), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
-            #ccsText = f"COMMON ({len(ccs.data[1].common)}) " + json.dumps(ccs.data[1].common, default=lambda __o: __o.__dict__)
-            
-            label_y = 110
-            if len(ccs.data[1].common) > 0:
-                            
-                for commonObj in ccs.data[1].common:
-                    #cv2.putText(bottom_image, json.dumps(commonObj, default=lambda __o: __o.__dict__), (10, label_y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
-                    cv2.putText(bottom_image, commonObj.plotCommon(), (10, label_y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
-                    label_y += 15
-           
-            # Dangers if any
-            danger_y = 95
-            if ccs.data[1].dangers and len(ccs.data[1].dangers) > 0:
-                
-                cv2.putText(bottom_image, f"DANGERS ({len(ccs.data[1].dangers)})", (640, danger_y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1, cv2.LINE_AA)
-                danger_y += 15
-                
-                for danger in ccs.data[1].dangers:
-                    cv2.putText(bottom_image, danger, (640, danger_y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1, cv2.LINE_AA)
-                    danger_y += 15
-                
-            # final ui stack
-            vertical_stack = np.vstack((horizontal_stack, bottom_image))            
-            cv2.imshow('Intersection cameras', vertical_stack)
-            
-            if cv2.waitKey(25) & 0xFF == ord('q'):
-                break        
-                
-tracker.stop()
\ No newline at end of file
+            # changes of the common objects and dangers since the previous step
+            snapshot = ccs.snapshot()
+            for event in snapshot_events(previous, snapshot):
+                events.write(json.dumps(event) + "\n")
+            events.flush()
+            previous = snapshot
+            continue
+        
+        # VISUALIZATION
+        cv2.imshow('Intersection cameras', render(ccs, postprocessed_frames))
+        
+        if cv2.waitKey(25) & 0xFF == ord('q'):
+            break        
+
+    # releasing the frames (views of the shared memory of the camera workers) before closing
+    frameSets.close()
+    postprocessed_frames = postprocessed_frame = outputs = None
+    if workers is not None:
+        workers.close()
+    if loader is not None:
+        loader.close()
+        print(f"{loader.loaded} frame sets loaded, {loader.stalls} stalls waiting for frames ({loader.stall_time:.3f} s)", file=sys.stderr if args.headless else sys.stdout)
+    if video is not None:
+        video.close()
+        for cameraId, stats in video.stats().items():
+            print(f"CAM{cameraId}: {stats['captured']} frames captured, {stats['dropped']} dropped, max lag {stats['max_lag']:.3f} s", file=sys.stderr if args.headless else sys.stdout)
+    if scheduler is not None:
+        print(f"adaptive cadence: {scheduler.skipped} of {scheduler.inferred + scheduler.skipped} camera frames without inference ({100 * scheduler.skipped_fraction:.1f}%)", file=sys.stderr if args.headless else sys.stdout)
+    if cache is not None:
+        print(f"detection cache: {cache.hits} hits, {cache.misses} misses", file=sys.stderr if args.headless else sys.stdout)
+    
+    if events is not None and events is not sys.stdout:
+        events.close()
+    tracker.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+from collections import namedtuple
+
+import numpy as np
+
+# types of the two sides of a conflict
+VEHICLE_TYPES = ('car', 'truck', 'bus', 'motorcycle', 'bicycle')
+PERSON_TYPES = ('person',)
+
+# object of a group scored by HazardScorer: a common object (key: common id) or a track seen by a single camera and
+# not matched (key: (cameraId, actorId)), with its type and its member tracks (cameraId => actorId)
+ScoredObject = namedtuple('ScoredObject', ['key', 'type', 'members'])
+
+def object_label(key):
+    if isinstance(key, tuple):
+        return f"CAM{key[0]} id {key[1]}"
+    return f"CommonId {key}"
+
+class ScoredDanger(namedtuple('ScoredDanger', ['rule', 'subject', 'other', 'template', 'score', 'ttc', 'distance'])):
+    """
+    Danger between a vehicle and a person of a group, scored by its kinematics (see HazardScorer); same fields as
+    danger_rules.Danger, so that it can be shown, exported and diffed in the same way.
+
+    Attributes
+    ----------
+    rule : str
+        name of the scorer
+    subject : int or (int, int)
+        common id of the vehicle, or (cameraId, actorId) if it is only seen by a single camera
+    other : int or (int, int)
+        common id of the person, or (cameraId, actorId) if it is only seen by a single camera
+    template : str
+        message template, with the {rule}, {subject}, {other}, {score}, {ttc} and {distance} fields (objects as
+        "CommonId 3" or "CAM1 id 7")
+    score : float
+        urgency of the conflict, from 0 (none) to 1 (collision now)
+    ttc : float
+        seconds until the closest approach of the vehicle and the person (0 if they are getting away)
+    distance : float
+        minimum separation (meters) at the closest approach
+    """
+    __slots__ = ()
+
+    @property
+    def message(self):
+        return self.template.format(rule=self.rule, subject=object_label(self.subject), other=object_label(self.other), score=self.score, ttc=self.ttc, distance=self.distance)
+
+    def __str__(self):
+        return self.message
+
+def fit_motion(steps, positions):
+    """
+    Position and velocity (per step) of every trajectory, by least squares over its valid samples: steps (n x k, -1 if
+    empty) and world positions (n x k x 2, NaN if unknown). Returns the position at the last valid step, the velocity
+    (zero with a single sample) and that last step; NaN positions for the trajectories without valid samples.
+    """
+    valid = (steps >= 0) & np.isfinite(positions).all(axis=2)
+    weights = valid.astype(np.float64)
+    counts = weights.sum(axis=1)
+    t = np.where(valid, steps, 0).astype(np.float64)
+    p = np.where(valid[:, :, None], positions, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tMean = (weights * t).sum(axis=1) / counts
+        pMean = (weights[:, :, None] * p).sum(axis=1) / counts[:, None]
+        dt = np.where(valid, t - tMean[:, None], 0.0)
+        variance = (dt * dt).sum(axis=1)
+        velocity = (dt[:, :, None] * (p - pMean[:, None, :])).sum(axis=1) / variance[:, None]
+    velocity[~(variance > 0)] = 0.0
+    last = np.where(valid, steps, -1).max(axis=1)
+    position = pMean + velocity * (last - tMean)[:, None]
+    return position, velocity, last
+
+def closest_approach(vehiclePositions, vehicleVelocities, personPositions, personVelocities):
+    """
+    Time (in the units of the velocities, at least 0) and separation of the closest approach of every vehicle and
+    every person moving at constant velocity: n vehicles x m persons, in a single broadcast.
+    """
+    relativePosition = vehiclePositions[:, None, :] - personPositions[None, :, :]
+    relativeVelocity = vehicleVelocities[:, None, :] - personVelocities[None, :, :]
+    speed = (relativeVelocity * relativeVelocity).sum(axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        time = -(relativePosition * relativeVelocity).sum(axis=2) / speed
+    time = np.where(speed > 0, np.maximum(time, 0.0), 0.0)
+    separation = np.linalg.norm(relativePosition + relativeVelocity * time[:, :, None], axis=2)
+    return time, separation
+
+class HazardScorer():
+    """
+    Danger identification by time to collision, instead of the camera rules (see danger_rules.DangerRuleEngine, with
+    the same evaluate and armed interface): every vehicle and person of a group, either a common object or a track of a
+    single camera not matched (e.g. a vehicle only seen by CAM3 and a person only seen by CAM1), is located and given a
+    velocity from the recent world positions of its tracks (trajectory stores of the cameras, see trajectory.py and
+    calibration.py), and all the vehicle x person pairs are scored at once by their closest approach:
+
+        score = max(0, 1 - distance / safeDistance) * max(0, 1 - ttc / horizon)
+
+    Group dangers are the pairs scored over the threshold, the most urgent first. Objects without world positions are
+    never scored. Positions change every step, so dangers are evaluated at every step (kinematic).
+
+    Attributes
+    ----------
+    threshold : float
+        minimum score of a danger
+    safeDistance : float
+        separation (meters) at the closest approach from which a pair is not a conflict
+    horizon : float
+        seconds ahead from which a closest approach is not a conflict
+    stepSeconds : float
+        seconds per step (1 / frame rate of the cameras)
+    window : int
+        last observations of every member used for its motion
+    """
+    kinematic = True
+
+    def __init__(self, threshold=0.3, safeDistance=3.0, horizon=5.0, stepSeconds=0.1, window=8, name='time-to-collision',
+                 message="DANGER ({score:.2f}): {subject} and {other}, {distance:.1f} m apart in {ttc:.1f} s"):
+        self.threshold = threshold
+        self.safeDistance = safeDistance
+        self.horizon = horizon
+        self.stepSeconds = stepSeconds
+        self.window = window
+        self.name = name
+        self.message = message
+        self.__armed = {}
+
+    @staticmethod
+    def objects(group):
+        """
+        Objects of a group (ScoredObject): its common objects (with any member track alive) and the free tracks of its cameras.
+        """
+        objects = [ScoredObject(commonObj.id, commonObj.type, commonObj.commonCamerasIds) for commonObj in group.commonObjects.values()]
+        for cameraId, camera in group.cameras.items():
+            objects.extend(ScoredObject((cameraId, actorId), actor.type, {cameraId: actorId}) for actorId, actor in camera.actors.items()
+                           if (cameraId, actorId) not in group.members)
+        return objects
+
+    def motion(self, group, objects):
+        """
+        Position and velocity (meters per second) of the objects, averaged over their tracks with positions.
+        """
+        positions = np.zeros((len(objects), 2))
+        velocities = np.zeros((len(objects), 2))
+        counts = np.zeros(len(objects))
+        byCamera = {}
+        for i, obj in enumerate(objects):
+            for cameraId, actorId in obj.members.items():
+                byCamera.setdefault(cameraId, ([], []))
+                byCamera[cameraId][0].append(i)
+                byCamera[cameraId][1].append(actorId)
+
+        # trajectories of the tracks gathered by camera (one call per camera), fitted at once
+        for cameraId, (indices, actorIds) in byCamera.items():
+            trajectories = group.cameras[cameraId].trajectories
+            if trajectories is None:
+                continue
+            _, steps = trajectories.last(self.window, 'steps', actorIds)
+            _, world = trajectories.last(self.window, 'world', actorIds)
+            position, velocity, _ = fit_motion(steps, world)
+            located = np.isfinite(position).all(axis=1)
+            indices = np.asarray(indices)[located]
+            np.add.at(positions, indices, position[located])
+            np.add.at(velocities, indices, velocity[located])
+            np.add.at(counts, indices, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return positions / counts[:, None], velocities / counts[:, None] / self.stepSeconds
+
+    def score(self, group):
+        """
+        Vehicles, persons (ScoredObject), and the score, time to closest approach and separation of every pair.
+        """
+        objects = self.objects(group)
+        vehicles = [obj for obj in objects if obj.type in VEHICLE_TYPES]
+        persons = [obj for obj in objects if obj.type in PERSON_TYPES]
+        if not vehicles or not persons:
+            empty = np.zeros((len(vehicles), len(persons)))
+            return vehicles, persons, empty, empty, empty
+        positions, velocities = self.motion(group, vehicles + persons)
+        ttc, distance = closest_approach(positions[:len(vehicles)], velocities[:len(vehicles)], positions[len(vehicles):], velocities[len(vehicles):])
+        score = np.clip(1 - distance / self.safeDistance, 0, 1) * np.clip(1 - ttc / self.horizon, 0, 1)
+        return vehicles, persons, np.nan_to_num(score, nan=0.0), ttc, distance
+
+    def evaluate(self, groupId, group):
+        vehicles, persons, score, ttc, distance = self.score(group)
+
+        # cameras of the pairs close to the threshold (see armed)
+        close = np.argwhere(score >= self.threshold / 2)
+        self.__armed[groupId] = {cameraId for v, p in close.tolist() for obj in (vehicles[v], persons[p]) for cameraId in obj.members}
+
+        dangers = []
+        rows, columns = np.nonzero(score >= self.threshold)
+        for v, p in sorted(zip(rows.tolist(), columns.tolist()), key=lambda pair: -score[pair]):
+            dangers.append(ScoredDanger(self.name, vehicles[v].key, persons[p].key, self.message, round(float(score[v, p]), 3),
+                                        round(float(ttc[v, p]), 2), round(float(distance[v, p]), 2)))
+        return dangers
+
+    def armed(self, groupId, group):
+        """
+        Cameras of the pairs of the last evaluation of a group scored over half the threshold (close to be dangers).
+        """
+        return self.__armed.get(groupId, set())
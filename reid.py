@@ -0,0 +1,149 @@
+import cv2
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+# appearance descriptor of a track: hue x saturation histogram of the center of its box (see descriptors)
+HUE_BINS = 8
+SATURATION_BINS = 4
+DESCRIPTOR_SIZE = HUE_BINS * SATURATION_BINS
+
+# weight of the previous descriptor of a track when it is seen again (see blend)
+DESCRIPTOR_MOMENTUM = 0.7
+
+# part of the box kept on each side for the histogram (the borders are mostly background)
+BOX_MARGIN = 0.15
+
+def descriptors(frame, boxes):
+    """
+    Appearance descriptors (n x DESCRIPTOR_SIZE, float32) of the boxes (x1, y1, x2, y2) of a BGR frame: square roots
+    of the normalized hue x saturation histograms of their crops, with unit norm (the dot product of two descriptors
+    is their Bhattacharyya coefficient). Empty boxes get a zero descriptor (never matched).
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    result = np.zeros((len(boxes), DESCRIPTOR_SIZE), dtype=np.float32)
+    if not len(boxes):
+        return result
+    height, width = frame.shape[:2]
+    marginX = (boxes[:, 2] - boxes[:, 0]) * BOX_MARGIN
+    marginY = (boxes[:, 3] - boxes[:, 1]) * BOX_MARGIN
+    crops = np.stack([boxes[:, 0] + marginX, boxes[:, 1] + marginY, boxes[:, 2] - marginX, boxes[:, 3] - marginY], axis=1)
+    crops = np.clip(np.round(crops), 0, [width, height, width, height]).astype(int)
+    for i, (x1, y1, x2, y2) in enumerate(crops.tolist()):
+        if x2 > x1 and y2 > y1:
+            hsv = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2HSV)
+            result[i] = cv2.calcHist([hsv], [0, 1], None, [HUE_BINS, SATURATION_BINS], [0, 180, 0, 256]).ravel()
+    np.sqrt(result / np.maximum(result.sum(axis=1, keepdims=True), 1), out=result)
+    return result
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+def blend(previous, current):
+
+    # running descriptor of tracks seen again (robust to a single occluded or badly cropped box)
+    return normalize(DESCRIPTOR_MOMENTUM * previous + (1 - DESCRIPTOR_MOMENTUM) * current)
+
+def assign(similarity, threshold):
+    """
+    Pairs (row, column) of maximum total similarity, one per row and column, with a similarity of at least threshold:
+    optimal assignment (Hungarian, scipy) if available, greedy by decreasing similarity otherwise. Pairs under the
+    threshold (e.g. of different types) count as zero for the optimal assignment, so that it never gives up a pair over
+    the threshold for pairs that are dropped afterwards.
+    """
+    if not similarity.size:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    if linear_sum_assignment is not None:
+        rows, columns = linear_sum_assignment(-np.where(similarity >= threshold, similarity, 0))
+    else:
+        order = np.argsort(-similarity, axis=None, kind='stable')
+        order = order[similarity.ravel()[order] >= threshold]
+        usedRows, usedColumns = set(), set()
+        rows, columns = [], []
+        for row, column in zip(*np.unravel_index(order, similarity.shape)):
+            if row not in usedRows and column not in usedColumns:
+                usedRows.add(row)
+                usedColumns.add(column)
+                rows.append(row)
+                columns.append(column)
+        rows, columns = np.array(rows, dtype=int), np.array(columns, dtype=int)
+    accepted = similarity[rows, columns] >= threshold
+    return rows[accepted], columns[accepted]
+
+class ReidMatcher():
+    """
+    Cross-camera matcher of the CCS (see CentralCameraSystem(matcher=...)) by appearance, instead of equal type and
+    color (and any person with any other person).
+
+    At every step of a group with changes, the free tracks (not part of a common object) of each camera are matched
+    at once against the common objects not seen by that camera (mean descriptor of their members) and the free tracks
+    of the other cameras: one similarity matrix (dot products of the descriptors, only between the same types) solved
+    as an optimal assignment, keeping the pairs over the threshold.
+
+    Attributes
+    ----------
+    threshold : float
+        minimum similarity (Bhattacharyya coefficient of the descriptors) of two tracks of the same object
+    """
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+
+    def match(self, group):
+
+        # imported here: ccs imports this module
+        from ccs import Actor
+
+        for cameraId, camera in group.cameras.items():
+            queries = [actorId for actorId in camera.actors.keys() if (cameraId, actorId) not in group.members]
+            if not queries:
+                continue
+
+            # step 1: candidates, the common objects not seen by this camera and the free tracks of the other cameras
+            commonIds = [commonId for commonId, commonObj in group.commonObjects.items() if cameraId not in commonObj.commonCamerasIds]
+            free = [(otherId, actorId) for otherId, other in group.cameras.items() if otherId != cameraId
+                    for actorId in other.actors.keys() if (otherId, actorId) not in group.members]
+            if not commonIds and not free:
+                continue
+            candidates = np.zeros((len(commonIds) + len(free), DESCRIPTOR_SIZE), dtype=np.float32)
+            candidateTypes = [group.commonObjects[commonId].type for commonId in commonIds]
+
+            # member descriptors gathered by camera (one call per camera), summed by common object
+            members = {}
+            for i, commonId in enumerate(commonIds):
+                for memberCameraId, actorId in group.commonObjects[commonId].commonCamerasIds.items():
+                    members.setdefault(memberCameraId, ([], []))
+                    members[memberCameraId][0].append(i)
+                    members[memberCameraId][1].append(actorId)
+            for memberCameraId, (indices, actorIds) in members.items():
+                np.add.at(candidates, indices, group.cameras[memberCameraId].descriptors(actorIds))
+            freeByCamera = {}
+            for i, (otherId, actorId) in enumerate(free, start=len(commonIds)):
+                freeByCamera.setdefault(otherId, ([], []))
+                freeByCamera[otherId][0].append(i)
+                freeByCamera[otherId][1].append(actorId)
+                candidateTypes.append(group.cameras[otherId].actors[actorId].type)
+            for otherId, (indices, actorIds) in freeByCamera.items():
+                candidates[indices] = group.cameras[otherId].descriptors(actorIds)
+
+            # step 2: similarity matrix of the same types (other types under any threshold), and assignment
+            queryTypes = [camera.actors[actorId].type for actorId in queries]
+            similarity = camera.descriptors(queries) @ normalize(candidates).T
+            similarity[np.asarray(queryTypes)[:, None] != np.asarray(candidateTypes)[None, :]] = -1
+            rows, columns = assign(similarity, self.threshold)
+
+            # step 3: joining the common objects, or creating new ones with the free tracks
+            for row, column in zip(rows.tolist(), columns.tolist()):
+                actorId = queries[row]
+                if column < len(commonIds):
+                    group.addMember(commonIds[column], cameraId, actorId)
+                else:
+                    otherId, otherActorId = free[column - len(commonIds)]
+                    actor = camera.actors[actorId]
+                    commonId = group.getNewCommonId()
+                    group.commonObjects[commonId] = Actor(commonId, actor.type, actor.color)
+                    group.addMember(commonId, cameraId, actorId)
+                    group.addMember(commonId, otherId, otherActorId)
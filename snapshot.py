@@ -0,0 +1,131 @@
+import json
+from collections import namedtuple
+from types import MappingProxyType
+
+# immutable records of the CCS state (see CentralCameraSystem.snapshot)
+ActorSnapshot = namedtuple('ActorSnapshot', ['id', 'type', 'color', 'size', 'movement', 'last_step'])
+CommonSnapshot = namedtuple('CommonSnapshot', ['id', 'type', 'color', 'cameras'])
+CameraSnapshot = namedtuple('CameraSnapshot', ['id', 'name', 'actors'])
+GroupSnapshot = namedtuple('GroupSnapshot', ['id', 'name', 'cameras', 'common', 'dangers'])
+
+def plot_actor(actor):
+    return f"[Id={actor.id}, Type={actor.type}, Color={actor.color}, Size={actor.size}, Dir={actor.movement}, Last={actor.last_step}] - "
+
+def plot_common(common):
+    where = "".join(f"CAM{cameraId} id {actorId} " for cameraId, actorId in common.cameras)
+    return f"[CommonId={common.id}, Type={common.type}, Color={common.color}, From={where} - "
+
+def danger_dict(danger):
+
+    # scored dangers (see hazard_score.ScoredDanger) keep their score, time to collision and distance
+    result = {'rule': danger.rule, 'subject': danger.subject, 'other': danger.other, 'message': danger.message}
+    for field in ('score', 'ttc', 'distance'):
+        if hasattr(danger, field):
+            result[field] = getattr(danger, field)
+    return result
+
+def danger_order(key):
+
+    # (rule, subject, other) of a danger, sortable: objects are common ids, or (cameraId, actorId) of tracks of a single
+    # camera (see hazard_score.ScoredDanger), common ids first
+    rule, subject, other = key
+    return rule, [(isinstance(obj, tuple), obj if isinstance(obj, tuple) else (obj,)) for obj in (subject, other)]
+
+class Snapshot():
+    """
+    Immutable state of the CCS at a given step: cameras, actors, common objects and dangers of every group.
+
+    Text is only rendered when a consumer asks for it, and then kept for the other consumers of the same snapshot.
+
+    Attributes
+    ----------
+    n_step : int
+        step number of the CCS when the snapshot was taken
+    groups : {}
+        read-only dictionary of groupId, GroupSnapshot (cameras as a read-only dictionary of cameraId, CameraSnapshot,
+        common objects as a tuple of CommonSnapshot, and dangers as a tuple of danger_rules.Danger or hazard_score.ScoredDanger)
+    """
+    __slots__ = ('n_step', 'groups', '_texts')
+
+    def __init__(self, n_step, groups):
+        self.n_step = n_step
+        self.groups = MappingProxyType(groups)
+        self._texts = {}
+
+    def __rendered(self, key, render):
+        text = self._texts.get(key)
+        if text is None:
+            text = render()
+            self._texts[key] = text
+        return text
+
+    def cameraText(self, groupId, cameraId):
+
+        # actors of a camera in a readable format (same as Camera.plot)
+        return self.__rendered(('camera', groupId, cameraId), lambda: "".join(plot_actor(actor) for actor in self.groups[groupId].cameras[cameraId].actors))
+
+    def commonLines(self, groupId):
+
+        # one readable line per common object of a group (same as Actor.plotCommon)
+        return self.__rendered(('common', groupId), lambda: tuple(plot_common(common) for common in self.groups[groupId].common))
+
+    def dangerLines(self, groupId):
+        return self.__rendered(('dangers', groupId), lambda: tuple(str(danger) for danger in self.groups[groupId].dangers))
+
+    def text(self):
+
+        # full readable state of all the groups
+        def render():
+            lines = [f"Step: {self.n_step}"]
+            for groupId, group in self.groups.items():
+                lines.append(f"{group.name}")
+                for cameraId, camera in group.cameras.items():
+                    lines.append(f"CAM{cameraId} ({len(camera.actors)}) {self.cameraText(groupId, cameraId)}")
+                lines.append(f"COMMON ({len(group.common)})")
+                lines.extend(self.commonLines(groupId))
+                lines.append(f"DANGERS ({len(group.dangers)})")
+                lines.extend(self.dangerLines(groupId))
+            return "\n".join(lines)
+        return self.__rendered(('text',), render)
+
+    def to_dict(self):
+        return {
+            'step': self.n_step,
+            'groups': [{
+                'id': group.id,
+                'name': group.name,
+                'cameras': [{'id': camera.id, 'name': camera.name, 'actors': [actor._asdict() for actor in camera.actors]} for camera in group.cameras.values()],
+                'common': [{'id': common.id, 'type': common.type, 'color': common.color, 'cameras': {str(cameraId): actorId for cameraId, actorId in common.cameras}} for common in group.common],
+                'dangers': [danger_dict(danger) for danger in group.dangers],
+            } for group in self.groups.values()]
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+def snapshot_events(previous, current):
+    """
+    Events between two snapshots (previous can be None), as JSON serializable dictionaries:
+    'common' (new common object or new cameras), 'common_lost', 'danger' (new danger) and 'danger_cleared'.
+    """
+    events = []
+    for groupId, group in current.groups.items():
+        before = previous.groups.get(groupId) if previous is not None else None
+        commonBefore = {common.id: common for common in before.common} if before else {}
+        commonNow = {common.id: common for common in group.common}
+        for commonId, common in commonNow.items():
+            if commonBefore.get(commonId) != common:
+                events.append({'event': 'common', 'step': current.n_step, 'group': groupId, 'id': commonId, 'type': common.type, 'color': common.color,
+                               'cameras': {str(cameraId): actorId for cameraId, actorId in common.cameras}})
+        for commonId in sorted(commonBefore.keys() - commonNow.keys()):
+            events.append({'event': 'common_lost', 'step': current.n_step, 'group': groupId, 'id': commonId})
+
+        # dangers keyed by rule and objects (the score of a scored danger changes at every step, it is not a new danger)
+        dangersBefore = {(danger.rule, danger.subject, danger.other) for danger in before.dangers} if before else set()
+        dangersNow = {(danger.rule, danger.subject, danger.other) for danger in group.dangers}
+        for danger in group.dangers:
+            if (danger.rule, danger.subject, danger.other) not in dangersBefore:
+                events.append({'event': 'danger', 'step': current.n_step, 'group': groupId, **danger_dict(danger)})
+        for rule, subject, other in sorted(dangersBefore - dangersNow, key=danger_order):
+            events.append({'event': 'danger_cleared', 'step': current.n_step, 'group': groupId, 'rule': rule, 'subject': subject, 'other': other})
+    return events
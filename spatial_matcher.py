@@ -0,0 +1,133 @@
+import numpy as np
+
+from ccs import Actor
+
+# span of the cell keys along y (cells of a grid are keyed as cx * CELL_SPAN + cy)
+CELL_SPAN = 1 << 32
+
+class SpatialGrid():
+    """
+    Uniform grid index of 2D points (e.g. world positions on the ground plane): points sorted by cell key, so that
+    the points near a set of queries are found with a binary search per neighbor cell, for all the queries at once.
+
+    Attributes
+    ----------
+    points : np.ndarray
+        indexed points (n x 2)
+    cellSize : float
+        side of the cells (the largest radius of the neighbor queries)
+    """
+    def __init__(self, points, cellSize):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.cellSize = cellSize
+        keys = self.keys(np.floor(self.points / cellSize).astype(np.int64))
+        self.__order = np.argsort(keys, kind='stable')
+        self.__keys = keys[self.__order]
+
+    @staticmethod
+    def keys(cells):
+        return cells[:, 0] * CELL_SPAN + cells[:, 1]
+
+    def pairs(self, queries, radius=None):
+        """
+        Pairs (query index, point index, distance) of the queries (m x 2) and the indexed points within the radius
+        (at most the cell size), looked up in the 3 x 3 cells around each query.
+        """
+        radius = self.cellSize if radius is None else min(radius, self.cellSize)
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        cells = np.floor(queries / self.cellSize).astype(np.int64)
+        queryIndices, pointIndices = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                keys = self.keys(cells + (dx, dy))
+                starts = np.searchsorted(self.__keys, keys, 'left')
+                counts = np.searchsorted(self.__keys, keys, 'right') - starts
+
+                # ranges [start, start + count) of every query, concatenated
+                total = int(counts.sum())
+                if total:
+                    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                    queryIndices.append(np.repeat(np.arange(len(queries)), counts))
+                    pointIndices.append(self.__order[np.repeat(starts, counts) + offsets])
+        if not queryIndices:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+        queryIndices, pointIndices = np.concatenate(queryIndices), np.concatenate(pointIndices)
+        distances = np.linalg.norm(queries[queryIndices] - self.points[pointIndices], axis=1)
+        near = distances <= radius
+        return queryIndices[near], pointIndices[near], distances[near]
+
+class SpatialMatcher():
+    """
+    Cross-camera matcher of the CCS (see CentralCameraSystem(matcher=...)) by the world positions of the actors
+    (see calibration.py): two tracks of different cameras are the same object if they have the same type and stand
+    at the same place of the ground plane.
+
+    At every step of a group with changes, the free tracks (not part of a common object) of each camera are matched
+    against the common objects not seen by that camera (mean position of their members) and the free tracks of the
+    other cameras, indexed in a uniform grid (only the pairs of neighbor cells are compared, not every pair), nearest
+    pairs first. Actors without world position are never matched.
+
+    Attributes
+    ----------
+    radius : float
+        maximum distance (meters) between the positions of two tracks of the same object
+    """
+    def __init__(self, radius=2.0):
+        self.radius = radius
+
+    def match(self, group):
+        for cameraId, camera in group.cameras.items():
+            queries = [actorId for actorId in camera.actors.keys() if (cameraId, actorId) not in group.members]
+            if not queries:
+                continue
+
+            # step 1: candidates, the common objects not seen by this camera and the free tracks of the other cameras
+            commonIds = [commonId for commonId, commonObj in group.commonObjects.items() if cameraId not in commonObj.commonCamerasIds]
+            free = [(otherId, actorId) for otherId, other in group.cameras.items() if otherId != cameraId
+                    for actorId in other.actors.keys() if (otherId, actorId) not in group.members]
+            if not commonIds and not free:
+                continue
+            candidates = np.full((len(commonIds) + len(free), 2), np.nan)
+            candidateTypes = [group.commonObjects[commonId].type for commonId in commonIds]
+            for i, commonId in enumerate(commonIds):
+                members = group.commonObjects[commonId].commonCamerasIds
+                positions = np.concatenate([group.cameras[memberCameraId].positions([actorId]) for memberCameraId, actorId in members.items()])
+                if np.isfinite(positions).any():
+                    candidates[i] = np.nanmean(positions, axis=0)
+            start = len(commonIds)
+            for otherId in group.cameras.keys():
+                actorIds = [actorId for freeCameraId, actorId in free if freeCameraId == otherId]
+                if actorIds:
+                    candidates[start:start + len(actorIds)] = group.cameras[otherId].positions(actorIds)
+                    candidateTypes.extend(group.cameras[otherId].actors[actorId].type for actorId in actorIds)
+                    start += len(actorIds)
+
+            # step 2: pairs within the radius (grid of the located candidates), of the same type
+            located = np.flatnonzero(np.isfinite(candidates).all(axis=1))
+            positions = camera.positions(queries)
+            queryRows = np.flatnonzero(np.isfinite(positions).all(axis=1))
+            if not len(located) or not len(queryRows):
+                continue
+            rows, columns, distances = SpatialGrid(candidates[located], self.radius).pairs(positions[queryRows])
+            rows, columns = queryRows[rows], located[columns]
+            sameType = np.array([camera.actors[queries[row]].type == candidateTypes[column] for row, column in zip(rows.tolist(), columns.tolist())], dtype=bool)
+            rows, columns, distances = rows[sameType], columns[sameType], distances[sameType]
+
+            # step 3: nearest pairs first, one per query and candidate
+            usedRows, usedColumns = set(), set()
+            for index in np.argsort(distances, kind='stable').tolist():
+                row, column = int(rows[index]), int(columns[index])
+                if row in usedRows or column in usedColumns:
+                    continue
+                usedRows.add(row)
+                usedColumns.add(column)
+                actorId = queries[row]
+                if column < len(commonIds):
+                    group.addMember(commonIds[column], cameraId, actorId)
+                else:
+                    otherId, otherActorId = free[column - len(commonIds)]
+                    actor = camera.actors[actorId]
+                    commonId = group.getNewCommonId()
+                    group.commonObjects[commonId] = Actor(commonId, actor.type, actor.color)
+                    group.addMember(commonId, cameraId, actorId)
+                    group.addMember(commonId, otherId, otherActorId)
@@ -0,0 +1,59 @@
+"""
+Regression tests of the common objects of the parallel CCS (ccs_parallel.ParallelCentralCameraSystem) against the
+serial one (ccs.CentralCameraSystem).
+
+Usage (from the repository root): python -m unittest tests.test_ccs_parallel
+"""
+
+import unittest
+
+import numpy as np
+
+from actor_store import class_code, color_code
+from ccs import CentralCameraSystem
+from ccs_parallel import ParallelCentralCameraSystem
+from spatial_matcher import SpatialMatcher
+
+def common_objects(ccs):
+    return {groupId: [(commonObj.id, commonObj.type, commonObj.color, dict(commonObj.commonCamerasIds)) for commonObj in group.common]
+            for groupId, group in ccs.data.items()}
+
+class ParallelCommonTest(unittest.TestCase):
+
+    def compare(self, batches, **options):
+
+        # same batches (per step, cameraId => columns) to both engines, same common objects after every step
+        serial = CentralCameraSystem(**options)
+        expected = []
+        for batch in batches:
+            serial.ingest(1, batch)
+            serial.step()
+            expected.append(common_objects(serial))
+        for mode in ('thread', 'process'):
+            with self.subTest(mode=mode), ParallelCentralCameraSystem(workers=2, mode=mode, **options) as parallel:
+                for step, batch in enumerate(batches):
+                    parallel.ingest(1, batch)
+                    parallel.step()
+                    self.assertEqual(parallel.common, expected[step], f"step {step}")
+        return serial
+
+    def test_matcher_over_free_tracks(self):
+
+        # the same car on two cameras, its positions converging: matched by the matcher without any dirty camera
+        cls, colors, areas = np.array([class_code('car')]), np.array([color_code('red')]), np.array([0.01])
+        batches = [{1: (np.array([5]), cls, colors, areas, None, None, np.array([[0.0, 0.0]])),
+                    2: (np.array([8]), cls, colors, areas, None, None, np.array([[gap, 0.0]]))} for gap in np.linspace(20.0, 1.0, 10)]
+        serial = self.compare(batches, columnar=True, matcher=SpatialMatcher(2.0))
+        self.assertEqual(len(serial.data[1].common), 1)
+
+    def test_color_change_of_a_member(self):
+
+        # a matched person changing color (same index key, no dirty camera): the common object takes the new color
+        cls, areas = np.array([class_code('person')]), np.array([0.01])
+        batches = [{cameraId: (np.array([cameraId]), cls, np.array([color_code(color)]), areas) for cameraId in (1, 2)}
+                   for color in ('red', 'red', 'blue', 'blue')]
+        serial = self.compare(batches, columnar=True)
+        self.assertEqual(serial.data[1].common[0].color, 'blue')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+"""
+Regression tests of the appearance matching (reid.py).
+
+Usage (from the repository root): python -m unittest tests.test_reid
+"""
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import reid
+
+class AssignTest(unittest.TestCase):
+
+    def assignments(self, similarity, threshold):
+
+        # pairs of the optimal assignment (scipy) and of the greedy fallback (no scipy)
+        optimal = reid.assign(similarity, threshold)
+        with mock.patch.object(reid, 'linear_sum_assignment', None):
+            greedy = reid.assign(similarity, threshold)
+        return [list(zip(*map(np.ndarray.tolist, pairs))) for pairs in (optimal, greedy)]
+
+    @unittest.skipIf(reid.linear_sum_assignment is None, "scipy not installed")
+    def test_pair_over_threshold_is_kept(self):
+
+        # the sub-threshold pairs (0.5 + 0.5) must not outweigh the single pair over the threshold (0.9)
+        optimal, greedy = self.assignments(np.array([[0.9, 0.5], [0.5, -1.0]]), 0.8)
+        self.assertEqual(optimal, [(0, 0)])
+        self.assertEqual(optimal, greedy)
+
+    @unittest.skipIf(reid.linear_sum_assignment is None, "scipy not installed")
+    def test_type_mismatches_are_never_assigned(self):
+
+        # -1: different types (see ReidMatcher.match)
+        optimal, greedy = self.assignments(np.array([[0.95, -1.0], [0.85, -1.0], [-1.0, 0.7]]), 0.8)
+        self.assertEqual(optimal, [(0, 0)])
+        self.assertEqual(optimal, greedy)
+
+if __name__ == '__main__':
+    unittest.main()
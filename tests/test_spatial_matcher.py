@@ -0,0 +1,49 @@
+"""
+Regression tests of the cross-camera matching by position (spatial_matcher.SpatialMatcher in the CCS).
+
+Usage (from the repository root): python -m unittest tests.test_spatial_matcher
+"""
+
+import unittest
+
+import numpy as np
+
+from actor_store import class_code, color_code
+from ccs import CentralCameraSystem
+from spatial_matcher import SpatialMatcher
+
+class ConvergingTracksTest(unittest.TestCase):
+
+    def converge(self, columnar):
+
+        # the same car seen by two cameras, its projected positions 20 m apart at first and converging to 1 m
+        ccs = CentralCameraSystem(columnar=columnar, matcher=SpatialMatcher(2.0))
+        cls, colors, areas = np.array([class_code('car')]), np.array([color_code('red')]), np.array([0.01])
+        for step, gap in enumerate(np.linspace(20.0, 1.0, 10)):
+            ccs.updateCameraBatch(1, 1, np.array([5]), cls, colors, areas, world=np.array([[0.0, 0.0]]))
+            ccs.updateCameraBatch(1, 2, np.array([8]), cls, colors, areas, world=np.array([[gap, 0.0]]))
+            ccs.step()
+            if gap > 2.0:
+                self.assertEqual(ccs.data[1].common, [], f"matched {gap:.1f} m apart")
+        return ccs
+
+    def test_converging_tracks_are_matched(self):
+        for columnar in (False, True):
+            with self.subTest(columnar=columnar):
+                ccs = self.converge(columnar)
+                common = ccs.data[1].common
+                self.assertEqual(len(common), 1)
+                self.assertEqual(common[0].commonCamerasIds, {1: 5, 2: 8})
+
+    def test_matched_groups_are_skipped(self):
+
+        # once every track is matched (and nothing changes), the group is not evaluated again
+        ccs = self.converge(True)
+        cls, colors, areas = np.array([class_code('car')]), np.array([color_code('red')]), np.array([0.01])
+        ccs.updateCameraBatch(1, 1, np.array([5]), cls, colors, areas, world=np.array([[0.0, 0.0]]))
+        ccs.updateCameraBatch(1, 2, np.array([8]), cls, colors, areas, world=np.array([[1.0, 0.0]]))
+        ccs.step()
+        self.assertEqual(ccs.skipped_groups, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import numpy as np
+
+# columns of the state of a tracklet: box center (pixels), scale (log of the normalized area) and aspect (log of width / height)
+STATE_COLUMNS = ('cx', 'cy', 'scale', 'aspect')
+
+def box_measurements(areas, boxes=None):
+    """
+    Measurements (n x 4, see STATE_COLUMNS) of the detections of a camera: normalized areas and (optional) boxes x1, y1, x2, y2.
+    Without boxes, only the scale is measured (center and aspect are constant).
+    """
+    areas = np.asarray(areas, dtype=np.float64)
+    z = np.zeros((len(areas), 4), dtype=np.float64)
+    z[:, 2] = np.log(np.maximum(areas, 1e-9))
+    if boxes is not None and len(areas):
+        boxes = np.asarray(boxes, dtype=np.float64)
+        z[:, 0] = (boxes[:, 0] + boxes[:, 2]) / 2
+        z[:, 1] = (boxes[:, 1] + boxes[:, 3]) / 2
+        z[:, 3] = np.log(np.maximum(boxes[:, 2] - boxes[:, 0], 1) / np.maximum(boxes[:, 3] - boxes[:, 1], 1))
+    return z
+
+class TrackletFilter():
+    """
+    Constant velocity Kalman filters of the tracklets of a camera, one per row (the rows of its ActorStore), all of
+    them predicted and corrected at once.
+
+    The center, scale and aspect of a box are filtered independently (the motion model only couples every column
+    with its own velocity, and the noises are diagonal), so the covariance of every column of a row is a 2 x 2
+    matrix (position, velocity) kept in three arrays, and a step is a few element-wise operations over all the rows.
+
+    The movement of an actor comes from its filtered scale velocity: approaching when the box grows faster than
+    the deadband, leaving when it shrinks faster than the deadband, unchanged otherwise (a single noisy box does
+    not flip it).
+
+    Attributes
+    ----------
+    x, v : np.ndarray(float64)
+        filtered position and velocity (per step) of every column of every row (capacity x 4)
+    p00, p01, p11 : np.ndarray(float64)
+        covariance of position and velocity of every column of every row (capacity x 4)
+    measurementStd : np.ndarray
+        standard deviation of the measurements of each column
+    accelerationStd : np.ndarray
+        standard deviation of the acceleration (per step) of each column
+    deadband : float
+        minimum scale velocity (relative growth of the box per step) to change the movement
+    """
+    def __init__(self, capacity=64, measurementStd=(4.0, 4.0, 0.1, 0.1), accelerationStd=(2.0, 2.0, 0.02, 0.02), deadband=0.01):
+        self.measurementStd = np.asarray(measurementStd, dtype=np.float64)
+        self.accelerationStd = np.asarray(accelerationStd, dtype=np.float64)
+        self.deadband = deadband
+        self.x = np.zeros((capacity, 4))
+        self.v = np.zeros((capacity, 4))
+        self.p00 = np.zeros((capacity, 4))
+        self.p01 = np.zeros((capacity, 4))
+        self.p11 = np.zeros((capacity, 4))
+
+    def grow(self, capacity):
+        for name in ('x', 'v', 'p00', 'p01', 'p11'):
+            old = getattr(self, name)
+            new = np.zeros((capacity, 4))
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def init(self, rows, z):
+
+        # new tracklets: at the measured position, not moving, with an uncertain velocity
+        self.x[rows] = z
+        self.v[rows] = 0
+        self.p00[rows] = self.measurementStd ** 2
+        self.p01[rows] = 0
+        self.p11[rows] = (10 * self.accelerationStd) ** 2
+
+    def update(self, rows, z, dt=1):
+        """
+        Predicts the tracklets of the rows dt steps ahead (one value, or one per row: steps since they were last seen)
+        and corrects them with their measurements. Returns the movement code of every row (see ccs.Movement): 1 if
+        approaching, 2 if leaving and 0 if the scale velocity is within the deadband.
+        """
+        dt = np.asarray(dt, dtype=np.float64).reshape(-1, 1)
+        x, v = self.x[rows], self.v[rows]
+        p00, p01, p11 = self.p00[rows], self.p01[rows], self.p11[rows]
+
+        # step 1: prediction (F = [[1, dt], [0, 1]], white noise acceleration)
+        q = self.accelerationStd ** 2
+        x = x + v * dt
+        p00 = p00 + dt * (2 * p01 + dt * p11) + q * dt ** 4 / 4
+        p01 = p01 + dt * p11 + q * dt ** 3 / 2
+        p11 = p11 + q * dt ** 2
+
+        # step 2: correction with the measured position (H = [1, 0])
+        s = p00 + self.measurementStd ** 2
+        k0, k1 = p00 / s, p01 / s
+        residual = z - x
+        self.x[rows] = x + k0 * residual
+        self.v[rows] = v + k1 * residual
+        self.p00[rows] = (1 - k0) * p00
+        self.p01[rows] = (1 - k0) * p01
+        self.p11[rows] = p11 - k1 * p01
+
+        # step 3: movement from the scale velocity
+        scaleVelocity = self.v[rows, 2]
+        return np.where(scaleVelocity > self.deadband, 1, np.where(scaleVelocity < -self.deadband, 2, 0)).astype(np.int8)
@@ -0,0 +1,115 @@
+import numpy as np
+
+class TrajectoryStore():
+    """
+    Recent trajectory of every actor of a camera: a ring buffer of the last depth observations (step, box, normalized
+    area and world position) per actor, all of them in preallocated NumPy arrays (one slot per actor).
+
+    Slots of evicted actors are recycled through a free list, and a full ring overwrites its oldest observation,
+    so memory only depends on the depth and the number of actors alive at the same time (never on the run time).
+
+    Attributes
+    ----------
+    depth : int
+        observations kept per actor
+    steps : np.ndarray(int64)
+        step of every observation (slots x depth, -1 if empty)
+    boxes : np.ndarray(float32)
+        box (x1, y1, x2, y2) of every observation (slots x depth x 4, NaN if unknown)
+    areas : np.ndarray(float64)
+        normalized area of every observation (slots x depth)
+    world : np.ndarray(float64)
+        world position (x, y) of every observation (slots x depth x 2, NaN if unknown, see calibration.py)
+    head : np.ndarray(int64)
+        position of the next observation of every slot in its ring
+    count : np.ndarray(int64)
+        number of observations of every slot (at most depth)
+    slots : {}
+        dictionary of int, int. Slot of each actor id, in insertion order
+    """
+    def __init__(self, depth=32, capacity=64):
+        self.depth = depth
+        self.slots = {}
+        self.__free = []
+        self.__allocate(capacity, 0)
+
+    def __allocate(self, capacity, previous):
+
+        # columns of the new capacity, keeping the previous slots (doubling, as ActorStore)
+        columns = {'steps': (np.int64, (self.depth,), -1), 'boxes': (np.float32, (self.depth, 4), np.nan), 'areas': (np.float64, (self.depth,), 0),
+                   'world': (np.float64, (self.depth, 2), np.nan), 'head': (np.int64, (), 0), 'count': (np.int64, (), 0)}
+        for name, (dtype, shape, fill) in columns.items():
+            new = np.full((capacity,) + shape, fill, dtype=dtype)
+            if previous:
+                new[:previous] = getattr(self, name)
+            setattr(self, name, new)
+        self.__free = list(range(capacity - 1, previous - 1, -1)) + self.__free
+
+    def __len__(self):
+        return len(self.slots)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ('steps', 'boxes', 'areas', 'world', 'head', 'count'))
+
+    def record(self, ids, n_step, areas, boxes=None, world=None):
+        """
+        Appends an observation to the trajectory of every actor of a detection batch (new actors get a slot).
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        slots = np.fromiter((self.slots.get(id, -1) for id in ids.tolist()), dtype=np.int64, count=len(ids))
+
+        # step 1: slots of the new actors, with empty rings
+        new = slots < 0
+        if new.any():
+            needed = int(new.sum())
+            if needed > len(self.__free):
+                self.__allocate(max(2 * len(self.head), len(self.head) + needed - len(self.__free)), len(self.head))
+            slots[new] = [self.__free.pop() for _ in range(needed)]
+            self.slots.update(zip(ids[new].tolist(), slots[new].tolist()))
+            self.head[slots[new]] = 0
+            self.count[slots[new]] = 0
+            self.steps[slots[new]] = -1
+
+        # step 2: observations written at the head of every ring
+        positions = self.head[slots]
+        self.steps[slots, positions] = n_step
+        self.areas[slots, positions] = areas
+        self.boxes[slots, positions] = np.nan if boxes is None else boxes
+        self.world[slots, positions] = np.nan if world is None else world
+        self.head[slots] = (positions + 1) % self.depth
+        self.count[slots] = np.minimum(self.count[slots] + 1, self.depth)
+
+    def release(self, ids):
+
+        # evicted actors: their slots are reused by the next new actors
+        for id in np.asarray(ids).tolist():
+            slot = self.slots.pop(id, None)
+            if slot is not None:
+                self.count[slot] = 0
+                self.__free.append(slot)
+
+    def last(self, k, column='world', ids=None):
+        """
+        Last k observations of a column ('steps', 'boxes', 'areas' or 'world') of the given actors (all of them by
+        default, in insertion order), oldest first: array of len(ids) x k (x the column shape), padded at the beginning
+        with -1 (steps) or NaN for the actors with fewer observations. Returns the actor ids and the array.
+        """
+        k = min(k, self.depth)
+        if ids is None:
+            ids = np.fromiter(self.slots.keys(), dtype=np.int64, count=len(self.slots))
+        slots = np.array([self.slots[id] for id in np.asarray(ids).tolist()], dtype=np.int64)
+        offsets = np.arange(k)
+        positions = (self.head[slots, None] - k + offsets) % self.depth
+        values = getattr(self, column)[slots[:, None], positions]
+        missing = offsets[None, :] < k - np.minimum(self.count[slots], k)[:, None]
+        if values.dtype.kind == 'f':
+            values[missing] = np.nan
+        else:
+            values[missing] = -1
+        return np.asarray(ids), values
+
+    def last_positions(self, k, ids=None):
+        return self.last(k, 'world', ids)
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+# policies of a camera buffer when it is full (the consumer is falling behind the source)
+POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+class CameraStream():
+    """
+    Frames of a camera read from any OpenCV capturable source (video file, device index, RTSP/HTTP stream...)
+    by a thread of its own into a bounded buffer.
+
+    Attributes
+    ----------
+    source : str or int
+        source of cv2.VideoCapture
+    policy : str
+        what to do when the buffer is full: 'drop_oldest' (keep the latest frames, for live sources), 'drop_newest'
+        (discard the new frames) or 'block' (stop reading until there is room: no frame is lost, for recorded files)
+    realtime : bool
+        read at the frame rate of the source (to replay a recorded file as if it were live)
+    captured, delivered, dropped : int
+        frames read from the source, taken by the consumer and discarded because of the policy
+    lag, max_lag : float
+        seconds between the capture and the delivery of the last frame delivered (and the maximum one)
+    finished : bool
+        whether the source has no more frames
+    fps : float
+        frame rate of the source (0 if unknown)
+    shape : ()
+        shape of the frames of the source (height, width, channels)
+    """
+    def __init__(self, source, buffer=4, policy='drop_oldest', realtime=False):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy}")
+        self.source = source
+        self.policy = policy
+        self.realtime = realtime
+        self.captured = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.finished = False
+        self.__buffer = deque()
+        self.__size = buffer
+        self.__condition = threading.Condition()
+        self.__stop = False
+        self.__capture = cv2.VideoCapture(source)
+        if not self.__capture.isOpened():
+            raise IOError(f"Cannot open video source {source}")
+        self.fps = self.__capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self.shape = (int(self.__capture.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(self.__capture.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+        self.__thread = threading.Thread(target=self.__read, daemon=True)
+        self.__thread.start()
+
+    def __read(self):
+        period = 1.0 / self.fps if self.realtime and self.fps > 0 else 0.0
+        start = time.perf_counter()
+        try:
+            while not self.__stop:
+                ok, frame = self.__capture.read()
+                if not ok:
+                    break
+                captured = time.perf_counter()
+                with self.__condition:
+                    if len(self.__buffer) >= self.__size:
+                        if self.policy == 'drop_newest':
+                            self.dropped += 1
+                            frame = None
+                        elif self.policy == 'drop_oldest':
+                            self.__buffer.popleft()
+                            self.dropped += 1
+                        else:
+                            while len(self.__buffer) >= self.__size and not self.__stop:
+                                self.__condition.wait()
+                    if frame is not None:
+                        self.__buffer.append((captured, frame))
+                    self.captured += 1
+                    self.__condition.notify_all()
+
+                # pacing the reads as the source frame rate (realtime replay)
+                if period:
+                    delay = start + self.captured * period - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        finally:
+            self.__capture.release()
+            with self.__condition:
+                self.finished = True
+                self.__condition.notify_all()
+
+    def get(self):
+        """
+        Next frame of the buffer (waiting for it if needed), or None if the source has finished.
+        """
+        with self.__condition:
+            while not self.__buffer and not self.finished:
+                self.__condition.wait()
+            if not self.__buffer:
+                return None
+            captured, frame = self.__buffer.popleft()
+            self.__condition.notify_all()
+        self.delivered += 1
+        self.lag = time.perf_counter() - captured
+        self.max_lag = max(self.max_lag, self.lag)
+        return frame
+
+    def close(self):
+        with self.__condition:
+            self.__stop = True
+            self.__condition.notify_all()
+        self.__thread.join()
+
+class VideoSource():
+    """
+    Synchronized frame sets of several camera streams (see CameraStream): one frame of every camera per step.
+    Cameras whose source has finished are left out of the next frame sets, until all of them have finished.
+
+    Attributes
+    ----------
+    streams : {}
+        dictionary of cameraId, CameraStream
+    """
+    def __init__(self, sources, buffer=4, policy='drop_oldest', realtime=False):
+        self.streams = {}
+        try:
+            for cameraId, source in sources.items():
+                self.streams[cameraId] = CameraStream(source, buffer, policy, realtime)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def frame_sets(self):
+
+        # (step, {cameraId: frame}) as FrameLoader does for the frame files
+        step = 0
+        while True:
+            frames = {}
+            for cameraId, stream in self.streams.items():
+                frame = stream.get()
+                if frame is not None:
+                    frames[cameraId] = frame
+            if not frames:
+                break
+            yield step, frames
+            step += 1
+
+    def stats(self):
+        return {cameraId: {'captured': stream.captured, 'delivered': stream.delivered, 'dropped': stream.dropped,
+                           'lag': stream.lag, 'max_lag': stream.max_lag} for cameraId, stream in self.streams.items()}
+
+    def close(self):
+        for stream in self.streams.values():
+            stream.close()